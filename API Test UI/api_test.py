@@ -25,24 +25,28 @@ from datetime import datetime
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from DAGs.muse_api import MuseConnector
-from DAGs.adzuna_api import AdzunaConnector
-from DAGs.hacker_news_api import HackerNewsConnector
+from DAGs.api_connection.muse_api import MuseConnector
+from DAGs.api_connection.adzuna_api import AdzunaConnector
+from DAGs.api_connection.hacker_news_api import HackerNewsConnector
+from result_store import ResultStore, parse_filters
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
-# In-memory storage for test results
-test_results = {
-    'muse': {'status': None, 'timestamp': None, 'data': None, 'error': None},
-    'adzuna': {'status': None, 'timestamp': None, 'data': None, 'error': None},
-    'hackernews': {'status': None, 'timestamp': None, 'data': None, 'error': None}
-}
+HN_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hackernews_cache.json')
+
+SOURCES = ['muse', 'adzuna', 'hackernews']
+
+# Test results, bounded in memory; set RESULT_STORE_SPILL_PATH to keep evicted results in SQLite
+test_results = ResultStore(
+    max_records=int(os.environ.get('RESULT_STORE_MAX_RECORDS', 5000)),
+    spill_path=os.environ.get('RESULT_STORE_SPILL_PATH')
+)
 
 @app.route('/')
 def index():
     """Render the main page with API test forms."""
-    return render_template('index.html', test_results=test_results)
+    return render_template('index.html', test_results=test_results.summary(SOURCES))
 
 # @app.route('/test/muse', methods=['POST'])
 # def test_muse():
@@ -155,12 +159,12 @@ def test_adzuna():
         
         
         # Store results
-        test_results['adzuna'] = {
+        test_results.put('adzuna', {
             'status': 'success',
             'data': jobs,
             'error': None,
             'count': len(jobs)
-        }
+        })
         
         return jsonify({
             'status': 'success', 
@@ -169,12 +173,12 @@ def test_adzuna():
     
     except Exception as e:
         error_trace = traceback.format_exc()
-        test_results['adzuna'] = {
+        test_results.put('adzuna', {
             'status': 'error',
             'data': None,
             'error': str(e),
             'error_trace': error_trace
-        }
+        })
         return jsonify({'status': 'error', 'message': str(e), 'trace': error_trace})
 
 @app.route('/test/hackernews', methods=['POST'])
@@ -183,89 +187,13 @@ def test_hackernews():
     try:
         start_time = time.time()
         
-        # Directly find the hiring thread using Algolia API
-        query = "Ask HN: Who is hiring?"
-        algolia_url = "https://hn.algolia.com/api/v1/search_by_date"
-        params = {
-            "query": query,
-            "tags": "story",
-            "numericFilters": "points>20"  # Hiring threads usually have high point counts
-        }
-        
-        response = requests.get(algolia_url, params=params)
-        response.raise_for_status()
-        results = response.json().get('hits', [])
-        
-        # Find the most relevant thread
-        thread_id = None
-        for result in results:
-            if "hiring" in result.get('title', '').lower() and "ask hn" in result.get('title', '').lower():
-                thread_id = result.get('objectID')
-                break
-        
-        if not thread_id:
-            raise Exception("Could not find a recent 'Who's hiring' thread")
-        
-        # Get comments from the thread using Hacker News API
-        hn_api_url = f"https://hacker-news.firebaseio.com/v0/item/{thread_id}.json"
-        response = requests.get(hn_api_url)
-        response.raise_for_status()
-        thread_data = response.json()
-        
-        # Get the first 5 comment IDs
-        comment_ids = thread_data.get('kids', [])[:]
-        
-        # Fetch each comment
-        comments = []
-        for kid_id in comment_ids:
-            comment_url = f"https://hacker-news.firebaseio.com/v0/item/{kid_id}.json"
-            comment_response = requests.get(comment_url)
-            comment_response.raise_for_status()
-            comment_data = comment_response.json()
-            
-            # Only add non-deleted, non-dead comments
-            if comment_data and not comment_data.get('deleted', False) and not comment_data.get('dead', False):
-                comments.append(comment_data)
-        
-        # Parse the comments into job data
-        jobs = []
-        for comment in comments:
-            if not comment or 'text' not in comment:
-                continue
-                
-            # Create a basic job object from the comment
-            job = {
-                'job_id': f"hn-{comment.get('id')}",
-                'posted_date': datetime.fromtimestamp(comment.get('time', 0)).strftime('%Y-%m-%d'),
-                'author': comment.get('by', ''),
-                'description': comment.get('text', ''),
-                'source_api': 'hackernews',
-                'source_url': f"https://news.ycombinator.com/item?id={comment.get('id')}"
-            }
-            
-            # Extract basic company and title information with regex
-            text = comment.get('text', '')
-            
-            # Try to find company name
-            company_match = re.search(r'^([^|:]+)(?:\s*[|:]\s*|\s+is\s+hiring)', text, re.IGNORECASE | re.MULTILINE)
-            if company_match:
-                job['company'] = company_match.group(1).strip()
-            
-            # Try to find job title
-            title_match = re.search(r'(?:hiring|for|hiring for|looking for)[^|:]*?([^|:,]*?(?:engineer|developer|designer|manager|director|lead|architect|consultant|scientist|specialist)[^|:,]*?)(?:at|\.|,|\||$)', text, re.IGNORECASE)
-            if title_match:
-                job['title'] = title_match.group(1).strip()
-            
-            # Try to find location
-            if re.search(r'\bREMOTE\b', text, re.IGNORECASE):
-                job['location'] = 'Remote'
-            
-            # Add job to results if we extracted useful information
-            if 'company' in job or 'title' in job:
-                jobs.append(job)
+        # Comments seen by earlier runs are cached, so only new ones are fetched
+        connector = HackerNewsConnector(cache_path=HN_CACHE_PATH)
+        thread_id = connector.find_hiring_thread()
+        jobs = connector.parse_jobs(connector.extract_jobs(thread_id))
         
         # Store results
-        test_results['hackernews'] = {
+        test_results.put('hackernews', {
             'status': 'success',
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'data': jobs,
@@ -273,7 +201,7 @@ def test_hackernews():
             'count': len(jobs),
             'time_taken': f"{time.time() - start_time:.2f} seconds",
             'thread_id': thread_id
-        }
+        })
         
         return jsonify({
             'status': 'success', 
@@ -284,26 +212,47 @@ def test_hackernews():
     
     except Exception as e:
         error_trace = traceback.format_exc()
-        test_results['hackernews'] = {
+        test_results.put('hackernews', {
             'status': 'error',
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'data': None,
             'error': str(e),
             'error_trace': error_trace
-        }
+        })
         return jsonify({'status': 'error', 'message': str(e), 'trace': error_trace})
 
 @app.route('/view-data/<source>')
 def view_data(source):
-    """View the data fetched from an API source."""
-    if source not in test_results or test_results[source]['data'] is None:
+    """View one page of the data fetched from an API source.
+
+    Query parameters: page, per_page, fields (comma separated dotted paths),
+    q (text search) and filter (repeatable, field:value).
+    """
+    status = test_results.status(source)
+    if source not in SOURCES or not status.get('has_data'):
         flash(f'No data available for {source}', 'error')
         return render_template('view_data.html', source=source, data=None)
     
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 200)
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    query = request.args.get('q', '').strip()
+    raw_filters = request.args.getlist('filter')
+    
+    data, matched = test_results.page(source, page=page, per_page=per_page, fields=fields,
+                                      query=query, filters=parse_filters(raw_filters))
     return render_template('view_data.html', 
                           source=source, 
-                          data=test_results[source]['data'],
-                          count=len(test_results[source]['data']))
+                          data=data,
+                          count=status.get('count'),
+                          matched=matched,
+                          page=page,
+                          per_page=per_page,
+                          pages=max((matched + per_page - 1) // per_page, 1),
+                          fields=fields,
+                          q=query,
+                          filters=raw_filters,
+                          status=status)
 
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
@@ -564,12 +513,47 @@ if __name__ == '__main__':
             <div class="card">
                 <div class="card-header">
                     <h3>{{ source|capitalize }} API Data <span class="badge bg-primary">{{ count }} items</span></h3>
+                    {% if status and status.dropped %}
+                        <small class="text-muted">{{ status.dropped }} items were evicted from memory to keep the UI responsive.</small>
+                    {% endif %}
                 </div>
                 <div class="card-body">
-                    {% if data %}
+                    {% if data is not none %}
+                        <form method="get" class="row g-2 mb-4">
+                            <div class="col-md-3">
+                                <input type="text" class="form-control" name="q" value="{{ q }}" placeholder="Search text">
+                            </div>
+                            <div class="col-md-3">
+                                <input type="text" class="form-control" name="filter" value="{{ filters[0] if filters else '' }}" placeholder="field:value">
+                            </div>
+                            <div class="col-md-3">
+                                <input type="text" class="form-control" name="fields" value="{{ fields|join(',') }}" placeholder="Columns, e.g. title,company.display_name">
+                            </div>
+                            <div class="col-md-1">
+                                <input type="number" class="form-control" name="per_page" value="{{ per_page }}" min="1" max="200">
+                            </div>
+                            <div class="col-md-2">
+                                <button type="submit" class="btn btn-outline-primary w-100">Apply</button>
+                            </div>
+                        </form>
+                        
+                        <p>Showing page {{ page }} of {{ pages }} ({{ matched }} matching items)</p>
+                        
                         <div class="mb-4">
                             <h4>Data Preview</h4>
-                            {% for job in data[:] %}
+                            {% if fields %}
+                                <table class="table table-sm table-striped">
+                                    <thead>
+                                        <tr>{% for field in fields %}<th>{{ field }}</th>{% endfor %}</tr>
+                                    </thead>
+                                    <tbody>
+                                        {% for job in data %}
+                                            <tr>{% for field in fields %}<td>{{ job[field] if job[field] is not none else '' }}</td>{% endfor %}</tr>
+                                        {% endfor %}
+                                    </tbody>
+                                </table>
+                            {% else %}
+                            {% for job in data %}
                                 <div class="card mb-3">
                                     <div class="card-body">
                                         {% if source == 'muse' %}
@@ -595,6 +579,9 @@ if __name__ == '__main__':
                                             <p><strong>ID:</strong> {{ job.job_id }}</p>
                                             <p><strong>Posted Date:</strong> {{ job.posted_date }}</p>
                                             <p><strong>Location:</strong> {{ job.location if job.location else 'N/A' }}</p>
+                                            {% if job.salary_min %}
+                                                <p><strong>Salary:</strong> {{ job.salary_currency or '' }} {{ job.salary_min }} - {{ job.salary_max }}</p>
+                                            {% endif %}
                                             {% if job.skills_required %}
                                                 <p><strong>Skills:</strong> {{ ', '.join(job.skills_required) }}</p>
                                             {% endif %}
@@ -602,9 +589,22 @@ if __name__ == '__main__':
                                     </div>
                                 </div>
                             {% endfor %}
+                            {% endif %}
                         </div>
                         
-                        <h4>Raw JSON Data</h4>
+                        <nav aria-label="pages">
+                            <ul class="pagination">
+                                <li class="page-item {{ 'disabled' if page <= 1 }}">
+                                    <a class="page-link" href="{{ url_for('view_data', source=source, page=page - 1, per_page=per_page, fields=fields|join(','), q=q, filter=filters) }}">Previous</a>
+                                </li>
+                                <li class="page-item active"><span class="page-link">{{ page }} / {{ pages }}</span></li>
+                                <li class="page-item {{ 'disabled' if page >= pages }}">
+                                    <a class="page-link" href="{{ url_for('view_data', source=source, page=page + 1, per_page=per_page, fields=fields|join(','), q=q, filter=filters) }}">Next</a>
+                                </li>
+                            </ul>
+                        </nav>
+                        
+                        <h4>Raw JSON Data (this page)</h4>
                         <pre><code>{{ data|tojson(indent=2) }}</code></pre>
                     {% else %}
                         <div class="alert alert-warning">No data available.</div>
@@ -0,0 +1,156 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def get_path(record: Any, path: str) -> Any:
+    """Resolve a dotted path like ``company.display_name`` or ``locations.0.name``."""
+    value = record
+    for part in path.split('.'):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
+
+
+def parse_filters(raw_filters: List[str]) -> List[Tuple[str, str]]:
+    # "company.display_name:acme" -> ("company.display_name", "acme")
+    filters = []
+    for raw in raw_filters:
+        if ':' in raw:
+            field, value = raw.split(':', 1)
+            if field.strip() and value.strip():
+                filters.append((field.strip(), value.strip().lower()))
+    return filters
+
+
+def matches(record: Dict[str, Any], query: Optional[str], filters: List[Tuple[str, str]]) -> bool:
+    for field, value in filters:
+        if value not in str(get_path(record, field) or '').lower():
+            return False
+    if query:
+        return query in json.dumps(record, ensure_ascii=False).lower()
+    return True
+
+
+def project(record: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    return {field: get_path(record, field) for field in fields} if fields else record
+
+
+class ResultStore:
+    """Test results per source, holding at most ``max_records`` job records in memory.
+
+    Sources are evicted least recently used first. With ``spill_path`` the
+    evicted records move to a local SQLite file and stay viewable; without it
+    they are dropped and only the status metadata is kept.
+    """
+
+    def __init__(self, max_records: int = 5000, spill_path: Optional[str] = None):
+        self.max_records = max_records
+        self.spill_path = spill_path
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._data: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        if spill_path:
+            with self._connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS results (source TEXT, idx INTEGER, payload TEXT, '
+                             'PRIMARY KEY (source, idx))')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.spill_path, timeout=30)
+
+    def put(self, source: str, result: Dict[str, Any]):
+        data = result.get('data')
+        meta = {key: value for key, value in result.items() if key != 'data'}
+        meta['has_data'] = data is not None
+        meta['count'] = len(data) if data is not None else meta.get('count')
+        meta['location'] = None
+        meta['dropped'] = 0
+        with self._lock:
+            self._discard(source)
+            self._meta[source] = meta
+            if data is not None:
+                self._data[source] = list(data)
+                meta['location'] = 'memory'
+                self._evict()
+
+    def status(self, source: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._meta.get(source, {'status': None, 'timestamp': None, 'error': None}))
+
+    def summary(self, sources: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {source: self.status(source) for source in sources}
+
+    def page(self, source: str, page: int = 1, per_page: int = 20, fields: Optional[List[str]] = None,
+             query: Optional[str] = None, filters: Optional[List[Tuple[str, str]]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of records matching ``query``/``filters`` and the total number of matches."""
+        query = query.lower() if query else None
+        filters = filters or []
+        start = (max(page, 1) - 1) * per_page
+        with self._lock:
+            location = self._meta.get(source, {}).get('location')
+            if location == 'memory':
+                self._data.move_to_end(source)
+                records = self._data[source]
+            elif location != 'sqlite':
+                return [], 0
+
+        if location == 'memory':
+            if not query and not filters:
+                return [project(r, fields) for r in records[start:start + per_page]], len(records)
+            matched = [r for r in records if matches(r, query, filters)]
+            return [project(r, fields) for r in matched[start:start + per_page]], len(matched)
+        return self._page_spilled(source, start, per_page, fields, query, filters)
+
+    def _page_spilled(self, source, start, per_page, fields, query, filters):
+        with self._connect() as conn:
+            if not query and not filters:
+                total = conn.execute('SELECT COUNT(*) FROM results WHERE source = ?', (source,)).fetchone()[0]
+                rows = conn.execute('SELECT payload FROM results WHERE source = ? ORDER BY idx LIMIT ? OFFSET ?',
+                                    (source, per_page, start))
+                return [project(json.loads(payload), fields) for (payload,) in rows], total
+            # Stream the rows so only the requested page is kept. No SQL prefilter:
+            # SQLite's LOWER only folds ASCII, so matches() alone decides, as in memory
+            items, total = [], 0
+            for (payload,) in conn.execute('SELECT payload FROM results WHERE source = ? ORDER BY idx', (source,)):
+                record = json.loads(payload)
+                if not matches(record, query, filters):
+                    continue
+                if start <= total < start + per_page:
+                    items.append(project(record, fields))
+                total += 1
+            return items, total
+
+    def _discard(self, source: str):
+        self._data.pop(source, None)
+        if self.spill_path and self._meta.get(source, {}).get('location') == 'sqlite':
+            with self._connect() as conn:
+                conn.execute('DELETE FROM results WHERE source = ?', (source,))
+
+    def _in_memory(self) -> int:
+        return sum(len(records) for records in self._data.values())
+
+    def _evict(self):
+        while self._in_memory() > self.max_records and self._data:
+            source, records = self._data.popitem(last=False)
+            meta = self._meta[source]
+            if self.spill_path:
+                with self._connect() as conn:
+                    conn.executemany('INSERT OR REPLACE INTO results (source, idx, payload) VALUES (?, ?, ?)',
+                                     ((source, i, json.dumps(r, ensure_ascii=False)) for i, r in enumerate(records)))
+                meta['location'] = 'sqlite'
+            elif not self._data:
+                # A single result larger than the budget keeps its first max_records
+                meta['dropped'] = len(records) - self.max_records
+                self._data[source] = records[:self.max_records]
+                return
+            else:
+                meta['location'] = None
+                meta['has_data'] = False
+                meta['dropped'] = len(records)
+            print(f"Evicted {len(records)} {source} records from memory")
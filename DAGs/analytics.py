@@ -0,0 +1,162 @@
+import os
+import re
+import glob
+import json
+import time
+import argparse
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import duckdb
+
+# The reports of sql/job_market_queries.sql on DuckDB, in process, against the
+# standardized files on disk instead of the BigQuery table: the transform_data
+# export (transformed_data/jobs_data_standardized.json) or the transform
+# service's transformed/ objects (.json or .parquet). The files are registered
+# as one standardized_jobs view, and translate() rewrites the BigQuery-only
+# syntax of each query for DuckDB.
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql', 'job_market_queries.sql')
+DEFAULT_INPUTS = ['transformed_data/jobs_data_standardized.json']
+VIEW = 'standardized_jobs'
+COLUMNS = ('job_title', 'job_description', 'job_url', 'posted_date', 'job_category', 'job_type',
+           'company_name', 'salary', 'source')
+EXTENSIONS = ('.parquet', '.json', '.ndjson', '.csv')
+# transform_data writes no source column, but the URLs tell the sources apart
+SOURCE_FROM_URL = ("CASE WHEN job_url LIKE '%adzuna.%' THEN 'adzuna' WHEN job_url LIKE '%jooble.%' THEN 'jooble' "
+                   "WHEN job_url LIKE '%themuse.%' THEN 'muse' END")
+
+# BigQuery functions without a DuckDB equivalent of the same name and semantics.
+# REGEXP_EXTRACT returns the capture group, or NULL when nothing matches; every
+# pattern in the queries has exactly one group.
+MACROS = [
+    "CREATE OR REPLACE MACRO bq_regexp_extract(value, pattern) AS NULLIF(regexp_extract(value, pattern, 1), '')",
+    "CREATE OR REPLACE MACRO bq_format_date(fmt, value) AS strftime(value, fmt)",
+    "CREATE OR REPLACE MACRO bq_parse_date(fmt, value) AS CAST(strptime(value, fmt) AS DATE)",
+]
+TRANSLATIONS = [
+    (re.compile(r'`[^`]*\.standardized_jobs`'), VIEW),
+    (re.compile(r"\br'"), "'"),
+    (re.compile(r'\b(REGEXP_EXTRACT|FORMAT_DATE|PARSE_DATE)\(', re.I), lambda m: f"bq_{m.group(1).lower()}("),
+    (re.compile(r'\bFLOAT64\b', re.I), 'DOUBLE'),
+    # DuckDB's date_sub(part, start, end) is a difference, not an offset
+    (re.compile(r'\bDATE_SUB\(\s*(.+?),\s*INTERVAL\s+(\d+)\s+(\w+)\s*\)', re.I), r'(\1 - INTERVAL \2 \3)'),
+]
+CURRENT_DATE = re.compile(r'\bCURRENT_DATE(\(\))?', re.I)
+
+
+def load_queries(path: str = QUERIES_PATH) -> List[Tuple[str, str]]:
+    """(title, BigQuery SQL) of each report; a "-- 1. Title --" line starts one."""
+    with open(path) as f:
+        parts = re.split(r'^--\s*(\d+\..*?)\s*-*\s*$', f.read(), flags=re.M)
+    return [(title, sql.strip().rstrip(';')) for title, sql in zip(parts[1::2], parts[2::2])]
+
+
+def translate(sql: str, today: Optional[datetime.date] = None) -> str:
+    # ``today`` pins CURRENT_DATE, so reports over old or synthetic data are not empty
+    for pattern, replacement in TRANSLATIONS:
+        sql = pattern.sub(replacement, sql)
+    return CURRENT_DATE.sub(f"DATE '{today.isoformat()}'" if today else 'CURRENT_DATE', sql)
+
+
+def expand(inputs: Sequence[str]) -> Dict[str, List[str]]:
+    # Files, globs (** included) or directories, grouped by extension
+    files: Dict[str, List[str]] = {}
+    for pattern in inputs:
+        for match in sorted(glob.glob(pattern, recursive=True)):
+            paths = sorted(glob.glob(os.path.join(match, '**', '*.*'), recursive=True)) if os.path.isdir(match) else [match]
+            for path in paths:
+                extension = os.path.splitext(path)[1]
+                if extension in EXTENSIONS:
+                    files.setdefault(extension, []).append(path)
+    return files
+
+
+def _relation(con, extension: str, paths: List[str]) -> str:
+    files = '[' + ', '.join("'" + path.replace("'", "''") + "'" for path in paths) + ']'
+    if extension in ('.json', '.ndjson'):
+        # Typed up front, so ISO dates stay strings as in BigQuery and absent columns are NULL
+        columns = '{' + ', '.join(f"'{column}': 'VARCHAR'" for column in COLUMNS) + '}'
+        form = 'newline_delimited' if extension == '.ndjson' else 'auto'
+        return f"read_json({files}, columns = {columns}, format = '{form}')"
+    if extension == '.csv':
+        relation = f"read_csv({files}, all_varchar = true, union_by_name = true)"
+    else:
+        relation = f"read_parquet({files}, union_by_name = true)"
+    present = {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+    columns = ', '.join(f"CAST({column} AS VARCHAR) AS {column}" if column in present
+                        else f"CAST(NULL AS VARCHAR) AS {column}" for column in COLUMNS)
+    return f"(SELECT {columns} FROM {relation})"
+
+
+def register(con, inputs: Sequence[str], materialize: bool = False) -> int:
+    """Create the standardized_jobs view (or table) over ``inputs``; return its row count."""
+    files = expand(inputs)
+    if not files:
+        raise FileNotFoundError(f"No {', '.join(EXTENSIONS)} files in {', '.join(inputs)}")
+    columns = ', '.join(f"COALESCE(source, {SOURCE_FROM_URL}) AS source" if column == 'source' else column
+                        for column in COLUMNS)
+    selects = ' UNION ALL '.join(f"SELECT {columns} FROM {_relation(con, extension, paths)}"
+                                 for extension, paths in files.items())
+    con.execute(f"CREATE OR REPLACE {'TABLE' if materialize else 'VIEW'} {VIEW} AS {selects}")
+    for macro in MACROS:
+        con.execute(macro)
+    return con.execute(f"SELECT COUNT(*) FROM {VIEW}").fetchone()[0]
+
+
+def run_reports(inputs: Sequence[str], today: Optional[datetime.date] = None, repeat: int = 1,
+                materialize: bool = False, threads: Optional[int] = None,
+                queries_path: str = QUERIES_PATH) -> Dict[str, Any]:
+    """Run every report ``repeat`` times; return row counts, timings and the results of the last run."""
+    con = duckdb.connect()
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    started = time.perf_counter()
+    rows = register(con, inputs, materialize)
+    summary = {'rows': rows, 'register_seconds': round(time.perf_counter() - started, 4), 'reports': []}
+
+    for title, sql in load_queries(queries_path):
+        sql = translate(sql, today)
+        seconds = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor = con.execute(sql)
+            result = cursor.fetchall()
+            seconds.append(time.perf_counter() - started)
+        seconds.sort()
+        summary['reports'].append({
+            'title': title,
+            'rows': len(result),
+            'seconds': round(seconds[0], 4),
+            'median_seconds': round(seconds[len(seconds) // 2], 4),
+            'columns': [column[0] for column in cursor.description],
+            'result': result,
+        })
+    con.close()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run sql/job_market_queries.sql on DuckDB against local outputs')
+    parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUTS,
+                        help='standardized .json, .ndjson, .csv or .parquet files, globs or directories')
+    parser.add_argument('--date', type=datetime.date.fromisoformat, help='treat this date as CURRENT_DATE()')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per report; the fastest is reported')
+    parser.add_argument('--materialize', action='store_true', help='load the files into a table first')
+    parser.add_argument('--threads', type=int)
+    parser.add_argument('--show', type=int, default=5, help='result rows printed per report')
+    parser.add_argument('--output', help='write the timings as JSON to this file')
+    args = parser.parse_args()
+
+    summary = run_reports(args.inputs, args.date, args.repeat, args.materialize, args.threads)
+    print(f"{summary['rows']} rows registered in {summary['register_seconds']}s")
+    for report in summary['reports']:
+        print(f"\n{report['title']}: {report['rows']} rows in {report['seconds'] * 1000:.1f} ms")
+        if args.show:
+            print('  ' + ' | '.join(report['columns']))
+            for row in report['result'][:args.show]:
+                print('  ' + ' | '.join(str(value) for value in row))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({**summary, 'reports': [{key: value for key, value in report.items() if key != 'result'}
+                                              for report in summary['reports']]}, f, indent=2)
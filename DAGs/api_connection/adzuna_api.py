@@ -1,51 +1,107 @@
 import os
 import json
 import time
+import threading
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 import requests
 
 class AdzunaConnector:
     BASE_URL = "https://api.adzuna.com/v1/api/jobs"
     
-    def __init__(self, app_id: str, app_key: str, country: str = "us",max_retries: int = 3, retry_delay: int = 5):
+    def __init__(self, app_id: str, app_key: str, country: str = "us",max_retries: int = 3, retry_delay: int = 5, metrics=None,
+                 page_concurrency: int = 4, timeout: float = 30, breaker=None, deadline=None, rate_limiter=None):
         self.app_id = app_id
         self.app_key = app_key
         self.country = country.lower()
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.metrics = metrics
+        self.page_concurrency = page_concurrency
+        self.timeout = timeout
+        self.breaker = breaker
+        self.deadline = deadline
+        self.rate_limiter = rate_limiter
+        self.stopped: Optional[str] = None
+        # Response bytes of every request, prefetched pages included; annotate() is
+        # per thread, so the caller's span is credited from the caller's thread
+        self.bytes_in = 0
+        self._bytes_lock = threading.Lock()
         
     def extract_jobs(self, 
                      keywords: Optional[List[str]] = None, 
                      results_per_page: int = 50,
                      max_pages: int = 10) -> List[Dict[str, Any]]:
         all_jobs = []
+        bytes_before = self.bytes_in
 
         for keyword in keywords:
-            print(f"Extracting Adzuna jobs for keyword: {keyword}")
-            page = 1
-            
-            while page <= max_pages:
-                try:
-                    jobs = self._fetch_jobs_page(keyword, page, results_per_page)
-                    
-                    if not jobs or not jobs.get('results'):
-                        print(f"No more results for keyword '{keyword}' after page {page-1}")
-                        break
-                    
-                    all_jobs.extend(jobs.get('results', []))
-                    print(f"Extracted {len(jobs.get('results', []))} jobs from page {page} for keyword '{keyword}'")
-                    
-                    if page >= jobs.get('count', 0) // results_per_page:
-                        break
-                        
-                    page += 1
-                except Exception as e:
-                    print(f"Error extracting jobs for keyword '{keyword}', page {page}: {str(e)}")
-                    break
+            if self._should_stop():
+                break
+            all_jobs.extend(self.extract_keyword(keyword, results_per_page, max_pages))
         
+        if self.metrics is not None:
+            self.metrics.annotate(bytes_in=self.bytes_in - bytes_before)
+        if self.stopped:
+            print(f"Stopped early ({self.stopped}), returning partial results")
         print(f"Total jobs extracted from Adzuna: {len(all_jobs)}")
         return all_jobs
     
+    def extract_keyword(self, keyword: str, results_per_page: int = 50, max_pages: int = 10) -> List[Dict[str, Any]]:
+        # One (country, keyword) shard; safe to run for several keywords at once
+        jobs_for_keyword = []
+        if self._should_stop():
+            return jobs_for_keyword
+        print(f"Extracting Adzuna jobs for keyword: {keyword} ({self.country})")
+
+        # The first page reports the total count, so the rest can be requested at once
+        fetch = lambda page: self._fetch_jobs_page(keyword, page, results_per_page)
+        try:
+            first = fetch(1)
+            last_page = min(max_pages, max(first.get('count', 0) // results_per_page, 1)) if first else 1
+        except Exception as e:
+            first, last_page = e, 1
+
+        rest = self._fetch_pages(fetch, list(range(2, last_page + 1)))
+        try:
+            for page, jobs in chain([(1, first)], zip(range(2, last_page + 1), rest)):
+                if isinstance(jobs, Exception):
+                    print(f"Error extracting jobs for keyword '{keyword}', page {page}: {str(jobs)}")
+                    break
+
+                if not jobs or not jobs.get('results'):
+                    print(f"No more results for keyword '{keyword}' after page {page-1}")
+                    break
+
+                jobs_for_keyword.extend(jobs.get('results', []))
+                if self.metrics is not None:
+                    self.metrics.inc("pages_fetched_total", source="adzuna")
+                print(f"Extracted {len(jobs.get('results', []))} jobs from page {page} for keyword '{keyword}'")
+        finally:
+            rest.close()
+        return jobs_for_keyword
+
+    def _fetch_pages(self, fetch, pages: List[int]):
+        # Yields each page's response (or the exception it raised) in page order,
+        # with up to page_concurrency requests in flight
+        def attempt(page):
+            try:
+                return fetch(page)
+            except Exception as e:
+                return e
+
+        workers = min(self.page_concurrency, len(pages))
+        if workers <= 1:
+            yield from map(attempt, pages)
+            return
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            yield from executor.map(attempt, pages)
+        finally:
+            # The caller stops at a failed or empty page; skip the ones not started yet
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def _fetch_jobs_page(self, keyword: str, page: int, results_per_page: int) -> Dict[str, Any]:
         
         url = f"{self.BASE_URL}/{self.country}/search/{page}"
@@ -59,17 +115,62 @@ class AdzunaConnector:
         }
         
         for attempt in range(self.max_retries):
+            if self._should_stop():
+                raise Exception(f"Crawl stopped: {self.stopped}")
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
+            started = time.perf_counter()
             try:
-                response = requests.get(url, params=params)
+                response = requests.get(url, params=params, timeout=self._request_timeout())
+                self._record_request(started, response.status_code, len(response.content))
                 response.raise_for_status()
+                self._record_outcome(True)
                 return response.json()
             except requests.RequestException as e:
+                if getattr(e, 'response', None) is None:
+                    self._record_request(started, "error")
+                self._record_outcome(False)
                 print(f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}")
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
+                    time.sleep(self._retry_wait())
                 else:
                     raise
 
+    def _record_request(self, started: float, status, size: int = 0):
+        if self.metrics is None:
+            return
+        self.metrics.observe("http_request_duration_seconds", time.perf_counter() - started,
+                             source="adzuna", status=status)
+        with self._bytes_lock:
+            self.bytes_in += size
+
+    def _should_stop(self) -> bool:
+        # breaker and deadline are the CircuitBreaker and Deadline from ingest's
+        # resilience.py; once either says stop, the crawl keeps what it has
+        if self.stopped is None:
+            if self.breaker is not None and not self.breaker.allow():
+                self.stopped = "circuit_open"
+            elif self.deadline is not None and self.deadline.expired():
+                self.stopped = "deadline"
+        return self.stopped is not None
+
+    def _request_timeout(self) -> float:
+        if self.deadline is None:
+            return self.timeout
+        return max(min(self.timeout, self.deadline.remaining()), 0.001)
+
+    def _retry_wait(self) -> float:
+        if self.deadline is None:
+            return self.retry_delay
+        return min(self.retry_delay, self.deadline.remaining())
+
+    def _record_outcome(self, ok: bool):
+        if self.breaker is not None:
+            if ok:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
 if __name__ == "__main__":
     app_id = os.environ.get("ADZUNA_APP_ID")
     app_key = os.environ.get("ADZUNA_APP_KEY")
@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning.text_extraction import extract_batch
+from data_cleaning.job_posting import JobPosting, dumps_many
+
+class HackerNewsConnector:
+
+    SEARCH_URL = "https://hn.algolia.com/api/v1/search_by_date"
+    ITEM_URL = "https://hacker-news.firebaseio.com/v0/item"
+
+    def __init__(self,
+                 max_workers: int = 16,
+                 max_retries: int = 3,
+                 retry_delay: int = 1,
+                 timeout: int = 10,
+                 cache_path: Optional[str] = None,
+                 metrics=None):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.metrics = metrics
+        # One pooled session shared by the workers, so item requests reuse keep-alive connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._cache_lock = threading.Lock()
+        self.cache = self._load_cache()
+
+    def find_hiring_thread(self) -> str:
+        params = {
+            "query": "Ask HN: Who is hiring?",
+            "tags": "story",
+            "numericFilters": "points>20"  # Hiring threads usually have high point counts
+        }
+        results = self._get_json(self.SEARCH_URL, params=params).get('hits', [])
+        for result in results:
+            title = result.get('title', '').lower()
+            if "hiring" in title and "ask hn" in title:
+                return result.get('objectID')
+        raise Exception("Could not find a recent 'Who's hiring' thread")
+
+    def extract_jobs(self, thread_id: Optional[str] = None, new_only: bool = False) -> List[Dict[str, Any]]:
+        thread_id = str(thread_id or self.find_hiring_thread())
+        thread = self._get_json(f"{self.ITEM_URL}/{thread_id}.json") or {}
+        kid_ids = [str(kid) for kid in thread.get('kids', [])]
+
+        # Items already fetched by an earlier run are served from the cache
+        seen = self.cache.setdefault(thread_id, {})
+        new_ids = [kid for kid in kid_ids if kid not in seen]
+        print(f"Thread {thread_id}: {len(kid_ids)} comments, {len(new_ids)} not seen before")
+
+        if new_ids:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for kid, item in zip(new_ids, executor.map(self._fetch_item, new_ids)):
+                    if item is not None:
+                        seen[kid] = item
+            self._save_cache()
+
+        if self.metrics is not None:
+            self.metrics.inc("pages_fetched_total", value=len(new_ids), source="hackernews")
+
+        comments = []
+        for kid in (new_ids if new_only else kid_ids):
+            item = seen.get(kid)
+            # Only keep non-deleted, non-dead comments
+            if item and item.get('text') and not item.get('deleted', False) and not item.get('dead', False):
+                comments.append(item)
+
+        print(f"Total comments extracted from Hacker News: {len(comments)}")
+        return comments
+
+    @staticmethod
+    def parse_jobs(comments: List[Dict[str, Any]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        comments = [comment for comment in comments if comment and 'text' in comment]
+        jobs = []
+        for comment, fields in zip(comments, extract_batch([c.get('text') for c in comments], workers=workers)):
+            job = {
+                'job_id': f"hn-{comment.get('id')}",
+                'posted_date': datetime.fromtimestamp(comment.get('time', 0)).strftime('%Y-%m-%d'),
+                'author': comment.get('by', ''),
+                'description': comment.get('text', ''),
+                'source_api': 'hackernews',
+                'source_url': f"https://news.ycombinator.com/item?id={comment.get('id')}"
+            }
+            job.update({field: value for field, value in fields.items() if value is not None})
+
+            # Only keep posts we extracted useful information from
+            if 'company' in job or 'title' in job:
+                jobs.append(job)
+        return jobs
+
+    @staticmethod
+    def to_postings(jobs: List[Dict[str, Any]]) -> List[JobPosting]:
+        return [JobPosting.from_hackernews(job) for job in jobs]
+
+    def _fetch_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._get_json(f"{self.ITEM_URL}/{item_id}.json")
+        except Exception as e:
+            # Left out of the cache so the next run retries it
+            print(f"Error fetching item {item_id}: {str(e)}")
+            return None
+
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        for attempt in range(self.max_retries):
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                self._record_request(started, response.status_code)
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException as e:
+                if getattr(e, 'response', None) is None:
+                    self._record_request(started, "error")
+                print(f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}")
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay)
+                else:
+                    raise
+
+    def _record_request(self, started: float, status):
+        if self.metrics is None:
+            return
+        self.metrics.observe("http_request_duration_seconds", time.perf_counter() - started,
+                             source="hackernews", status=status)
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable Hacker News cache {self.cache_path}: {str(e)}")
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self._cache_lock:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps(self.cache))
+            os.replace(tmp_path, self.cache_path)
+
+if __name__ == "__main__":
+    connector = HackerNewsConnector(cache_path="data/hackernews_cache.json")
+    jobs = connector.parse_jobs(connector.extract_jobs())
+    # Written in the standardized schema, like the transform service's output
+    with open("data/hackernews_jobs.json", "w") as f:
+        f.write(dumps_many(connector.to_postings(jobs)))
@@ -7,10 +7,16 @@ from typing import Dict, List, Optional, Any
 class JoobleConnector:
     HOST = "jooble.org"
     
-    def __init__(self, api_key: str, max_retries: int = 3, retry_delay: int = 5):
+    def __init__(self, api_key: str, max_retries: int = 3, retry_delay: int = 5, metrics=None,
+                 timeout: float = 30, breaker=None, deadline=None):
         self.api_key = api_key
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.metrics = metrics
+        self.timeout = timeout
+        self.breaker = breaker
+        self.deadline = deadline
+        self.stopped: Optional[str] = None
     
     def extract_jobs(self, 
                      keywords: Optional[List[str]] = None, 
@@ -20,11 +26,17 @@ class JoobleConnector:
         all_jobs = []
         
         for keyword in keywords:
+            if self._should_stop():
+                break
             for location in locations:
+                if self._should_stop():
+                    break
                 try:
                     print(f"Extracting Jooble jobs for keyword '{keyword}' in '{location}'")
                     jobs = self._fetch_jobs(keyword, location, limit)
                     
+                    if self.metrics is not None:
+                        self.metrics.inc("pages_fetched_total", source="jooble")
                     if jobs:
                         all_jobs.extend(jobs)
                         print(f"Extracted {len(jobs)} jobs for keyword '{keyword}' in '{location}'")
@@ -35,6 +47,8 @@ class JoobleConnector:
                 except Exception as e:
                     print(f"Error extracting jobs for keyword '{keyword}' in '{location}': {str(e)}")
         
+        if self.stopped:
+            print(f"Stopped early ({self.stopped}), returning partial results")
         print(f"Total jobs extracted from Jooble: {len(all_jobs)}")
         return all_jobs
     
@@ -50,31 +64,63 @@ class JoobleConnector:
         headers = {"Content-type": "application/json"}
         
         for attempt in range(self.max_retries):
+            if self._should_stop():
+                raise Exception(f"Crawl stopped: {self.stopped}")
+            started = time.perf_counter()
             try:
-                connection = http.client.HTTPConnection(self.HOST)
+                connection = http.client.HTTPConnection(self.HOST, timeout=self._request_timeout())
                 connection.request('POST', f'/api/{self.api_key}', body, headers)
                 response = connection.getresponse()
-                
-                if response.status == 200:
-                    response_data = response.read().decode('utf-8')
-                    data = json.loads(response_data)
-                    jobs = data.get("jobs", [])
-                    connection.close()
-                    return jobs
-                else:
-                    print(f"Request failed with status {response.status}: {response.reason}")
-                    connection.close()
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-                    else:
-                        raise Exception(f"Failed after {self.max_retries} attempts: {response.status} {response.reason}")
+                raw = response.read()
+                self._record_request(started, response.status, len(raw))
+                connection.close()
+                if response.status != 200:
+                    raise Exception(f"Request failed with status {response.status}: {response.reason}")
+                jobs = json.loads(raw.decode('utf-8')).get("jobs", [])
+                self._record_outcome(True)
+                return jobs
             except Exception as e:
+                self._record_outcome(False)
                 print(f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}")
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
+                    time.sleep(self._retry_wait())
                 else:
                     raise
 
+    def _record_request(self, started: float, status, size: int = 0):
+        if self.metrics is None:
+            return
+        self.metrics.observe("http_request_duration_seconds", time.perf_counter() - started,
+                             source="jooble", status=status)
+        self.metrics.annotate(bytes_in=size)
+
+    def _should_stop(self) -> bool:
+        # breaker and deadline are the CircuitBreaker and Deadline from ingest's
+        # resilience.py; once either says stop, the crawl keeps what it has
+        if self.stopped is None:
+            if self.breaker is not None and not self.breaker.allow():
+                self.stopped = "circuit_open"
+            elif self.deadline is not None and self.deadline.expired():
+                self.stopped = "deadline"
+        return self.stopped is not None
+
+    def _request_timeout(self) -> float:
+        if self.deadline is None:
+            return self.timeout
+        return max(min(self.timeout, self.deadline.remaining()), 0.001)
+
+    def _retry_wait(self) -> float:
+        if self.deadline is None:
+            return self.retry_delay
+        return min(self.retry_delay, self.deadline.remaining())
+
+    def _record_outcome(self, ok: bool):
+        if self.breaker is not None:
+            if ok:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
 if __name__ == "__main__":
     api_key = os.environ.get("JOOBLE_API_KEY")
     
@@ -0,0 +1,102 @@
+"""
+Offline analytics benchmark
+---------------------------
+Times the five reports of sql/job_market_queries.sql on DuckDB (analytics.py)
+over synthesized standardized postings: the committed samples scaled up with
+benchmarks/corpus.py and standardized by transform_data's STANDARDIZERS, then
+written as Parquet and as NDJSON. Each format is queried through the view over
+the files and once more loaded into a table first. CURRENT_DATE is pinned to
+the latest posted date, so the "this month" and "this week" reports have rows.
+
+    python benchmarks/bench_analytics.py --postings 1000000 --repeat 3
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import pipeline
+from benchmarks.corpus import synthesize
+
+CHUNK = 50000
+
+
+def write_postings(total, output_dir):
+    # Standardized a chunk at a time: a raw DataFrame costs several KB per posting
+    parquet_path = os.path.join(output_dir, 'jobs_data_standardized.parquet')
+    ndjson_path = os.path.join(output_dir, 'jobs_data_standardized.ndjson')
+    writer, latest, rows = None, '', 0
+    with open(ndjson_path, 'w') as ndjson:
+        for source, records in synthesize(total).items():
+            for start in range(0, len(records), CHUNK):
+                df = pipeline.STANDARDIZERS[source](pd.DataFrame(records[start:start + CHUNK]))
+                df = df.reindex(columns=list(analytics.COLUMNS)).astype(object).where(df.notna(), None)
+                df['source'] = source
+                table = pa.Table.from_pandas(df, preserve_index=False).cast(
+                    pa.schema([(column, pa.string()) for column in analytics.COLUMNS]))
+                if writer is None:
+                    writer = pq.ParquetWriter(parquet_path, table.schema, compression='snappy')
+                writer.write_table(table)
+                df.to_json(ndjson, orient='records', lines=True)
+                latest = max(latest, df['posted_date'].dropna().str[:10].max() or '')
+                rows += len(df)
+    writer.close()
+    return {'parquet': parquet_path, 'ndjson': ndjson_path}, datetime.date.fromisoformat(latest), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the job market reports on DuckDB')
+    parser.add_argument('--postings', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per report; the fastest is reported')
+    parser.add_argument('--formats', nargs='+', default=['parquet', 'ndjson'], choices=['parquet', 'ndjson'])
+    parser.add_argument('--threads', type=int)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix='job_analytics_')
+    try:
+        started = time.perf_counter()
+        paths, today, rows = write_postings(args.postings, output_dir)
+        print(f"{rows} postings written in {time.perf_counter() - started:.1f}s "
+              f"({', '.join(f'{name} {os.path.getsize(path) / 1e6:.0f} MB' for name, path in paths.items())}), "
+              f"CURRENT_DATE pinned to {today}")
+
+        results = {'postings': rows, 'today': today.isoformat(), 'runs': []}
+        for name in args.formats:
+            for materialize in (False, True):
+                summary = analytics.run_reports([paths[name]], today, args.repeat, materialize, args.threads)
+                label = f"{name}/{'table' if materialize else 'view'}"
+                results['runs'].append({
+                    'input': label,
+                    'register_seconds': summary['register_seconds'],
+                    'reports': [{key: report[key] for key in ('title', 'rows', 'seconds', 'median_seconds')}
+                                for report in summary['reports']],
+                })
+
+        titles = [report['title'].split('.')[0] for report in results['runs'][0]['reports']]
+        print(f"\n{'input':<16}{'register s':>11}" + ''.join(f"{'report ' + t + ' ms':>15}" for t in titles))
+        for run in results['runs']:
+            print(f"{run['input']:<16}{run['register_seconds']:>11}"
+                  + ''.join(f"{report['seconds'] * 1000:>15.1f}" for report in run['reports']))
+        print('rows per report: ' + ', '.join(str(report['rows']) for report in results['runs'][0]['reports']))
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Cold-start benchmark for the Cloud Run services
+-----------------------------------------------
+For each service this starts fresh interpreters and measures:
+
+* the import profile of ``main`` (``python -X importtime``), heaviest modules first
+* time to import ``main`` and to the first successful ``/`` and ``/pubsub`` response
+* the same with gunicorn's preload/warm-up hooks run first, i.e. what a request
+  sees once the instance reports ready
+
+The services run on the local backends, so no GCP project is needed.
+
+    python benchmarks/bench_cold_start.py --runs 5 --top 15
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+DAGS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    'ingest': os.path.join(DAGS_DIR, 'google_cloud', 'ingest'),
+    'transform': os.path.join(DAGS_DIR, 'google_cloud', 'transform'),
+}
+
+# Runs in a fresh interpreter inside the service directory and prints its timings as JSON
+DRIVER = r'''
+import os, sys, json, time, base64
+started = time.perf_counter()
+timings = {}
+service, preload = sys.argv[1], sys.argv[2] == '1'
+import main
+timings['import_s'] = time.perf_counter() - started
+if preload:
+    main.preload()
+    main.warm_up()
+    timings['ready_s'] = time.perf_counter() - started
+    started = time.perf_counter()
+client = main.app.test_client()
+response = client.get('/')
+assert response.status_code == 200, response.status_code
+timings['first_health_s'] = time.perf_counter() - started
+if service == 'transform':
+    message = {'api_source': 'muse', 'filename': 'muse_jobs.json', 'bucket': main.BUCKET_NAME}
+else:
+    message = {'trigger': 'cold-start'}
+envelope = {'message': {'data': base64.b64encode(json.dumps(message).encode()).decode(), 'messageId': '1'}}
+response = client.post('/pubsub', json=envelope)
+assert response.status_code < 300, response.status_code
+timings['first_pubsub_s'] = time.perf_counter() - started
+print(json.dumps(timings))
+'''
+
+
+def service_env(workdir):
+    env = dict(os.environ)
+    env.update({
+        'STORAGE_BACKEND': 'local',
+        'QUEUE_BACKEND': 'local',
+        'WAREHOUSE_BACKEND': 'sqlite',
+        'LOCAL_BACKEND_DIR': workdir,
+        'PROJECT_ID': 'local',
+    })
+    # No credentials, so the ingest /pubsub handler skips every API
+    for key in ('ADZUNA_APP_ID', 'ADZUNA_APP_KEY', 'JOOBLE_API_KEY', 'MUSE_API_KEY'):
+        env.pop(key, None)
+    return env
+
+
+def seed_storage(workdir):
+    # The transform /pubsub message points at the committed Muse sample
+    bucket_dir = os.path.join(workdir, 'storage', 'job-data-local')
+    os.makedirs(bucket_dir, exist_ok=True)
+    shutil.copy(os.path.join(DAGS_DIR, 'data', 'muse_jobs.json'), os.path.join(bucket_dir, 'muse_jobs.json'))
+
+
+def import_profile(service_dir, env, top):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=service_dir, env=env, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        # Nested imports are indented; keep top-level ones so nothing is counted twice
+        name = name[1:]
+        if not name.startswith(' '):
+            modules.append((name.strip(), int(cumulative_us)))
+    total = sum(us for _, us in modules)
+    return total, sorted(modules, key=lambda m: m[1], reverse=True)[:top], result.returncode, result.stderr
+
+
+def run_driver(service, service_dir, env, preload):
+    result = subprocess.run([sys.executable, '-c', DRIVER, service, '1' if preload else '0'],
+                            cwd=service_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{service} driver failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure Cloud Run service cold starts locally')
+    parser.add_argument('--services', nargs='+', choices=sorted(SERVICES), default=sorted(SERVICES))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='heaviest imports to list')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    report = {}
+    for service in args.services:
+        service_dir = SERVICES[service]
+        workdir = tempfile.mkdtemp(prefix=f'cold_start_{service}_')
+        try:
+            env = service_env(workdir)
+            seed_storage(workdir)
+            total_us, heaviest, returncode, stderr = import_profile(service_dir, env, args.top)
+            if returncode != 0:
+                print(f"{service}: import failed\n{stderr[-2000:]}")
+                continue
+            print(f"\n{service}: import main {total_us / 1000:.1f} ms (top-level imports)")
+            for name, us in heaviest:
+                print(f"  {us / 1000:>9.1f} ms  {name}")
+
+            modes = {}
+            for mode, preload in (('lazy', False), ('preload', True)):
+                runs = [run_driver(service, service_dir, env, preload) for _ in range(args.runs)]
+                modes[mode] = {key: round(statistics.median(r[key] for r in runs), 4) for key in runs[0]}
+                print(f"  {mode:<8} " + "  ".join(f"{key} {value * 1000:.1f} ms" for key, value in modes[mode].items()))
+            report[service] = {'import_total_ms': round(total_us / 1000, 1),
+                               'heaviest_imports_ms': {name: round(us / 1000, 1) for name, us in heaviest},
+                               'median': modes}
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Connector load benchmark
+------------------------
+Runs AdzunaConnector, MuseConnector and JoobleConnector against the local
+replay server and reports pages/sec and request latency percentiles for each
+connector configuration in CONFIGS.
+
+    python benchmarks/bench_connectors.py --latency lognormal:120:0.6 --error-rate 0.03 --rate-limit-rate 0.02
+"""
+import os
+import sys
+import json
+import time
+import contextlib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+from api_connection.adzuna_api import AdzunaConnector
+from api_connection.jooble_api import JoobleConnector
+from api_connection.muse_api import MuseConnector
+from benchmarks.replay_server import ReplayServer, build_parser, config_from_args, load_recordings
+
+ADZUNA_KEYWORDS = ["software", "data", "devops", "engineer", "IT", "developer", "designer", "manager"]
+MUSE_CATEGORIES = ["ux", "design", "management"]
+
+# Each entry is (connector class, source label, constructor kwargs, extract_jobs kwargs)
+CONFIGS = {
+    'adzuna/no-backoff': (AdzunaConnector, 'adzuna', {'max_retries': 3, 'retry_delay': 0},
+                          {'keywords': ADZUNA_KEYWORDS, 'results_per_page': 50, 'max_pages': 10}),
+    'adzuna/backoff-1s': (AdzunaConnector, 'adzuna', {'max_retries': 3, 'retry_delay': 1},
+                          {'keywords': ADZUNA_KEYWORDS, 'results_per_page': 50, 'max_pages': 10}),
+    'muse/no-backoff': (MuseConnector, 'muse', {'max_retries': 3, 'retry_delay': 0},
+                        {'categories': MUSE_CATEGORIES, 'page_count': 20, 'job_count_per_page': 20}),
+    'muse/backoff-1s': (MuseConnector, 'muse', {'max_retries': 3, 'retry_delay': 1},
+                        {'categories': MUSE_CATEGORIES, 'page_count': 20, 'job_count_per_page': 20}),
+    'adzuna/sequential': (AdzunaConnector, 'adzuna', {'max_retries': 3, 'retry_delay': 0, 'page_concurrency': 1},
+                          {'keywords': ADZUNA_KEYWORDS, 'results_per_page': 50, 'max_pages': 10}),
+    'adzuna/prefetch-8': (AdzunaConnector, 'adzuna', {'max_retries': 3, 'retry_delay': 0, 'page_concurrency': 8},
+                          {'keywords': ADZUNA_KEYWORDS, 'results_per_page': 50, 'max_pages': 10}),
+    'muse/sequential': (MuseConnector, 'muse', {'max_retries': 3, 'retry_delay': 0, 'page_concurrency': 1},
+                        {'categories': MUSE_CATEGORIES, 'page_count': 20, 'job_count_per_page': 20}),
+    'muse/prefetch-8': (MuseConnector, 'muse', {'max_retries': 3, 'retry_delay': 0, 'page_concurrency': 8},
+                        {'categories': MUSE_CATEGORIES, 'page_count': 20, 'job_count_per_page': 20}),
+    'jooble/no-backoff': (JoobleConnector, 'jooble', {'max_retries': 3, 'retry_delay': 0},
+                          {'keywords': ["engineer", "designer"], 'locations': ["remote"], 'limit': 100}),
+}
+
+
+def _ms(value):
+    return round(value * 1000, 1) if value is not None else None
+
+
+def run_config(server, name, connector_cls, source, init_kwargs, extract_kwargs):
+    metrics = MetricsRegistry()
+    credentials = ('bench-id', 'bench-key') if connector_cls is AdzunaConnector else ('bench-key',)
+    connector = server.configure(connector_cls(*credentials, metrics=metrics, **init_kwargs))
+    started = time.perf_counter()
+    with metrics.span("extract", source=source):
+        jobs = connector.extract_jobs(**extract_kwargs)
+    wall = time.perf_counter() - started
+    pages = metrics.counter_value("pages_fetched_total", source=source)
+    latency = metrics.latency("http_request_duration_seconds", source=source)
+    failed = latency['count'] - metrics.latency("http_request_duration_seconds", source=source, status=200)['count']
+    return {
+        'config': name,
+        'records': len(jobs),
+        'pages': int(pages),
+        'requests': latency['count'],
+        'failed_requests': failed,
+        'wall_seconds': round(wall, 3),
+        'pages_per_sec': round(pages / wall, 2) if wall else None,
+        'p50_ms': _ms(latency['p50']),
+        'p95_ms': _ms(latency['p95']),
+        'p99_ms': _ms(latency['p99']),
+        'max_ms': _ms(latency['max']),
+    }
+
+
+def main():
+    parser = build_parser()
+    parser.description = 'Benchmark job API connectors against the replay server'
+    parser.set_defaults(port=0)
+    parser.add_argument('--configs', nargs='+', choices=sorted(CONFIGS), help='subset of configurations to run')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    server = ReplayServer(config_from_args(args), host=args.host, port=args.port,
+                          recordings=load_recordings(args.recordings)).start()
+    results = []
+    try:
+        for name in args.configs or list(CONFIGS):
+            connector_cls, source, init_kwargs, extract_kwargs = CONFIGS[name]
+            # Keep the connectors' progress output out of the report
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                results.append(run_config(server, name, connector_cls, source, init_kwargs, extract_kwargs))
+    finally:
+        server.stop()
+
+    header = f"{'config':<22}{'pages':>7}{'req':>6}{'fail':>6}{'wall s':>9}{'pages/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(f"Replay latency {args.latency}, 5xx rate {args.error_rate}, 429 rate {args.rate_limit_rate}")
+    print(header)
+    for r in results:
+        print(f"{r['config']:<22}{r['pages']:>7}{r['requests']:>6}{r['failed_requests']:>6}{r['wall_seconds']:>9}"
+              f"{str(r['pages_per_sec']):>9}{str(r['p50_ms']):>9}{str(r['p95_ms']):>9}{str(r['p99_ms']):>9}")
+    print(f"Server status counts: {server.status_counts}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps({'server': vars(args), 'results': results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Local end-to-end harness
+------------------------
+Runs the Cloud Run flow (ingest /fetch -> storage -> queue -> transform /pubsub
+-> warehouse) on one machine. Connectors hit the replay server, GCS is a local
+directory, Pub/Sub is an in-process queue and BigQuery is SQLite, so the run
+needs no GCP project and reports end-to-end latency and throughput per message.
+
+    python benchmarks/bench_e2e.py --latency lognormal:50:0.4
+"""
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import tempfile
+import threading
+import importlib.util
+
+DAGS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INGEST_DIR = os.path.join(DAGS_DIR, 'google_cloud', 'ingest')
+TRANSFORM_DIR = os.path.join(DAGS_DIR, 'google_cloud', 'transform')
+sys.path.append(DAGS_DIR)
+
+from benchmarks.replay_server import ReplayServer, build_parser, config_from_args, load_recordings
+
+
+def load_service(name, service_dir):
+    if service_dir not in sys.path:
+        sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(service_dir, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def configure_environment(workdir):
+    # Must run before the services are imported: both read their settings at import time
+    os.environ.update({
+        'STORAGE_BACKEND': 'local',
+        'QUEUE_BACKEND': 'local',
+        'WAREHOUSE_BACKEND': 'sqlite',
+        'LOCAL_BACKEND_DIR': workdir,
+        'PROJECT_ID': 'local',
+        'ADZUNA_APP_ID': 'replay',
+        'ADZUNA_APP_KEY': 'replay',
+        'JOOBLE_API_KEY': 'replay',
+        'MUSE_API_KEY': 'replay',
+        # The replay server has no rate limit to respect
+        'ADZUNA_COUNTRY_RPS': '0',
+    })
+
+
+def main():
+    parser = build_parser()
+    parser.description = 'Run ingest -> queue -> transform -> warehouse locally'
+    parser.set_defaults(port=0)
+    parser.add_argument('--keep', action='store_true', help='keep the local storage/warehouse directory')
+    parser.add_argument('--output', help='write the run report as JSON to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='job_e2e_')
+    configure_environment(workdir)
+    server = ReplayServer(config_from_args(args), host=args.host, port=args.port,
+                          recordings=load_recordings(args.recordings)).start()
+
+    ingest = load_service('ingest_main', INGEST_DIR)
+    transform = load_service('transform_main', TRANSFORM_DIR)
+    import backends
+    # The ingest service imports its connectors lazily; patch the modules it will import
+    import adzuna_api, muse_api, jooble_api
+
+    for connector_cls in (adzuna_api.AdzunaConnector, muse_api.MuseConnector, jooble_api.JoobleConnector):
+        server.configure(connector_cls)
+
+    transform_client = transform.app.test_client()
+    deliveries = []
+    deliveries_lock = threading.Lock()
+
+    def push_to_transform(message):
+        payload = json.loads(base64.b64decode(message['data']))
+        response = transform_client.post('/pubsub', json={'message': message, 'subscription': 'local'})
+        finished = time.time()
+        with deliveries_lock:
+            deliveries.append({
+                'api_source': payload.get('api_source'),
+                'records': payload.get('record_count'),
+                'status': response.status_code,
+                'latency_seconds': round(finished - message['published_at'], 4),
+            })
+        if response.status_code >= 500:
+            raise Exception(f"transform returned {response.status_code}")
+
+    queue = backends.get_queue()
+    queue.subscribe(ingest.JOBS_TOPIC, push_to_transform)
+
+    started = time.time()
+    try:
+        response = ingest.app.test_client().post('/fetch')
+        queue.join()
+    finally:
+        server.stop()
+    wall = time.time() - started
+
+    warehouse = backends.get_warehouse()
+    loaded = warehouse.query('SELECT source, COUNT(*) FROM standardized_jobs GROUP BY source')
+    report = {
+        'wall_seconds': round(wall, 3),
+        'fetch_status': response.status_code,
+        'fetch_details': response.get_json().get('details'),
+        'messages': deliveries,
+        'rows_loaded': dict(loaded),
+        'rows_per_sec': round(sum(count for _, count in loaded) / wall, 1) if wall else None,
+        'ingest_stages': ingest.METRICS.summary()['stages'],
+        'transform_stages': transform.METRICS.summary()['stages'],
+    }
+
+    print("\nEnd-to-end run")
+    print(f"  wall time        {report['wall_seconds']}s")
+    print(f"  rows loaded      {report['rows_loaded']} ({report['rows_per_sec']} rows/s)")
+    for delivery in deliveries:
+        print(f"  message {delivery['api_source']:<7} {delivery['records']:>6} records  "
+              f"status {delivery['status']}  publish->loaded {delivery['latency_seconds']}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(report, indent=2))
+    if args.keep:
+        print(f"Local storage and warehouse kept in {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Free-text extraction benchmark
+------------------------------
+Times field extraction on synthesized "Who is hiring" threads: the per-comment
+uncompiled regex loop the API test UI used, the compiled engine in
+data_cleaning/text_extraction.py run serially, and the engine on a process pool.
+Also parses the Jooble sample salaries to show the engine on that source.
+
+    python benchmarks/bench_extraction.py --sizes 500 5000 50000 --workers 1 4
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import load_samples
+from data_cleaning.text_extraction import extract_batch, parse_salary
+
+COMPANIES = ["Acme", "Initech", "Globex", "Hooli", "Pied Piper", "Stark Industries (YC S19)", "Umbrella Labs"]
+TITLES = ["Senior Backend Engineer", "Staff Software Engineer", "Data Scientist", "Product Designer",
+          "Engineering Manager", "Founding Full-stack Developer", "ML Researcher"]
+LOCATIONS = ["San Francisco, CA", "New York, NY", "Berlin, Germany", "London, UK", "REMOTE (US)", "Hybrid"]
+SALARIES = ["$150k - $200k", "$120-160k", "£70,000 - £90,000", "€80k", "", ""]
+EXTRAS = ["VISA", "No visa sponsorship", "Full-time", "ONSITE", ""]
+BODY = ("<p>We are building tools for {team} teams and have been profitable since 2019. "
+        "Our stack is Python, Go and Postgres on &#x2F;k8s. Apply at https:&#x2F;&#x2F;example.com&#x2F;jobs "
+        "or email jobs@example.com.</p><p>{filler}</p>")
+
+
+def synthesize_comments(count, seed=767):
+    rng = random.Random(seed)
+    comments = []
+    for i in range(count):
+        header = [rng.choice(COMPANIES), rng.choice(TITLES), rng.choice(LOCATIONS)]
+        header += [part for part in (rng.choice(SALARIES), rng.choice(EXTRAS)) if part]
+        filler = " ".join(rng.choice(["We", "value", "ownership", "and", "shipping", "fast", "teams", "hiring"])
+                          for _ in range(rng.randint(20, 120)))
+        comments.append(" | ".join(header) + BODY.format(team=rng.choice(["data", "platform", "growth"]), filler=filler))
+    return comments
+
+
+def legacy_extract(texts):
+    # The per-comment loop from the original test_hackernews handler
+    jobs = []
+    for text in texts:
+        job = {}
+        company_match = re.search(r'^([^|:]+)(?:\s*[|:]\s*|\s+is\s+hiring)', text, re.IGNORECASE | re.MULTILINE)
+        if company_match:
+            job['company'] = company_match.group(1).strip()
+        title_match = re.search(r'(?:hiring|for|hiring for|looking for)[^|:]*?([^|:,]*?(?:engineer|developer|designer|manager|director|lead|architect|consultant|scientist|specialist)[^|:,]*?)(?:at|\.|,|\||$)', text, re.IGNORECASE)
+        if title_match:
+            job['title'] = title_match.group(1).strip()
+        if re.search(r'\bREMOTE\b', text, re.IGNORECASE):
+            job['location'] = 'Remote'
+        jobs.append(job)
+    return jobs
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark free-text field extraction')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 20000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--legacy-max', type=int, default=500,
+                        help='largest thread to run the legacy loop on (it backtracks badly on long comments)')
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=767)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'comments':>9}  {'engine':<18}{'seconds':>9}{'us/comment':>12}{'salaries':>10}")
+    for size in args.sizes:
+        comments = synthesize_comments(size, args.seed)
+        runs = [('legacy', lambda: legacy_extract(comments))] if size <= args.legacy_max else []
+        for workers in args.workers:
+            runs.append((f'compiled/{workers}w', lambda w=workers: extract_batch(comments, workers=w, chunk_size=args.chunk_size)))
+        for name, run in runs:
+            seconds, fields = timed(run)
+            salaries = sum(1 for f in fields if f.get('salary_min') is not None)
+            results.append({'comments': size, 'engine': name, 'seconds': round(seconds, 4),
+                            'us_per_comment': round(seconds / size * 1e6, 2), 'salaries_found': salaries})
+            print(f"{size:>9}  {name:<18}{seconds:>9.3f}{seconds / size * 1e6:>12.1f}{salaries:>10}")
+
+    jooble = load_samples()['jooble']
+    seconds, parsed = timed(lambda: [parse_salary(job.get('salary'), require_unit=False) for job in jooble])
+    found = sum(1 for p in parsed if p['salary_min'] is not None)
+    with_salary = sum(1 for job in jooble if job.get('salary'))
+    print(f"\nJooble samples: parsed {found}/{with_salary} salary strings in {seconds * 1000:.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps({'results': results, 'jooble_salaries_parsed': found}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
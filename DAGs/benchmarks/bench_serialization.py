@@ -0,0 +1,71 @@
+"""
+Serialization benchmark
+-----------------------
+Encode/decode throughput of each installed JSON backend in serialization.py
+(orjson, msgspec, stdlib json) on the committed data/muse_jobs.json sample,
+compact and pretty-printed.
+
+    python benchmarks/bench_serialization.py --repeat 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from benchmarks.corpus import SAMPLE_DIR
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None or elapsed < best else best
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON backends on the Muse sample')
+    parser.add_argument('--input', default=os.path.join(SAMPLE_DIR, 'muse_jobs.json'))
+    parser.add_argument('--scale', type=int, default=10, help='repeat the sample records this many times')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        records = json.load(f) * args.scale
+    print(f"{len(records)} records, default backend: {serialization.BACKEND}")
+    print(f"{'backend':<10}{'mode':<9}{'bytes':>11}{'enc MB/s':>10}{'dec MB/s':>10}{'enc rec/s':>12}{'dec rec/s':>12}")
+
+    results = []
+    for name, (encode, decode) in serialization.available_backends().items():
+        for pretty in (False, True):
+            encode_seconds, payload = best_of(args.repeat, lambda: encode(records, pretty))
+            decode_seconds, decoded = best_of(args.repeat, lambda: decode(payload))
+            assert len(decoded) == len(records)
+            mb = len(payload) / 1e6
+            row = {
+                'backend': name,
+                'mode': 'pretty' if pretty else 'compact',
+                'bytes': len(payload),
+                'encode_mb_per_sec': round(mb / encode_seconds, 1),
+                'decode_mb_per_sec': round(mb / decode_seconds, 1),
+                'encode_records_per_sec': round(len(records) / encode_seconds),
+                'decode_records_per_sec': round(len(records) / decode_seconds),
+            }
+            results.append(row)
+            print(f"{name:<10}{row['mode']:<9}{row['bytes']:>11}{row['encode_mb_per_sec']:>10}{row['decode_mb_per_sec']:>10}"
+                  f"{row['encode_records_per_sec']:>12}{row['decode_records_per_sec']:>12}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Similarity index benchmark
+--------------------------
+Builds the "jobs like this" index (similarity.py) from synthesized standardized
+postings in --runs incremental updates, then times opening it and top-k
+queries by text and by job_url. Each query is also answered by scoring every
+posting's full vector, which gives the latency of a scan and the recall@k of the
+pruned inverted-list query against it; a hit counts as found when it scores at
+least the scan's k-th best, so ties between duplicates are not misses.
+Descriptions get --noise words drawn from a Zipf-distributed vocabulary, so the
+samples' repeated text does not make every postings list the same length.
+
+    python benchmarks/bench_similarity.py --postings 1000000 --runs 10 --queries 200
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import similarity
+from benchmarks.corpus import synthesize
+
+
+# Raw fields behind the standardized columns the index reads (see pipeline.FIELD_MAPPINGS)
+FIELDS = {
+    'adzuna': ('title', 'description', lambda r: r.get('redirect_url'), lambda r: (r.get('company') or {}).get('display_name')),
+    'jooble': ('title', 'snippet', lambda r: r.get('link'), lambda r: r.get('company')),
+    'muse': ('name', 'contents', lambda r: (r.get('refs') or {}).get('landing_page'), lambda r: (r.get('company') or {}).get('name')),
+}
+
+
+def standardized_postings(total):
+    # Mapped straight from the raw records: a DataFrame per source costs several KB per posting
+    postings = []
+    for source, records in synthesize(total).items():
+        title, description, url, company = FIELDS[source]
+        postings.extend({'job_title': r.get(title), 'job_description': r.get(description), 'job_url': url(r),
+                         'company_name': company(r), 'source': source} for r in records)
+    return postings
+
+
+def with_noise(postings, noise, vocabulary, rng):
+    # Added per batch, so the whole corpus never holds a second copy of its descriptions
+    ranks = np.minimum(rng.zipf(1.2, size=(len(postings), noise)), vocabulary) - 1
+    return [{**posting, 'job_description': f"{posting['job_description'] or ''} {' '.join(f'w{rank}' for rank in row)}"}
+            for posting, row in zip(postings, ranks)]
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return {'p50_ms': round(float(np.percentile(samples, 50)), 2), 'p95_ms': round(float(np.percentile(samples, 95)), 2),
+            'max_ms': round(float(samples.max()), 2)}
+
+
+def locate(index, url):
+    target = np.array([similarity.url_hash(url)], np.uint64)
+    for position, segment in enumerate(index.segments):
+        row = int(segment.find(target)[0])
+        if row >= 0:
+            return position, row
+    raise KeyError(url)
+
+
+def scan(index, features, weights):
+    # Every posting's full vector against the full query vector
+    query = np.zeros(len(index.df), np.float32)
+    query[features] = weights
+    scores = []
+    for segment in index.segments:
+        rows = np.repeat(np.arange(segment.rows), np.diff(segment.row_indptr))
+        scores.append(np.bincount(rows, weights=segment.row_weights * query[segment.row_features], minlength=segment.rows))
+    return scores
+
+
+def recall(index, scores, hits, k):
+    # Share of the hits scoring at least the scan's k-th best, so tied duplicates count as found
+    best = np.sort(np.concatenate([np.partition(s, -k)[-k:] if len(s) > k else s for s in scores]))[::-1]
+    wanted = min(k, int((best > 0).sum()))
+    if not wanted:
+        return None
+    found = 0
+    for hit in hits:
+        position, row = locate(index, hit['job_url'])
+        found += scores[position][row] >= best[wanted - 1] - 1e-6
+    return min(found, wanted) / wanted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the similarity index')
+    parser.add_argument('--postings', type=int, default=200000)
+    parser.add_argument('--runs', type=int, default=5, help='incremental updates the postings are split into')
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--noise', type=int, default=20, help='random words added to each description')
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--index', help='build here instead of a temporary directory')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    postings = standardized_postings(args.postings)
+    rng = np.random.default_rng(767)
+    index_dir = args.index or tempfile.mkdtemp(prefix='similarity-')
+    shutil.rmtree(index_dir, ignore_errors=True)
+    results = {'postings': len(postings), 'runs': []}
+
+    print(f"{'run':>4}{'postings':>10}{'added':>9}{'seconds':>9}{'docs/s':>9}{'segments':>9}")
+    for run, batch in enumerate(np.array_split(np.arange(len(postings)), args.runs)):
+        records = with_noise([postings[i] for i in batch], args.noise, args.vocabulary, rng)
+        started = time.perf_counter()
+        index = similarity.SimilarityIndex(index_dir)
+        added = index.add(records)
+        elapsed = time.perf_counter() - started
+        row = {'postings': len(records), 'added': added, 'seconds': round(elapsed, 2),
+               'docs_per_sec': round(len(records) / elapsed), 'segments': len(index.segments)}
+        results['runs'].append(row)
+        print(f"{run:>4}{row['postings']:>10}{added:>9}{row['seconds']:>9}{row['docs_per_sec']:>9}{row['segments']:>9}")
+
+    started = time.perf_counter()
+    index = similarity.SimilarityIndex(index_dir)
+    results['open_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    results['index_mb'] = round(sum(os.path.getsize(os.path.join(root, name))
+                                    for root, _, names in os.walk(index_dir) for name in names) / 1e6, 1)
+    results['documents'] = index.documents
+
+    sample = random.Random(767).sample(postings, min(args.queries, len(postings)))
+    for kind, queries in (('text', [{'text': posting['job_title'] or ''} for posting in sample]),
+                          ('url', [{'url': posting['job_url']} for posting in sample if posting['job_url']])):
+        latencies, scan_latencies, recalls = [], [], []
+        for query in queries:
+            try:
+                started = time.perf_counter()
+                hits = index.similar(k=args.k, **query)
+                latencies.append(time.perf_counter() - started)
+            except KeyError:
+                continue
+            if 'url' in query:
+                position, row = locate(index, query['url'])
+                features, weights = index.segments[position].vector(row)
+            else:
+                counts = index.vectorizer.counts(query['text'])
+                features = np.array(list(counts), np.int64)
+                weights = np.log1p(np.array(list(counts.values()), np.float32)) * index.idf[features]
+                weights = weights / max(float(np.linalg.norm(weights)), 1e-12)
+            started = time.perf_counter()
+            scores = scan(index, features, weights)
+            scan_latencies.append(time.perf_counter() - started)
+            if 'url' in query:
+                scores[position][row] = 0
+            found = recall(index, scores, hits, args.k)
+            if found is not None:
+                recalls.append(found)
+        results[kind] = {'queries': len(latencies), **percentiles(latencies),
+                         'scan': percentiles(scan_latencies), f'recall_at_{args.k}': round(float(np.mean(recalls)), 3)}
+
+    print(f"{results['documents']} postings, {results['index_mb']} MB on disk, opened in {results['open_ms']} ms")
+    for kind in ('text', 'url'):
+        summary = results[kind]
+        print(f"{kind:>5} query  p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  max {summary['max_ms']} ms"
+              f"  | scan p50 {summary['scan']['p50_ms']} ms  | recall@{args.k} {summary[f'recall_at_{args.k}']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not args.index:
+        shutil.rmtree(index_dir)
+
+
+if __name__ == "__main__":
+    main()
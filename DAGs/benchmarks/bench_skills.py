@@ -0,0 +1,103 @@
+"""
+Skill tagging benchmark
+-----------------------
+Throughput of the transform service's skill tagger (google_cloud/transform/
+skills.py) on synthesized postings: the curated dictionary padded with random
+terms up to --terms, with the pyahocorasick and pure-Python automatons, in one
+process and across a process pool.
+
+    python benchmarks/bench_skills.py --terms 50000 --postings 200000 --processes 1 4
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'google_cloud', 'transform'))
+
+import skills
+from benchmarks.corpus import synthesize
+
+TEXT_FIELDS = {'adzuna': ('title', 'description'), 'jooble': ('title', 'snippet'), 'muse': ('name', 'contents')}
+
+
+def padded_terms(total, seed=767):
+    terms = skills.load_terms()
+    rng = random.Random(seed)
+    while len(terms) < total:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+        terms.setdefault(word, word)
+    return terms
+
+
+def postings(total):
+    docs = []
+    for source, records in synthesize(total).items():
+        title, description = TEXT_FIELDS[source]
+        docs.extend(skills.documents([r.get(title) for r in records], [r.get(description) for r in records]))
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Aho-Corasick skill tagger')
+    parser.add_argument('--terms', type=int, default=20000, help='dictionary size, padded with random terms')
+    parser.add_argument('--postings', type=int, default=100000)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    terms = padded_terms(args.terms)
+    docs = postings(args.postings)
+    chars = sum(len(doc) for doc in docs)
+    print(f"{len(terms)} terms, {len(docs)} postings, {chars / 1e6:.1f}M characters")
+    print(f"{'automaton':<14}{'procs':>6}{'build s':>9}{'tag s':>9}{'docs/s':>10}{'Mchar/s':>9}{'tags/doc':>9}")
+
+    backends = {'python': skills.PyAutomaton}
+    try:
+        import ahocorasick
+        backends = {'pyahocorasick': ahocorasick.Automaton, **backends}
+    except ImportError:
+        print("pyahocorasick is not installed, only the pure-Python automaton runs")
+
+    results = []
+    baseline = None
+    for name, automaton in backends.items():
+        started = time.perf_counter()
+        skills.new_automaton = automaton
+        tagger = skills.SkillTagger(terms)
+        build = time.perf_counter() - started
+        for processes in args.processes:
+            # The pool forks from this process, so workers share the tagger built above
+            skills._tagger, skills._pool = tagger, None
+            started = time.perf_counter()
+            tags = skills.tag_texts(docs, processes=processes)
+            elapsed = time.perf_counter() - started
+            if skills._pool is not None:
+                skills._pool.shutdown()
+            if baseline is None:
+                baseline = tags
+            assert tags == baseline, f"{name} with {processes} processes tagged differently"
+            row = {
+                'automaton': name,
+                'processes': processes,
+                'build_seconds': round(build, 3),
+                'tag_seconds': round(elapsed, 3),
+                'docs_per_sec': round(len(docs) / elapsed),
+                'mchars_per_sec': round(chars / elapsed / 1e6, 1),
+                'tags_per_doc': round(sum(len(t) for t in tags) / len(docs), 2),
+            }
+            results.append(row)
+            print(f"{name:<14}{processes:>6}{row['build_seconds']:>9}{row['tag_seconds']:>9}{row['docs_per_sec']:>10}"
+                  f"{row['mchars_per_sec']:>9}{row['tags_per_doc']:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'terms': len(terms), 'postings': len(docs), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline transform benchmark
+---------------------------
+Synthesizes scaled-up corpora from the committed samples and times each stage
+of the local and Cloud Run transforms: raw JSON parse, field mapping,
+salary/date normalization, JSON/CSV/Parquet serialization and dedup. With
+pyarrow installed it also times the transform service end to end (raw bytes to
+Parquet) on both TRANSFORM_ENGINE settings.
+
+Every corpus size runs in its own process so peak RSS is per size, and the
+results are written to benchmarks/results/transform-<commit>.json so runs from
+different commits can be compared:
+
+    python benchmarks/bench_transform.py --sizes 10000 100000
+    python benchmarks/bench_transform.py --compare benchmarks/results/transform-abc1234.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import importlib.util
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from benchmarks.corpus import synthesize, write_corpus
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+TRANSFORM_SERVICE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'google_cloud', 'transform', 'main.py')
+DEFAULT_SIZES = [10000, 100000, 1000000]
+SALARY_PATTERN = r'\$?([0-9][0-9,.]*)\s*([kK]?)(?:\s*-\s*\$?([0-9][0-9,.]*)\s*([kK]?))?'
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def load_transform_service():
+    service_dir = os.path.dirname(TRANSFORM_SERVICE)
+    if service_dir not in sys.path:
+        sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location('transform_service', TRANSFORM_SERVICE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def normalize_salary_and_dates(df):
+    import pandas as pd
+
+    normalized = df.copy()
+    normalized['posted_at'] = pd.to_datetime(normalized['posted_date'], utc=True, errors='coerce', format='ISO8601')
+    parts = normalized['salary'].fillna('').astype(str).str.extract(SALARY_PATTERN)
+    low = pd.to_numeric(parts[0].str.replace(',', '', regex=False), errors='coerce')
+    high = pd.to_numeric(parts[2].str.replace(',', '', regex=False), errors='coerce')
+    normalized['salary_min_value'] = low.where(parts[1] == '', low * 1000)
+    normalized['salary_max_value'] = high.where(parts[3] == '', high * 1000).fillna(normalized['salary_min_value'])
+    return normalized
+
+
+class StageTimer:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.stages = {}
+
+    def run(self, name, records, fn):
+        best, result = None, None
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stages[name] = {
+            'seconds': round(best, 6),
+            'records': records,
+            'records_per_sec': round(records / best, 1) if best else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        print(f"  {name:<28} {best:9.3f}s  {self.stages[name]['records_per_sec']:>12} rec/s  "
+              f"peak {self.stages[name]['peak_rss_mb']} MB")
+        return result
+
+
+def run_size(size, seed, repeat, workdir):
+    import pandas as pd
+    import pipeline
+
+    print(f"Corpus of {size} postings")
+    timer = StageTimer(repeat)
+    corpus = synthesize(size, seed=seed)
+    input_dir = os.path.join(workdir, 'data')
+    output_dir = os.path.join(workdir, 'transformed_data')
+    paths = write_corpus(corpus, input_dir)
+    counts = {source: len(jobs) for source, jobs in corpus.items()}
+    del corpus
+
+    raw, payloads = {}, {}
+    for source, path in paths.items():
+        with open(path, 'rb') as f:
+            payload = payloads[source] = f.read()
+        timer.run(f'parse_json.{source}', counts[source], lambda: json.loads(payload))
+        raw[source] = timer.run(f'read_json.{source}', counts[source], lambda: pd.read_json(path))
+
+    standardized = []
+    for source, df in raw.items():
+        standardize = pipeline.STANDARDIZERS[source]
+        standardized.append(timer.run(f'field_mapping.{source}', len(df), lambda: standardize(df)))
+
+    try:
+        service = load_transform_service()
+    except ImportError as e:
+        print(f"  skipping transform service stages: {e}")
+        service = None
+    if service is not None:
+        for source, df in raw.items():
+            timer.run(f'service_mapping.{source}', len(df), lambda: service.standardize_jobs(df, source))
+        try:
+            import arrow_engine
+        except ImportError as e:
+            print(f"  skipping arrow engine stages: {e}")
+            arrow_engine = None
+    if service is not None and arrow_engine is not None:
+        for source, payload in payloads.items():
+            mapping = service.FIELD_MAPPINGS[source]
+            lines = serialization.dumps_lines(json.loads(payload))
+            timer.run(f'service_pandas.{source}', counts[source],
+                      lambda: service.standardize_jobs(pd.DataFrame(json.loads(payload)), source).to_parquet(io.BytesIO(), index=False))
+            timer.run(f'service_arrow.{source}', counts[source],
+                      lambda: arrow_engine.to_parquet(arrow_engine.standardize_table(
+                          arrow_engine.read_records(lines, True, mapping), source, mapping)))
+
+    combined = pd.concat(standardized, ignore_index=True)
+    total = len(combined)
+    del raw, standardized
+
+    timer.run('normalize_salary_date', total, lambda: normalize_salary_and_dates(combined))
+    timer.run('serialize_json', total, lambda: combined.to_json(orient='records'))
+    timer.run('serialize_csv', total, lambda: combined.to_csv(index=False))
+    try:
+        timer.run('serialize_parquet', total, lambda: combined.to_parquet(io.BytesIO(), index=False))
+    except ImportError as e:
+        print(f"  skipping parquet: {e}")
+    timer.run('dedup_url', total, lambda: combined.drop_duplicates(subset=['job_url']))
+    timer.run('dedup_row', total, lambda: combined.drop_duplicates())
+    del combined
+
+    timer.run('pipeline.transform_data', total, lambda: pipeline.transform_data(input_dir, output_dir, workers=1))
+    if pipeline.TRANSFORM_WORKERS > 1:
+        timer.run(f'pipeline.transform_data.{pipeline.TRANSFORM_WORKERS}w', total,
+                  lambda: pipeline.transform_data(input_dir, output_dir))
+    return {'size': size, 'stages': timer.stages, 'peak_rss_mb': peak_rss_mb()}
+
+
+def run_child(args):
+    workdir = tempfile.mkdtemp(prefix='bench_transform_')
+    try:
+        result = run_size(args.child, args.seed, args.repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    with open(args.json_out, 'w') as f:
+        json.dump(result, f)
+
+
+def compare(current, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    base_runs = {run['size']: run for run in baseline['runs']}
+    regressions = []
+    print(f"\nComparing {current['commit']} against {baseline['commit']} (threshold {threshold:.0%})")
+    for run in current['runs']:
+        base = base_runs.get(run['size'])
+        if not base:
+            continue
+        for name, stage in run['stages'].items():
+            before = base['stages'].get(name)
+            if not before or not before['seconds']:
+                continue
+            ratio = stage['seconds'] / before['seconds']
+            flag = 'REGRESSION' if ratio > 1 + threshold else ''
+            print(f"  {run['size']:>8} {name:<28} {before['seconds']:9.3f}s -> {stage['seconds']:9.3f}s  x{ratio:.2f} {flag}")
+            if flag:
+                regressions.append((run['size'], name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the job transforms on synthesized corpora')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=767)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/transform-<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown before a stage is flagged')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--json-out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    import pandas as pd
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'runs': [],
+    }
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+            json_out = tmp.name
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(size),
+                            '--seed', str(args.seed), '--repeat', str(args.repeat), '--json-out', json_out],
+                           check=True)
+            with open(json_out) as f:
+                results['runs'].append(json.load(f))
+        finally:
+            os.remove(json_out)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f'transform-{commit}.json')
+    with open(output, 'w') as f:
+        f.write(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
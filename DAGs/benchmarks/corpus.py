@@ -0,0 +1,122 @@
+import os
+import csv
+import json
+import random
+import datetime
+from typing import Dict, List, Any
+
+DAGS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DIR = os.path.join(DAGS_DIR, 'data')
+STANDARDIZED_CSV = os.path.join(DAGS_DIR, 'transformed_data', 'jobs_data_standardized.csv')
+
+# Share of each source in a synthesized corpus, close to what a real crawl returns
+SOURCE_MIX = {'adzuna': 0.7, 'muse': 0.2, 'jooble': 0.1}
+
+
+def load_samples() -> Dict[str, List[Dict[str, Any]]]:
+    # Adzuna raw responses are not committed, so rebuild raw-shaped records from
+    # the Adzuna rows of the standardized CSV.
+    with open(os.path.join(SAMPLE_DIR, 'muse_jobs.json')) as f:
+        muse = json.load(f)
+    with open(os.path.join(SAMPLE_DIR, 'jooble_jobs.json')) as f:
+        jooble = json.load(f)
+
+    adzuna = []
+    with open(STANDARDIZED_CSV, newline='') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if 'adzuna.com' not in row['job_url']:
+                continue
+            salary_min, salary_max = _parse_salary_pair(row['salary'])
+            adzuna.append({
+                '__CLASS__': 'Adzuna::API::Response::Job',
+                'id': str(5000000000 + i),
+                'title': row['job_title'],
+                'description': row['job_description'],
+                'redirect_url': row['job_url'],
+                'created': row['posted_date'],
+                'category': {'label': row['job_category'], 'tag': row['job_category'].lower().replace(' ', '-')},
+                'contract_time': row['job_type'] or None,
+                'company': {'display_name': row['company_name']},
+                'location': {'display_name': 'US', 'area': ['US']},
+                'salary_min': salary_min,
+                'salary_max': salary_max,
+                'salary_is_predicted': '1',
+            })
+    return {'adzuna': adzuna, 'jooble': jooble, 'muse': muse}
+
+
+def _parse_salary_pair(salary: str):
+    parts = [p.strip().lstrip('$') for p in salary.split('-')] if salary else []
+    try:
+        return float(parts[0]), float(parts[1])
+    except (IndexError, ValueError):
+        return None, None
+
+
+def _shift_date(value: str, days: int) -> str:
+    if not value:
+        return value
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00')[:25])
+    except ValueError:
+        return value
+    shifted = parsed - datetime.timedelta(days=days)
+    return shifted.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _mutate(source: str, record: Dict[str, Any], serial: int, rng: random.Random) -> Dict[str, Any]:
+    # Shallow copy is enough: only top-level keys are replaced below
+    job = dict(record)
+    days = rng.randint(0, 90)
+    if source == 'adzuna':
+        job['id'] = str(6000000000 + serial)
+        job['redirect_url'] = f"{job['redirect_url'].split('?')[0]}?bench={serial}"
+        job['created'] = _shift_date(job['created'], days)
+        if job.get('salary_min') is not None:
+            factor = rng.uniform(0.8, 1.2)
+            job['salary_min'] = round(job['salary_min'] * factor, 2)
+            job['salary_max'] = round(job['salary_max'] * factor, 2)
+    elif source == 'muse':
+        job['id'] = 90000000 + serial
+        job['refs'] = {'landing_page': f"{job['refs']['landing_page']}-{serial}"}
+        job['publication_date'] = _shift_date(job['publication_date'], days)
+    else:
+        job['id'] = -(10 ** 17) - serial
+        job['link'] = f"https://jooble.org/jdp/{-(10 ** 17) - serial}"
+        job['updated'] = _shift_date(job['updated'], days)
+    return job
+
+
+def synthesize(total: int, seed: int = 767, duplicate_rate: float = 0.05) -> Dict[str, List[Dict[str, Any]]]:
+    """Scale the committed samples up to ``total`` raw postings.
+
+    Records are deterministic for a given seed, get unique ids/URLs and shifted
+    dates, and ``duplicate_rate`` of them are exact repeats so dedup has work to do.
+    """
+    rng = random.Random(seed)
+    samples = load_samples()
+    corpus: Dict[str, List[Dict[str, Any]]] = {}
+    serial = 0
+    for source, share in SOURCE_MIX.items():
+        count = int(total * share) if source != 'jooble' else total - sum(len(v) for v in corpus.values())
+        pool = samples[source]
+        jobs = []
+        for i in range(count):
+            if jobs and rng.random() < duplicate_rate:
+                jobs.append(jobs[rng.randrange(len(jobs))])
+                continue
+            jobs.append(_mutate(source, pool[i % len(pool)], serial, rng))
+            serial += 1
+        corpus[source] = jobs
+    return corpus
+
+
+def write_corpus(corpus: Dict[str, List[Dict[str, Any]]], output_dir: str) -> Dict[str, str]:
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for source, jobs in corpus.items():
+        path = os.path.join(output_dir, f'{source}_jobs.json')
+        with open(path, 'w') as f:
+            json.dump(jobs, f)
+        paths[source] = path
+    return paths
@@ -0,0 +1,262 @@
+"""
+Replay server
+-------------
+Local stand-in for the Adzuna, The Muse and Jooble job APIs. It serves recorded
+postings with each provider's pagination semantics, adds configurable latency
+and injects 429/5xx responses, so connector settings can be load tested
+without touching the real APIs.
+
+    python benchmarks/replay_server.py --port 8765 --latency lognormal:80:0.5 --error-rate 0.02
+
+Point a connector at it by overriding its endpoint on the instance:
+
+    connector.BASE_URL = "http://127.0.0.1:8765/v1/api/jobs"     # Adzuna
+    connector.BASE_URL = "http://127.0.0.1:8765/api/public/jobs"  # The Muse
+    connector.HOST = "127.0.0.1:8765"                              # Jooble
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, List, Any, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import load_samples
+
+
+class LatencyModel:
+    """Per-request delay, parsed from ``fixed:MS``, ``uniform:LOW:HIGH`` or ``lognormal:MEDIAN:SIGMA``."""
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        if self.kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency model: {spec}")
+        self.spec = spec
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == 'fixed':
+                ms = self.params[0] if self.params else 0
+            elif self.kind == 'uniform':
+                ms = self._rng.uniform(self.params[0], self.params[1])
+            else:
+                ms = self._rng.lognormvariate(math.log(max(self.params[0], 0.001)), self.params[1])
+        return ms / 1000.0
+
+
+class ReplayConfig:
+    def __init__(self,
+                 latency: str = "fixed:0",
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 retry_after: int = 1,
+                 adzuna_count: Optional[int] = None,
+                 muse_page_count: Optional[int] = None,
+                 jooble_total: Optional[int] = None,
+                 seed: int = 767):
+        self.latency = LatencyModel(latency, seed=seed)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.adzuna_count = adzuna_count
+        self.muse_page_count = muse_page_count
+        self.jooble_total = jooble_total
+        self.seed = seed
+
+
+def load_recordings(recordings_dir: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    # A recordings directory holds <source>_jobs.json files as written by
+    # pipeline.extract_data; anything missing falls back to the committed samples.
+    recordings = load_samples()
+    if recordings_dir:
+        for source in recordings:
+            path = os.path.join(recordings_dir, f'{source}_jobs.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    recordings[source] = json.load(f)
+    return recordings
+
+
+class ReplayServer:
+    def __init__(self, config: ReplayConfig, host: str = "127.0.0.1", port: int = 0,
+                 recordings: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.config = config
+        self.recordings = recordings or load_recordings()
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.status_counts: Dict[int, int] = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return f"{self.httpd.server_address[0]}:{self.httpd.server_address[1]}"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def configure(self, connector):
+        # Redirect a connector instance, or every instance of a connector class, at this server
+        name = connector.__name__ if isinstance(connector, type) else type(connector).__name__
+        if name == 'AdzunaConnector':
+            connector.BASE_URL = f"{self.base_url}/v1/api/jobs"
+        elif name == 'MuseConnector':
+            connector.BASE_URL = f"{self.base_url}/api/public/jobs"
+        elif name == 'JoobleConnector':
+            connector.HOST = self.host
+        else:
+            raise ValueError(f"No replay endpoint for {name}")
+        return connector
+
+    def _record_status(self, status: int):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _inject_fault(self) -> Optional[int]:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.config.rate_limit_rate:
+            return 429
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return 503
+        return None
+
+    def adzuna_page(self, page: int, results_per_page: int) -> Dict[str, Any]:
+        jobs = self.recordings['adzuna']
+        count = self.config.adzuna_count if self.config.adzuna_count is not None else len(jobs)
+        start = (page - 1) * results_per_page
+        end = min(start + results_per_page, count)
+        results = [jobs[i % len(jobs)] for i in range(start, end)] if jobs else []
+        return {'__CLASS__': 'Adzuna::API::Response::JobSearchResults', 'count': count, 'mean': 0, 'results': results}
+
+    def muse_page(self, page: int, page_size: int) -> Dict[str, Any]:
+        jobs = self.recordings['muse']
+        page_count = self.config.muse_page_count
+        if page_count is None:
+            page_count = max(1, math.ceil(len(jobs) / page_size))
+        total = page_count * page_size
+        start = (page - 1) * page_size
+        results = [jobs[i % len(jobs)] for i in range(start, min(start + page_size, total))] if jobs and page <= page_count else []
+        return {'page': page, 'page_count': page_count, 'items_per_page': page_size, 'took': 1,
+                'timed_out': False, 'total': total, 'results': results}
+
+    def jooble_search(self, limit: int) -> Dict[str, Any]:
+        jobs = self.recordings['jooble']
+        total = self.config.jooble_total if self.config.jooble_total is not None else len(jobs)
+        results = [jobs[i % len(jobs)] for i in range(min(limit, total))] if jobs else []
+        return {'totalCount': total, 'jobs': results}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload: Optional[Dict[str, Any]] = None):
+                body = json.dumps(payload if payload is not None else {'error': status}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if status == 429:
+                    self.send_header('Retry-After', str(server.config.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+                server._record_status(status)
+
+            def _delay_or_fault(self) -> bool:
+                time.sleep(server.config.latency.sample())
+                fault = server._inject_fault()
+                if fault:
+                    self._send(fault)
+                    return True
+                return False
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip('/').split('/')
+                if self._delay_or_fault():
+                    return
+                try:
+                    if url.path.startswith('/v1/api/jobs/') and len(parts) == 6 and parts[4] == 'search':
+                        per_page = int(query.get('results_per_page', ['20'])[0])
+                        self._send(200, server.adzuna_page(int(parts[5]), per_page))
+                    elif url.path.rstrip('/') == '/api/public/jobs':
+                        page = int(query.get('page', ['1'])[0])
+                        page_size = int(query.get('page_size', ['20'])[0])
+                        self._send(200, server.muse_page(page, page_size))
+                    else:
+                        self._send(404)
+                except ValueError:
+                    self._send(400)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                if self._delay_or_fault():
+                    return
+                if not self.path.startswith('/api/'):
+                    self._send(404)
+                    return
+                try:
+                    payload = json.loads(body or b'{}')
+                    self._send(200, server.jooble_search(int(payload.get('limit', 20))))
+                except ValueError:
+                    self._send(400)
+
+        return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Replay recorded job API responses locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recordings', help='directory with <source>_jobs.json recordings')
+    parser.add_argument('--latency', default='fixed:0', help='fixed:MS, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--adzuna-count', type=int, help='total results Adzuna reports per keyword')
+    parser.add_argument('--muse-page-count', type=int, help='page_count The Muse reports per category')
+    parser.add_argument('--seed', type=int, default=767)
+    return parser
+
+
+def config_from_args(args) -> ReplayConfig:
+    return ReplayConfig(latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        adzuna_count=args.adzuna_count, muse_page_count=args.muse_page_count, seed=args.seed)
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    server = ReplayServer(config_from_args(args), host=args.host, port=args.port,
+                          recordings=load_recordings(args.recordings))
+    print(f"Replay server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,172 @@
+import os
+import json
+import pickle
+import hashlib
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+
+def _code_hash(funcs: Iterable[Callable]) -> str:
+    digest = hashlib.sha256()
+    for func in funcs:
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            source = func.__code__.co_code.hex() if hasattr(func, '__code__') else repr(func)
+        digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Task:
+    def __init__(self, name: str, func: Callable, deps: Sequence[str] = (), key: Any = None,
+                 code: Sequence[Callable] = (), cache: bool = True):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.key = key
+        self.code_version = _code_hash([func, *code])
+        self.cache = cache
+
+    def cache_key(self, dep_digests: List[str]) -> str:
+        payload = json.dumps({'task': self.name, 'code': self.code_version, 'key': self.key,
+                              'inputs': dep_digests}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _Result:
+    def __init__(self, digest: str, path: Optional[str] = None, value: Any = None, loaded: bool = False):
+        self.digest = digest
+        self.path = path
+        self._value = value
+        self._loaded = loaded
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> Any:
+        # Cache hits are only unpickled when a downstream task actually runs
+        with self._lock:
+            if not self._loaded:
+                with open(self.path, 'rb') as f:
+                    self._value = pickle.load(f)
+                self._loaded = True
+            return self._value
+
+
+class DAG:
+    """Tasks with dependencies, run concurrently once their inputs are ready.
+
+    A task's output is cached under a hash of its name, code, ``key`` and the
+    content digests of its inputs, so a task only reruns when one of those
+    changed. Each task function receives its dependencies' outputs as positional
+    arguments, in the order of ``deps``.
+    """
+
+    def __init__(self, name: str, cache_dir: str = '.dag_cache', max_workers: Optional[int] = None, metrics=None):
+        self.name = name
+        self.cache_dir = os.path.join(cache_dir, name)
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 4)
+        self.metrics = metrics
+        self.tasks: Dict[str, Task] = {}
+
+    def add(self, name: str, func: Callable, deps: Sequence[str] = (), key: Any = None,
+            code: Sequence[Callable] = (), cache: bool = True) -> Task:
+        if name in self.tasks:
+            raise ValueError(f"Task {name} is already defined")
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dep}")
+        self.tasks[name] = Task(name, func, deps, key, code, cache)
+        return self.tasks[name]
+
+    def task(self, name: str, deps: Sequence[str] = (), key: Any = None, code: Sequence[Callable] = (), cache: bool = True):
+        def decorator(func):
+            self.add(name, func, deps, key, code, cache)
+            return func
+        return decorator
+
+    def _required(self, targets: Optional[Sequence[str]]) -> List[str]:
+        pending = list(targets or self.tasks)
+        required = set()
+        while pending:
+            name = pending.pop()
+            if name not in required:
+                required.add(name)
+                pending.extend(self.tasks[name].deps)
+        # self.tasks is in declaration order, and deps must be declared first
+        return [name for name in self.tasks if name in required]
+
+    def _paths(self, task: Task, key: str):
+        base = os.path.join(self.cache_dir, task.name, key)
+        return f"{base}.pkl", f"{base}.json"
+
+    def _execute(self, task: Task, results: Dict[str, _Result], forced: bool) -> _Result:
+        inputs = [results[dep] for dep in task.deps]
+        key = task.cache_key([r.digest for r in inputs])
+        value_path, meta_path = self._paths(task, key)
+
+        if task.cache and not forced and os.path.exists(value_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            print(f"[{self.name}] {task.name}: cached")
+            self._count(task.name, "cached")
+            return _Result(meta['digest'], path=value_path)
+
+        print(f"[{self.name}] {task.name}: running")
+        if self.metrics is not None:
+            with self.metrics.span("task", source=task.name) as span:
+                value = task.func(*[r.value for r in inputs])
+                span["records"] = len(value) if hasattr(value, '__len__') else 0
+        else:
+            value = task.func(*[r.value for r in inputs])
+        self._count(task.name, "ran")
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest()
+        if task.cache:
+            os.makedirs(os.path.dirname(value_path), exist_ok=True)
+            for path, data, mode in ((value_path, payload, 'wb'), (meta_path, json.dumps({'digest': digest}), 'w')):
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        return _Result(digest, value=value, loaded=True)
+
+    def _count(self, name: str, outcome: str):
+        if self.metrics is not None:
+            self.metrics.inc("dag_tasks_total", task=name, outcome=outcome)
+
+    def run(self, targets: Optional[Sequence[str]] = None, force: Union[bool, Iterable[str]] = False) -> Dict[str, Any]:
+        """Run ``targets`` (default: every task) and their dependencies; return the targets' outputs.
+
+        ``force`` reruns every task when True, or the named tasks when given names.
+        Tasks downstream of a rerun task rerun as well if its output changed.
+        """
+        order = self._required(targets)
+        forced = set(order) if force is True else set(force or ())
+        results: Dict[str, _Result] = {}
+        running = {}
+        remaining = list(order)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining or running:
+                for name in [n for n in remaining if all(dep in results for dep in self.tasks[n].deps)]:
+                    remaining.remove(name)
+                    running[executor.submit(self._execute, self.tasks[name], results, name in forced)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"[{self.name}] {name}: failed: {str(e)}")
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        if targets is None:
+            # Without explicit targets, return the outputs nothing else consumes
+            consumed = {dep for name in order for dep in self.tasks[name].deps}
+            targets = [name for name in order if name not in consumed]
+        return {name: results[name].value for name in targets}
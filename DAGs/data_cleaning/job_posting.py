@@ -0,0 +1,149 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterable, List, Optional
+
+import serialization
+
+
+@dataclass(slots=True)
+class JobPosting:
+    """One row of the standardized jobs table (sql/job_market_tables.sql).
+
+    Slotted, so a posting costs a fixed ten references instead of a dict, and
+    converters build it straight from the raw API records without pandas.
+    ``skills`` starts empty; the transform service's skills.py fills it.
+    """
+    source: str
+    job_title: Optional[str] = None
+    job_description: Optional[str] = None
+    job_url: Optional[str] = None
+    posted_date: Optional[str] = None
+    company_name: Optional[str] = None
+    job_category: Optional[str] = None
+    job_type: Optional[str] = None
+    salary: Optional[str] = None
+    skills: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def to_tuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    def to_json(self) -> str:
+        return serialization.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobPosting":
+        return cls(*(data.get(name) for name in FIELDS[:-1]), skills=list(data.get('skills') or []))
+
+    @classmethod
+    def from_json(cls, text: str) -> "JobPosting":
+        return cls.from_dict(serialization.loads(text))
+
+    @classmethod
+    def from_adzuna(cls, raw: Dict[str, Any]) -> "JobPosting":
+        return cls(
+            source='adzuna',
+            job_title=raw.get('title'),
+            job_description=raw.get('description'),
+            job_url=raw.get('redirect_url'),
+            posted_date=raw.get('created'),
+            company_name=_nested(raw, 'company', 'display_name'),
+            job_category=_nested(raw, 'category', 'label'),
+            job_type=raw.get('contract_time'),
+            salary=_salary_range(raw.get('salary_min'), raw.get('salary_max')),
+        )
+
+    @classmethod
+    def from_jooble(cls, raw: Dict[str, Any]) -> "JobPosting":
+        return cls(
+            source='jooble',
+            job_title=raw.get('title'),
+            job_description=raw.get('snippet'),
+            job_url=raw.get('link'),
+            posted_date=raw.get('updated'),
+            company_name=raw.get('company'),
+            job_category=raw.get('type'),
+            job_type=raw.get('type'),
+            salary=raw.get('salary') or None,
+        )
+
+    @classmethod
+    def from_muse(cls, raw: Dict[str, Any]) -> "JobPosting":
+        categories = raw.get('categories')
+        category = categories[0].get('name') if isinstance(categories, list) and categories and isinstance(categories[0], dict) else None
+        return cls(
+            source='muse',
+            job_title=raw.get('name'),
+            job_description=raw.get('contents'),
+            job_url=_nested(raw, 'refs', 'landing_page'),
+            posted_date=raw.get('publication_date'),
+            company_name=_nested(raw, 'company', 'name'),
+            job_category=category,
+        )
+
+    @classmethod
+    def from_hackernews(cls, job: Dict[str, Any]) -> "JobPosting":
+        # Takes the jobs HackerNewsConnector.parse_jobs builds, not raw items
+        salary = None
+        if job.get('salary_min') is not None:
+            salary = _salary_range(job.get('salary_min'), job.get('salary_max'))
+        return cls(
+            source='hackernews',
+            job_title=job.get('title'),
+            job_description=job.get('description'),
+            job_url=job.get('source_url'),
+            posted_date=job.get('posted_date'),
+            company_name=job.get('company'),
+            job_type='Remote' if job.get('remote') else None,
+            salary=salary,
+        )
+
+
+FIELDS = tuple(field.name for field in fields(JobPosting))
+
+CONVERTERS = {
+    'adzuna': JobPosting.from_adzuna,
+    'jooble': JobPosting.from_jooble,
+    'muse': JobPosting.from_muse,
+    'hackernews': JobPosting.from_hackernews,
+}
+
+
+def _nested(raw: Dict[str, Any], key: str, field: str) -> Any:
+    value = raw.get(key)
+    return value.get(field) if isinstance(value, dict) else None
+
+
+def _salary_range(low: Any, high: Any) -> Optional[str]:
+    """Same "$min - $max" string the transform service builds from Adzuna's bounds.
+
+    A missing bound is left empty, without its "$":
+
+    >>> _salary_range(50000, 60000)
+    '$50000.0 - $60000.0'
+    >>> _salary_range(50000, None)
+    '$50000.0 - '
+    >>> _salary_range(None, 60000)
+    ' - $60000.0'
+    """
+    if low is None and high is None:
+        return None
+    return f"{_salary_bound(low)} - {_salary_bound(high)}"
+
+
+def _salary_bound(value: Any) -> str:
+    return '' if value is None else f"${float(value)}"
+
+
+def standardize(source: str, records: Iterable[Dict[str, Any]]) -> List[JobPosting]:
+    convert = CONVERTERS[source]
+    return [convert(record) for record in records if isinstance(record, dict)]
+
+
+def dumps_many(postings: Iterable[JobPosting]) -> str:
+    return serialization.dumps([posting.to_dict() for posting in postings])
+
+
+def loads_many(text: str) -> List[JobPosting]:
+    return [JobPosting.from_dict(data) for data in serialization.loads(text)]
@@ -0,0 +1,164 @@
+import os
+import re
+import html
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any
+
+# Field extraction for free-text postings (Hacker News "Who is hiring" comments,
+# Jooble salary strings and snippets). Patterns are compiled once at import and
+# avoid nested lazy quantifiers, so a comment is scanned in linear time.
+
+TAG_RE = re.compile(r'<[^>]+>')
+PARAGRAPH_RE = re.compile(r'<p>', re.IGNORECASE)
+SEPARATOR_RE = re.compile(r'\s*[|•–—]\s*|\s+-\s+|\s+/\s+')
+HIRING_SUFFIX_RE = re.compile(r'\s+(?:is\s+)?(?:hiring|looking)\b.*$', re.IGNORECASE)
+COMPANY_FALLBACK_RE = re.compile(r'^([^|:\n]{2,80})(?:\s*[|:]|\s+is\s+hiring)', re.IGNORECASE)
+
+# The words before the role stop at "is hiring a", "looking for an"..., so a
+# header like "Acme is hiring a product designer" gives "product designer"
+TITLE_RE = re.compile(
+    r'\b(?:(?:senior|sr\.?|junior|jr\.?|staff|principal|lead|head\s+of|founding)\s+)?'
+    r'(?:(?!(?:is|are|hiring|looking|for|a|an|the)\b)[\w+#./-]+\s+){0,3}'
+    r'(?:engineers?|developers?|designers?|managers?|directors?|leads?|architects?|'
+    r'consultants?|scientists?|specialists?|analysts?|researchers?|sre|devops)\b',
+    re.IGNORECASE,
+)
+LOCATION_RE = re.compile(
+    r'\b(?:remote|onsite|on-site|hybrid|in[- ]office|anywhere)\b|'
+    r'^[A-Z][A-Za-z.\'-]+(?:\s+[A-Z][A-Za-z.\'-]+)*,\s*[A-Z][A-Za-z]+',
+)
+# A header segment right after the title that is only capitalised words is
+# taken as a city ("London", "New York"), unless it names the kind of job
+BARE_LOCATION_RE = re.compile(r"^[A-Z][a-z.'-]+(?:\s+[A-Z][a-z.'-]+){0,2}$")
+EMPLOYMENT_RE = re.compile(
+    r'\b(?:full|part)[- ]?time\b|\b(?:contract(?:or)?|freelance|permanent|temporary|internship|equity|salary|visa)\b',
+    re.IGNORECASE,
+)
+REMOTE_RE = re.compile(r'\bremote\b', re.IGNORECASE)
+NO_REMOTE_RE = re.compile(r'\b(?:no|not)\s+remote\b|\b(?:onsite|on-site|in[- ]office)\s+only\b', re.IGNORECASE)
+VISA_RE = re.compile(r'\b(?:visas?|h-?1b|sponsor(?:ship|s)?)\b', re.IGNORECASE)
+NO_VISA_RE = re.compile(
+    r'\b(?:no|not|cannot|can\'t|can\s+not|unable\s+to|without|don\'t|do\s+not)\b[\w\s]{0,30}?\b(?:visas?|sponsor(?:ship|s)?)\b',
+    re.IGNORECASE,
+)
+
+CURRENCIES = {'$': 'USD', '£': 'GBP', '€': 'EUR', 'USD': 'USD', 'GBP': 'GBP', 'EUR': 'EUR',
+              'CAD': 'CAD', 'AUD': 'AUD', 'US$': 'USD', 'CA$': 'CAD', 'A$': 'AUD'}
+_CURRENCY = r'(?:US\$|CA\$|A\$|[$£€]|USD|GBP|EUR|CAD|AUD)'
+_AMOUNT = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+SALARY_RE = re.compile(
+    rf'(?P<cur>{_CURRENCY})?\s?(?P<low>{_AMOUNT})\s?(?P<lk>[kK]\b)?'
+    rf'(?:\s?(?:-|–|—|to)\s?{_CURRENCY}?\s?(?P<high>{_AMOUNT})\s?(?P<hk>[kK]\b)?)?'
+    rf'(?:\s?(?P<code>USD|GBP|EUR|CAD|AUD)\b)?'
+    r'(?:\s?(?:per|/|an|a)\s?(?P<period>hour|hr|year|yr|annum|month|mo|week|day)\b)?'
+)
+
+PERIODS = {'hour': 'hour', 'hr': 'hour', 'year': 'year', 'yr': 'year', 'annum': 'year',
+           'month': 'month', 'mo': 'month', 'week': 'week', 'day': 'day'}
+
+EMPTY_SALARY = {'salary_min': None, 'salary_max': None, 'salary_currency': None, 'salary_period': None}
+
+
+def clean_text(text: Optional[str]) -> str:
+    # HN comments are HTML: paragraphs become newlines, entities are decoded
+    if not text:
+        return ''
+    return html.unescape(TAG_RE.sub('', PARAGRAPH_RE.sub('\n', text))).strip()
+
+
+def _amount(value: str, thousands: Optional[str]) -> float:
+    amount = float(value.replace(',', ''))
+    return amount * 1000 if thousands else amount
+
+
+def parse_salary(text: Optional[str], require_unit: bool = True) -> Dict[str, Any]:
+    """Parse the first salary figure or range in ``text``.
+
+    With ``require_unit`` a number only counts when it carries a currency or a
+    ``k`` suffix, which keeps years and headcounts out of free text. Pass
+    ``require_unit=False`` for fields known to hold a salary, like Jooble's.
+    """
+    if not text:
+        return dict(EMPTY_SALARY)
+    for match in SALARY_RE.finditer(text):
+        currency = match.group('cur') or match.group('code')
+        if require_unit and not (currency or match.group('lk') or match.group('hk')):
+            continue
+        high_k = match.group('hk')
+        # "$120-150k": the suffix on the upper bound applies to both
+        low = _amount(match.group('low'), match.group('lk') or (high_k if match.group('high') else None))
+        high = _amount(match.group('high'), high_k) if match.group('high') else low
+        if low > high:
+            low, high = high, low
+        period = match.group('period')
+        return {
+            'salary_min': low,
+            'salary_max': high,
+            'salary_currency': CURRENCIES.get(currency.upper() if currency else '', None),
+            'salary_period': PERIODS.get(period.lower()) if period else None,
+        }
+    return dict(EMPTY_SALARY)
+
+
+def extract_fields(text: Optional[str]) -> Dict[str, Any]:
+    text = clean_text(text)
+    header = text.split('\n', 1)[0]
+    segments = [segment.strip() for segment in SEPARATOR_RE.split(header) if segment.strip()]
+
+    fields: Dict[str, Any] = {'company': None, 'title': None, 'location': None}
+    if len(segments) > 1:
+        fields['company'] = HIRING_SUFFIX_RE.sub('', segments[0]).strip() or None
+        # "Acme is hiring a designer | London": the title can sit in the company segment
+        title_index = 0 if TITLE_RE.search(segments[0]) else None
+        for index, segment in enumerate(segments[1:], 1):
+            if fields['title'] is None and TITLE_RE.search(segment):
+                fields['title'], title_index = segment, index
+            elif fields['location'] is None and not NO_REMOTE_RE.search(segment):
+                in_slot = title_index == index - 1
+                if LOCATION_RE.search(segment) or (
+                        in_slot and BARE_LOCATION_RE.match(segment) and not EMPLOYMENT_RE.search(segment)):
+                    fields['location'] = segment
+    else:
+        company_match = COMPANY_FALLBACK_RE.search(header)
+        if company_match:
+            fields['company'] = HIRING_SUFFIX_RE.sub('', company_match.group(1)).strip() or None
+
+    if fields['title'] is None:
+        title_match = TITLE_RE.search(text)
+        if title_match:
+            fields['title'] = title_match.group(0).strip()
+
+    remote = bool(REMOTE_RE.search(text)) and not NO_REMOTE_RE.search(text)
+    if fields['location'] is None and remote:
+        fields['location'] = 'Remote'
+    fields['remote'] = remote
+
+    if NO_VISA_RE.search(text):
+        fields['visa'] = False
+    elif VISA_RE.search(text):
+        fields['visa'] = True
+    else:
+        fields['visa'] = None
+
+    # The header line usually carries the range; fall back to the body
+    fields.update(parse_salary(header))
+    if fields['salary_min'] is None:
+        fields.update(parse_salary(text))
+    return fields
+
+
+def _extract_chunk(texts: List[Optional[str]]) -> List[Dict[str, Any]]:
+    return [extract_fields(text) for text in texts]
+
+
+def extract_batch(texts: List[Optional[str]], workers: Optional[int] = None, chunk_size: int = 256) -> List[Dict[str, Any]]:
+    """Run ``extract_fields`` over ``texts``, in a process pool once there is more than one chunk."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(texts) <= chunk_size:
+        return _extract_chunk(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        for chunk_result in executor.map(_extract_chunk, chunks):
+            results.extend(chunk_result)
+    return results
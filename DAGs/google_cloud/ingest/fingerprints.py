@@ -0,0 +1,118 @@
+import json
+import array
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+import backends
+
+# Change detection for ingest. Each posting is reduced to two 64-bit hashes:
+# one of its identity (the API's id, else its URL) and one of its normalized
+# content. The index maps identity -> content per source and lives in the
+# bucket next to the data, so it costs 16 bytes per posting ever seen and is
+# shared by every ingest instance. Postings whose content hash is unchanged are
+# not forwarded; the index is only updated once a run was published, so a
+# failed publish is retried in full next time. The index is re-read before each
+# diff and each commit, so overlapping runs at worst forward a posting twice.
+
+INDEX_PREFIX = 'state/fingerprints'
+
+# Fields that change between identical crawls: Adzuna's per-request ad token
+# and the tracking parameters on its redirect URL
+VOLATILE_FIELDS = {
+    'adzuna': {'adref', '__CLASS__'},
+    'jooble': set(),
+    'muse': set(),
+}
+URL_FIELDS = {'redirect_url'}
+ID_FIELDS = ('id',)
+URL_ID_FIELDS = ('redirect_url', 'link', 'url')
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def normalize(source: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    volatile = VOLATILE_FIELDS.get(source, set())
+    normalized = {}
+    for key, value in record.items():
+        if key in volatile:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if key in URL_FIELDS:
+                value = value.split('?', 1)[0]
+        normalized[key] = value
+    return normalized
+
+
+def fingerprint(source: str, record: Dict[str, Any]) -> int:
+    # Key order must not matter, so this always uses the stdlib encoder with sort_keys
+    canonical = json.dumps(normalize(source, record), sort_keys=True, ensure_ascii=False,
+                           separators=(',', ':'), default=str)
+    return _hash64(canonical.encode('utf-8'))
+
+
+def posting_key(source: str, record: Dict[str, Any], content: int) -> int:
+    for field in ID_FIELDS + URL_ID_FIELDS:
+        value = record.get(field)
+        if value not in (None, ''):
+            if field in URL_FIELDS:
+                value = str(value).split('?', 1)[0]
+            return _hash64(f"{source}:{field}:{value}".encode('utf-8'))
+    # Without an id the content is the identity, so a change shows up as new
+    return content
+
+
+class FingerprintIndex:
+    def __init__(self, bucket_name: str, source: str):
+        self.bucket_name = bucket_name
+        self.source = source
+        self.name = f"{INDEX_PREFIX}/{source}.bin"
+
+    def _load(self) -> Dict[int, int]:
+        payload = backends.get_storage().download_bytes(self.bucket_name, self.name)
+        pairs = array.array('Q')
+        if payload:
+            pairs.frombytes(payload)
+        return dict(zip(pairs[0::2], pairs[1::2]))
+
+    def diff(self, records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[int, int], Dict[str, int]]:
+        """Split ``records`` into the new or changed ones; return them, the pending
+        index updates for ``commit`` and new/changed/unchanged/duplicate counts.
+
+        "unchanged" only counts matches against the stored index; a posting
+        repeated within ``records`` is counted once and then as "duplicate".
+        """
+        entries = self._load()
+        forward, updates, seen = [], {}, {}
+        stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'duplicate': 0}
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            content = fingerprint(self.source, record)
+            key = posting_key(self.source, record, content)
+            if seen.get(key) == content:
+                stats['duplicate'] += 1
+                continue
+            seen[key] = content
+            previous = updates.get(key, entries.get(key))
+            if previous == content:
+                stats['unchanged'] += 1
+                continue
+            stats['new' if previous is None else 'changed'] += 1
+            updates[key] = content
+            forward.append(record)
+        return forward, updates, stats
+
+    def commit(self, updates: Dict[int, int]):
+        if not updates:
+            return
+        entries = self._load()
+        entries.update(updates)
+        pairs = array.array('Q')
+        for key, content in entries.items():
+            pairs.append(key)
+            pairs.append(content)
+        backends.get_storage().upload(self.bucket_name, self.name, pairs.tobytes(),
+                                      content_type="application/octet-stream")
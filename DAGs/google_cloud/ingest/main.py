@@ -1,12 +1,13 @@
 import os
-import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 import flask
-from google.cloud import storage
-from google.cloud import pubsub_v1
-from muse_api import MuseConnector
-from adzuna_api import AdzunaConnector
-from jooble_api import JoobleConnector
+import backends
+import fingerprints
+import object_names
+import serialization
+from resilience import CircuitBreaker, Deadline, RateLimiter
+from metrics import MetricsRegistry
 
 muse_api_key = os.environ.get('MUSE_API_KEY')
 adzuna_api_id = os.environ.get('ADZUNA_APP_ID')
@@ -15,40 +16,72 @@ jooble_api_key = os.environ.get('JOOBLE_API_KEY')
 PROJECT_ID = os.environ.get('PROJECT_ID')
 BUCKET_NAME = f"job-data-{PROJECT_ID}"
 JOBS_TOPIC = 'jobs-data-topic'
+RAW_FORMAT = os.environ.get('RAW_FORMAT', 'json')    # json | ndjson (read natively by TRANSFORM_ENGINE=arrow)
+CHANGE_DETECTION = os.environ.get('CHANGE_DETECTION', '1') == '1'
+# One run must finish well inside the Cloud Run request timeout, publishing included
+FETCH_DEADLINE_SECONDS = float(os.environ.get('FETCH_DEADLINE_SECONDS', 240))
+REQUEST_TIMEOUT_SECONDS = float(os.environ.get('REQUEST_TIMEOUT_SECONDS', 15))
+BREAKER_FAILURES = int(os.environ.get('BREAKER_FAILURES', 3))
+BREAKER_RESET_SECONDS = float(os.environ.get('BREAKER_RESET_SECONDS', 300))
+# Adzuna is crawled as countries x keywords shards on a shared pool; each country
+# is rate limited on its own and published as its own partition
+ADZUNA_COUNTRIES = [c.strip().lower() for c in os.environ.get('ADZUNA_COUNTRIES', 'us').split(',') if c.strip()]
+ADZUNA_KEYWORDS = ["software", "data", "devops", "engineer", "IT", "developer", "designer", "manager"]
+ADZUNA_WORKERS = int(os.environ.get('ADZUNA_WORKERS', 4))
+ADZUNA_COUNTRY_RPS = float(os.environ.get('ADZUNA_COUNTRY_RPS', 2))
+METRICS = MetricsRegistry(prefix="job_ingest")
+SOURCES = ("adzuna", "jooble", "muse")
+# Keyed by (source, country), so one failing Adzuna country does not stop the
+# others; sources crawled as a whole have country None
+BREAKERS = {(source, country): CircuitBreaker(f"{source}/{country}" if country else source,
+                                              BREAKER_FAILURES, BREAKER_RESET_SECONDS)
+            for source in SOURCES for country in (ADZUNA_COUNTRIES if source == "adzuna" else [None])}
+# Shared by overlapping runs, so two /fetch requests never double a country's rate
+RATE_LIMITERS = {country: RateLimiter(ADZUNA_COUNTRY_RPS) for country in ADZUNA_COUNTRIES}
 
 app = flask.Flask(__name__)
 
 def upload_to_gcs(data, filename):
+    # Returns the object's generation, or None if the upload failed
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.get_bucket(BUCKET_NAME)
-        blob = bucket.blob(filename)
-        blob.upload_from_string(json.dumps(data, indent=2), content_type="application/json")
+        if filename.endswith('.ndjson'):
+            payload = serialization.dumps_lines(data)
+            content_type = "application/x-ndjson"
+        else:
+            payload = serialization.dumps_bytes(data)
+            content_type = "application/json"
+        generation = backends.get_storage().upload(BUCKET_NAME, filename, payload, content_type=content_type)
+        METRICS.annotate(bytes_out=len(payload), records=len(data))
         print(f"File {filename} uploaded to {BUCKET_NAME}")
-        return True
+        return generation
     except Exception as e:
         print(f"Error uploading to GCS: {str(e)}")
-        return False
+        return None
+
+def publish_to_pubsub(api_name, data, timestamp, run_id, shard=None):
+    filename = object_names.raw_name(api_name, run_id, RAW_FORMAT, shard)
 
-def publish_to_pubsub(api_name, data, timestamp):
-    filename = f"{api_name}_jobs.json"
+    with METRICS.span("gcs_upload", source=api_name):
+        generation = upload_to_gcs(data, filename)
 
-    if upload_to_gcs(data, filename):
+    if generation is not None:
         message_data = {
             "api_source": api_name,
             "filename": filename,
+            "generation": generation,
+            "run_id": run_id,
+            "shard": shard,
             "record_count": len(data),
             "timestamp": timestamp,
             "bucket": BUCKET_NAME
         }
 
         try:
-            publisher = pubsub_v1.PublisherClient()
-            topic_path = publisher.topic_path(PROJECT_ID, JOBS_TOPIC)
-            data_bytes = json.dumps(message_data).encode("utf-8")
+            data_bytes = serialization.dumps_bytes(message_data)
 
-            future = publisher.publish(topic_path, data_bytes)
-            message_id = future.result()
+            with METRICS.span("pubsub_publish", source=api_name) as span:
+                message_id = backends.get_queue().publish(PROJECT_ID, JOBS_TOPIC, data_bytes)
+                span["bytes_out"] = len(data_bytes)
             print(f"Published message {message_id} for {api_name} job data")
             print(f"Message data for {api_name}: {message_data}")
             return True
@@ -60,23 +93,118 @@ def publish_to_pubsub(api_name, data, timestamp):
         print(f"Failed to upload {api_name} data to GCS")
         return False
 
-def collect_jobs():
+def publish_changes(api_name, data, timestamp, run_id, full_refresh=False, shard=None):
+    # Forwards only postings that are new or changed since the last published run
+    # (fingerprints.py); returns whether it succeeded and the new/changed/unchanged/duplicate counts
+    if not CHANGE_DETECTION:
+        return publish_to_pubsub(api_name, data, timestamp, run_id, shard), None
+
+    index = fingerprints.FingerprintIndex(BUCKET_NAME, api_name)
+    with METRICS.span("change_detection", source=api_name) as span:
+        changed, updates, stats = index.diff(data)
+        span["records"] = len(data)
+    for outcome, count in stats.items():
+        METRICS.inc("postings_total", count, source=api_name, outcome=outcome)
+    print(f"{api_name}: {stats['new']} new, {stats['changed']} changed, {stats['unchanged']} unchanged, "
+          f"{stats['duplicate']} duplicate postings")
+
+    forward = data if full_refresh else changed
+    if not forward:
+        print(f"No new or changed {api_name} postings, nothing to publish")
+        return True, stats
+    if not publish_to_pubsub(api_name, forward, timestamp, run_id, shard):
+        return False, stats
+    try:
+        index.commit(updates)
+    except Exception as e:
+        print(f"Error saving {api_name} fingerprints: {str(e)}")
+    return True, stats
+
+def preload():
+    # Called from gunicorn.conf.py in the master, before the port is bound
+    import muse_api, adzuna_api, jooble_api  # noqa: F401
+    backends.preload('storage', 'queue')
+
+def warm_up():
+    # Called from gunicorn.conf.py in each worker; clients must not cross a fork
+    try:
+        backends.get_storage()
+        backends.get_queue()
+    except Exception as e:
+        print(f"Warm-up failed, clients will be created on first use: {str(e)}")
+
+def guards(source, run_deadline):
+    # Each source gets an equal share of the time left, so one that stops early
+    # leaves more for the ones after it; Adzuna's countries share one deadline
+    sources_left = len(SOURCES) - SOURCES.index(source)
+    return {
+        "timeout": REQUEST_TIMEOUT_SECONDS,
+        "deadline": run_deadline.share(sources_left),
+    }
+
+def record_stop(source, connector, jobs, results):
+    # A source stopped by its breaker or deadline still publishes what it fetched
+    if connector.stopped:
+        results["partial"][source] = connector.stopped
+        METRICS.inc("source_stopped_total", source=source, reason=connector.stopped)
+        if not jobs:
+            raise Exception(f"{source} stopped ({connector.stopped}) before fetching any jobs")
+
+def extract_adzuna(run_deadline):
+    # Returns the per-country connectors and their jobs, in country and keyword order
+    from adzuna_api import AdzunaConnector
+
+    shared = guards("adzuna", run_deadline)
+    connectors = {
+        country: AdzunaConnector(adzuna_api_id, adzuna_api_key, country=country, metrics=METRICS,
+                                 breaker=BREAKERS[("adzuna", country)], rate_limiter=RATE_LIMITERS[country], **shared)
+        for country in ADZUNA_COUNTRIES
+    }
+    shards = [(country, keyword) for country in ADZUNA_COUNTRIES for keyword in ADZUNA_KEYWORDS]
+    with ThreadPoolExecutor(max_workers=ADZUNA_WORKERS, thread_name_prefix='adzuna') as executor:
+        shard_jobs = list(executor.map(lambda shard: connectors[shard[0]].extract_keyword(shard[1]), shards))
+    # The shards ran on pool threads, outside the caller's span
+    METRICS.annotate(bytes_in=sum(connector.bytes_in for connector in connectors.values()))
+
+    jobs = {country: [] for country in ADZUNA_COUNTRIES}
+    for (country, _), found in zip(shards, shard_jobs):
+        jobs[country].extend(found)
+    return connectors, jobs
+
+def collect_jobs(full_refresh=False):
+    # Connectors are imported here so health checks and /metrics never load them
+    from muse_api import MuseConnector
+    from jooble_api import JoobleConnector
+
     timestamp = datetime.datetime.now().isoformat()
+    run_id = object_names.new_run_id()
+    run_deadline = Deadline(FETCH_DEADLINE_SECONDS)
     results = {
+        "run_id": run_id,
+        "changes": {},
+        "partial": {},
         "success": 0,
-        "total": 3,
+        "total": len(ADZUNA_COUNTRIES) + 2,
         "apis_processed": []
     }
     
-    # Adzuna API
+    # Adzuna API, one partition per country
     try: 
         if adzuna_api_id and adzuna_api_key:
-            adzuna = AdzunaConnector(adzuna_api_id, adzuna_api_key)
-            keywords = ["software", "data", "devops", "engineer", "IT", "developer", "designer", "manager"]
-            adzuna_jobs = adzuna.extract_jobs(keywords=keywords)
-            if publish_to_pubsub("adzuna", adzuna_jobs, timestamp):
-                results["success"] += 1
-                results["apis_processed"].append("adzuna")
+            with METRICS.span("extract", source="adzuna") as span:
+                connectors, adzuna_jobs = extract_adzuna(run_deadline)
+                span["records"] = sum(len(jobs) for jobs in adzuna_jobs.values())
+            for country, jobs in adzuna_jobs.items():
+                partition = f"adzuna/{country}"
+                try:
+                    record_stop(partition, connectors[country], jobs, results)
+                    published, changes = publish_changes("adzuna", jobs, timestamp, run_id, full_refresh, shard=country)
+                    results["changes"][partition] = changes
+                    if published:
+                        results["success"] += 1
+                        results["apis_processed"].append(partition)
+                except Exception as e:
+                    print(f"Error collecting Adzuna jobs for {country}: {str(e)}")
         else:
             print("Missing Adzuna API credentials")
     except Exception as e:
@@ -85,13 +213,19 @@ def collect_jobs():
     # Jooble API
     try:
         if jooble_api_key:
-            jooble = JoobleConnector(jooble_api_key)
-            jooble_jobs = jooble.extract_jobs(
-                keywords=["engineer", "designer"], 
-                locations=["remote"], 
-                limit=100
-            )
-            if publish_to_pubsub("jooble", jooble_jobs, timestamp):
+            jooble = JoobleConnector(jooble_api_key, metrics=METRICS, breaker=BREAKERS[("jooble", None)],
+                                     **guards("jooble", run_deadline))
+            with METRICS.span("extract", source="jooble") as span:
+                jooble_jobs = jooble.extract_jobs(
+                    keywords=["engineer", "designer"], 
+                    locations=["remote"], 
+                    limit=100
+                )
+                span["records"] = len(jooble_jobs)
+            record_stop("jooble", jooble, jooble_jobs, results)
+            published, changes = publish_changes("jooble", jooble_jobs, timestamp, run_id, full_refresh)
+            results["changes"]["jooble"] = changes
+            if published:
                 results["success"] += 1
                 results["apis_processed"].append("jooble")
         else:
@@ -102,10 +236,16 @@ def collect_jobs():
     # Muse API
     try:
         if muse_api_key:
-            muse = MuseConnector(muse_api_key)
+            muse = MuseConnector(muse_api_key, metrics=METRICS, breaker=BREAKERS[("muse", None)],
+                                 **guards("muse", run_deadline))
             categories = ["ux", "design", "management"]
-            muse_jobs = muse.extract_jobs(categories=categories)
-            if publish_to_pubsub("muse", muse_jobs, timestamp):
+            with METRICS.span("extract", source="muse") as span:
+                muse_jobs = muse.extract_jobs(categories=categories)
+                span["records"] = len(muse_jobs)
+            record_stop("muse", muse, muse_jobs, results)
+            published, changes = publish_changes("muse", muse_jobs, timestamp, run_id, full_refresh)
+            results["changes"]["muse"] = changes
+            if published:
                 results["success"] += 1
                 results["apis_processed"].append("muse")
         else:
@@ -119,10 +259,17 @@ def collect_jobs():
 def home():
     return {'status': 'Job fetch service is running'}, 200
 
+@app.route('/metrics', methods=['GET'])
+def metrics_handler():
+    return METRICS.to_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 @app.route('/fetch', methods=['POST'])
 def fetch_handler():
     try:
-        results = collect_jobs()
+        # ?full_refresh=1 republishes every posting, changed or not
+        full_refresh = flask.request.args.get('full_refresh') == '1'
+        with METRICS.span("collect"):
+            results = collect_jobs(full_refresh)
         return {
             'status': 'success',
             'message': f"Job collection completed. Successfully published {results['success']} out of {results['total']} APIs.",
@@ -143,7 +290,8 @@ def pubsub_handler():
             return "No Pub/Sub message received", 400
         if not isinstance(envelope, dict) or 'message' not in envelope:
             return "Invalid Pub/Sub message format", 400
-        results = collect_jobs()
+        with METRICS.span("collect"):
+            results = collect_jobs()
         return {
             'status': 'success',
             'message': f"Job collection completed. Successfully published {results['success']} out of {results['total']} APIs.",
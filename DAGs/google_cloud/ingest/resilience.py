@@ -0,0 +1,88 @@
+import time
+import threading
+from typing import Optional
+
+# Guards for collect_jobs so one slow or failing provider cannot use up the
+# whole /fetch request. The connectors take a CircuitBreaker and a Deadline and
+# stop crawling, keeping what they have, when either says so. RateLimiter keeps
+# concurrent shards of one provider under its request rate.
+
+
+class Deadline:
+    def __init__(self, seconds: float, parent: Optional["Deadline"] = None):
+        expires_at = time.monotonic() + seconds
+        self.expires_at = min(expires_at, parent.expires_at) if parent is not None else expires_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def child(self, seconds: float) -> "Deadline":
+        # Never outlives its parent
+        return Deadline(seconds, parent=self)
+
+    def share(self, parts: int) -> "Deadline":
+        # An equal share of what is left; time one part leaves unused goes to the next
+        return self.child(self.remaining() / max(parts, 1))
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failed requests.
+
+    While open, ``allow`` refuses calls for ``reset_timeout`` seconds; after that
+    calls go through again (half-open), and the next result closes the breaker
+    or opens it for another ``reset_timeout``. Breakers live at module level in
+    ingest, so the state carries over between runs of the same instance.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"Circuit breaker for {self.name} opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart, across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
@@ -0,0 +1,133 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+import serialization
+from backends import STANDARDIZED_SCHEMA, is_array
+
+# TRANSFORM_ENGINE=arrow: raw records go straight into a pyarrow Table, the
+# field mapping of main.FIELD_MAPPINGS runs as Arrow compute kernels, and the
+# result is written as Parquet and loaded into BigQuery without pandas.
+
+NUMERIC_FIELDS = {'salary_min', 'salary_max'}
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+
+def _top_level_fields(mapping):
+    return [path for path in mapping.values() if path and '.' not in path and '[' not in path]
+
+
+def read_records(content: bytes, ndjson: bool, mapping) -> pa.Table:
+    if ndjson:
+        # Mapped fields are typed up front, otherwise pyarrow.json turns ISO
+        # dates into timestamps; nested fields are inferred as structs/lists
+        schema = pa.schema([(name, pa.float64() if name in NUMERIC_FIELDS else pa.string())
+                            for name in dict.fromkeys(_top_level_fields(mapping))])
+        options = pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior='infer')
+        return pa_json.read_json(pa.BufferReader(content), parse_options=options)
+    data = serialization.loads(content)
+    return pa.Table.from_pylist(data if isinstance(data, list) else [data])
+
+
+def _list_element(values, index: int):
+    # pc.list_element raises on lists shorter than index, so take from the
+    # flattened values instead and leave short or null lists null
+    chunks = []
+    for chunk in values.chunks:
+        lengths = pc.list_value_length(chunk)
+        positions = pc.if_else(pc.greater(lengths, index), pc.add(chunk.offsets[:-1], index),
+                               pa.scalar(None, pa.int32()))
+        chunks.append(pc.take(chunk.values, positions))
+    return pa.chunked_array(chunks, type=values.type.value_type)
+
+
+def column(table: pa.Table, path: str):
+    # Resolves the FIELD_MAPPINGS paths: "title", "company.name", "categories[0].name"
+    if not path:
+        return None
+    head, *fields = path.split('.')
+    name, _, index = head.partition('[')
+    if name not in table.column_names:
+        return None
+    values = table.column(name)
+    if index:
+        if not pa.types.is_list(values.type):
+            return None
+        values = _list_element(values, int(index.rstrip(']')))
+    for field in fields:
+        if not pa.types.is_struct(values.type) or values.type.get_field_index(field) < 0:
+            return None
+        values = pc.struct_field(values, field)
+    return values
+
+
+def _as_string(values, num_rows: int):
+    if values is None or pa.types.is_null(values.type):
+        return pa.nulls(num_rows, pa.string())
+    return values if pa.types.is_string(values.type) else pc.cast(values, pa.string())
+
+
+def _salary_range(low, high):
+    # Same "$min - $max" string as standardize_jobs: '' for a missing bound,
+    # and whole numbers keep their ".0" like Python floats do
+    parts = []
+    for values in (low, high):
+        text = pc.cast(pc.cast(values, pa.float64()), pa.string())
+        text = pc.if_else(pc.match_substring_regex(text, r'^-?[0-9]+$'),
+                          pc.binary_join_element_wise(text, '.0', ''), text)
+        parts.append(pc.fill_null(pc.binary_join_element_wise('$', text, ''), ''))
+    salary = pc.binary_join_element_wise(parts[0], parts[1], ' - ')
+    return pc.replace_substring(salary, '$ - $', '')
+
+
+def empty_column(field_type: str, num_rows: int):
+    # Nulls for STRING columns; empty lists for ARRAY<STRING>, which BigQuery loads as REPEATED
+    if is_array(field_type):
+        return pa.ListArray.from_arrays(pa.array([0] * (num_rows + 1), pa.int32()), pa.array([], pa.string()))
+    return pa.nulls(num_rows, pa.string())
+
+
+def standardize_table(table: pa.Table, api_source: str, mapping) -> pa.Table:
+    num_rows = table.num_rows
+    columns = {}
+    for new_col, original_col in mapping.items():
+        if new_col not in NUMERIC_FIELDS:
+            columns[new_col] = _as_string(column(table, original_col), num_rows)
+
+    if api_source == 'adzuna' and 'salary_min' in mapping and 'salary_max' in mapping:
+        low, high = column(table, mapping['salary_min']), column(table, mapping['salary_max'])
+        if low is not None and high is not None:
+            columns['salary'] = _salary_range(low, high)
+
+    columns['source'] = pa.repeat(pa.scalar(api_source, pa.string()), num_rows)
+    return pa.table({name: columns.get(name, empty_column(field_type, num_rows))
+                     for name, field_type in STANDARDIZED_SCHEMA})
+
+
+def _to_float(matches):
+    # Like pd.to_numeric(errors='coerce'): a match that isn't a number becomes null
+    text = pc.struct_field(matches, 'value')
+    valid = pc.match_substring_regex(text, r'^([0-9]+\.?[0-9]*|\.[0-9]+)$')
+    return pc.cast(pc.if_else(valid, text, pa.scalar(None, pa.string())), pa.float64())
+
+
+def parse_salary(salary):
+    # The first number of each salary string, and the low and high of "low - high"
+    salary = pc.replace_substring(pc.fill_null(salary, ''), '$', '')
+    first = _to_float(pc.extract_regex(salary, r'(?P<value>[0-9.]+)'))
+    low = _to_float(pc.extract_regex(salary, r'^(?P<value>[0-9.]+)'))
+    high = _to_float(pc.extract_regex(salary, r'- (?P<value>[0-9.]+)$'))
+    return first, low, high
+
+
+def add_salary_columns(table: pa.Table) -> pa.Table:
+    # Arrow version of rollups.add_salary_columns
+    first, low, high = parse_salary(table.column('salary'))
+    midpoint = pc.divide(pc.add(low, high), 2.0)
+    return table.append_column('salary_first', first).append_column('salary_midpoint', midpoint)
+
+
+def to_parquet(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression='snappy')
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,416 @@
+import os
+import time
+import uuid
+import queue
+import json
+import base64
+import sqlite3
+import datetime
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Backend selection. Defaults match the deployed services; the local backends let
+# the whole ingest -> Pub/Sub -> transform -> BigQuery path run on one machine.
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'gcs')            # gcs | local
+QUEUE_BACKEND = os.environ.get('QUEUE_BACKEND', 'pubsub')              # pubsub | local
+WAREHOUSE_BACKEND = os.environ.get('WAREHOUSE_BACKEND', 'bigquery')    # bigquery | sqlite
+LOCAL_BACKEND_DIR = os.environ.get('LOCAL_BACKEND_DIR', '/tmp/job-data-local')
+
+# (column name, BigQuery type) of the standardized jobs table
+STANDARDIZED_SCHEMA: List[Tuple[str, str]] = [
+    ("job_title", "STRING"),
+    ("job_description", "STRING"),
+    ("job_url", "STRING"),
+    ("posted_date", "STRING"),
+    ("job_category", "STRING"),
+    ("job_type", "STRING"),
+    ("company_name", "STRING"),
+    ("salary", "STRING"),
+    ("source", "STRING"),
+    ("skills", "ARRAY<STRING>"),
+]
+
+
+def is_array(field_type: str) -> bool:
+    return field_type.startswith("ARRAY<")
+
+
+# Storage
+#
+# upload() returns the object's generation, and the downloads take an optional
+# generation so a late message reads the exact object it was published for.
+class GCSStorage:
+    def __init__(self):
+        from google.cloud import storage
+        self.client = storage.Client()
+
+    def upload(self, bucket_name: str, name: str, data, content_type: str = "application/json") -> int:
+        bucket = self.client.bucket(bucket_name)
+        blob = bucket.blob(name)
+        blob.upload_from_string(data, content_type=content_type)
+        return blob.generation
+
+    def exists(self, bucket_name: str, name: str) -> bool:
+        return self.client.bucket(bucket_name).blob(name).exists()
+
+    def download_text(self, bucket_name: str, name: str, generation: Optional[int] = None) -> Optional[str]:
+        blob = self.client.bucket(bucket_name).blob(name, generation=generation)
+        if not blob.exists():
+            return None
+        return blob.download_as_text()
+
+    def download_bytes(self, bucket_name: str, name: str, generation: Optional[int] = None) -> Optional[bytes]:
+        blob = self.client.bucket(bucket_name).blob(name, generation=generation)
+        if not blob.exists():
+            return None
+        return blob.download_as_bytes()
+
+    def list_names(self, bucket_name: str, prefix: str) -> List[str]:
+        return [blob.name for blob in self.client.list_blobs(bucket_name, prefix=prefix)]
+
+    def delete(self, bucket_name: str, name: str):
+        from google.api_core.exceptions import NotFound
+        try:
+            self.client.bucket(bucket_name).blob(name).delete()
+        except NotFound:
+            pass
+
+
+class LocalStorage:
+    # The generation of a local object is its mtime in nanoseconds
+    def __init__(self, root: str = LOCAL_BACKEND_DIR):
+        self.root = os.path.join(root, 'storage')
+
+    def _path(self, bucket_name: str, name: str) -> str:
+        return os.path.join(self.root, bucket_name, name)
+
+    def _current(self, path: str, generation: Optional[int]) -> bool:
+        if not os.path.exists(path):
+            return False
+        return generation is None or os.stat(path).st_mtime_ns == int(generation)
+
+    def upload(self, bucket_name: str, name: str, data, content_type: str = "application/json") -> int:
+        path = self._path(bucket_name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+        now = time.time_ns()
+        os.utime(tmp_path, ns=(now, now))
+        os.replace(tmp_path, path)
+        return os.stat(path).st_mtime_ns
+
+    def exists(self, bucket_name: str, name: str) -> bool:
+        return os.path.exists(self._path(bucket_name, name))
+
+    def download_text(self, bucket_name: str, name: str, generation: Optional[int] = None) -> Optional[str]:
+        path = self._path(bucket_name, name)
+        if not self._current(path, generation):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def download_bytes(self, bucket_name: str, name: str, generation: Optional[int] = None) -> Optional[bytes]:
+        path = self._path(bucket_name, name)
+        if not self._current(path, generation):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def list_names(self, bucket_name: str, prefix: str) -> List[str]:
+        bucket_dir = os.path.join(self.root, bucket_name)
+        # Only walk the deepest directory the prefix names, like a GCS prefix listing
+        start = os.path.join(bucket_dir, os.path.dirname(prefix))
+        names = []
+        for dirpath, _, filenames in os.walk(start):
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(dirpath, filename), bucket_dir).replace(os.sep, '/')
+                if name.startswith(prefix) and not filename.endswith('.tmp'):
+                    names.append(name)
+        return sorted(names)
+
+    def delete(self, bucket_name: str, name: str):
+        try:
+            os.remove(self._path(bucket_name, name))
+        except FileNotFoundError:
+            pass
+
+
+# Queue
+class PubSubQueue:
+    def __init__(self):
+        from google.cloud import pubsub_v1
+        self.publisher = pubsub_v1.PublisherClient()
+
+    def publish(self, project_id: str, topic: str, data: bytes, **attributes) -> str:
+        topic_path = self.publisher.topic_path(project_id, topic)
+        future = self.publisher.publish(topic_path, data, **attributes)
+        return future.result()
+
+
+class LocalQueue:
+    """In-process stand-in for Pub/Sub with one delivery thread per subscription.
+
+    Messages are delivered as push-style dicts (``data`` base64 encoded,
+    ``messageId``, ``publishTime``, ``attributes``). A subscriber that raises is
+    redelivered up to ``max_deliveries`` times, like a push endpoint returning 500.
+    """
+
+    def __init__(self, max_deliveries: int = 5):
+        self.max_deliveries = max_deliveries
+        self._topics: Dict[str, List["queue.Queue"]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback: Callable[[Dict[str, Any]], Any]) -> "queue.Queue":
+        inbox: "queue.Queue" = queue.Queue()
+
+        def deliver():
+            while True:
+                message = inbox.get()
+                try:
+                    if message is None:
+                        return
+                    for attempt in range(self.max_deliveries):
+                        try:
+                            message['deliveryAttempt'] = attempt + 1
+                            callback(message)
+                            break
+                        except Exception as e:
+                            print(f"Local subscriber for {topic} failed (attempt {attempt + 1}): {str(e)}")
+                finally:
+                    inbox.task_done()
+
+        threading.Thread(target=deliver, daemon=True).start()
+        with self._lock:
+            self._topics.setdefault(topic, []).append(inbox)
+        return inbox
+
+    def publish(self, project_id: str, topic: str, data: bytes, **attributes) -> str:
+        message_id = uuid.uuid4().hex
+        with self._lock:
+            inboxes = list(self._topics.get(topic, []))
+        for inbox in inboxes:
+            inbox.put({
+                'data': base64.b64encode(data).decode('ascii'),
+                'messageId': message_id,
+                'publishTime': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'attributes': attributes,
+                'published_at': time.time(),
+            })
+        return message_id
+
+    def join(self):
+        with self._lock:
+            inboxes = [inbox for inboxes in self._topics.values() for inbox in inboxes]
+        for inbox in inboxes:
+            inbox.join()
+
+
+# Warehouse
+class BigQueryWarehouse:
+    dialect = "bigquery"
+
+    def __init__(self):
+        from google.cloud import bigquery
+        self.bigquery = bigquery
+        self.client = bigquery.Client()
+
+    def table_ref(self, dataset_id: str, table_id: str) -> str:
+        return f"{self.client.project}.{dataset_id}.{table_id}"
+
+    def sql_table(self, dataset_id: str, table_id: str) -> str:
+        return f"`{self.table_ref(dataset_id, table_id)}`"
+
+    def _schema(self, schema):
+        # ARRAY<T> columns are REPEATED fields of type T
+        return [self.bigquery.SchemaField(name, field_type[6:-1], mode="REPEATED") if is_array(field_type)
+                else self.bigquery.SchemaField(name, field_type) for name, field_type in schema]
+
+    def load_dataframe(self, df, dataset_id: str, table_id: str, schema=STANDARDIZED_SCHEMA,
+                       truncate: bool = False) -> str:
+        table_ref = self.table_ref(dataset_id, table_id)
+        disposition = self.bigquery.WriteDisposition
+        job_config = self.bigquery.LoadJobConfig(
+            write_disposition=disposition.WRITE_TRUNCATE if truncate else disposition.WRITE_APPEND,
+            schema=self._schema(schema)
+        )
+        job = self.client.load_table_from_dataframe(df, table_ref, job_config=job_config)
+        job.result()
+        return table_ref
+
+    def load_arrow(self, table, dataset_id: str, table_id: str, schema=STANDARDIZED_SCHEMA,
+                   truncate: bool = False) -> str:
+        # Parquet straight from the Arrow buffers, no DataFrame round trip
+        import io
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table_ref = self.table_ref(dataset_id, table_id)
+        disposition = self.bigquery.WriteDisposition
+        job_config = self.bigquery.LoadJobConfig(
+            source_format=self.bigquery.SourceFormat.PARQUET,
+            write_disposition=disposition.WRITE_TRUNCATE if truncate else disposition.WRITE_APPEND,
+            schema=self._schema(schema)
+        )
+        parquet_options = self.bigquery.ParquetOptions()
+        parquet_options.enable_list_inference = True
+        job_config.parquet_options = parquet_options
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink)
+        job = self.client.load_table_from_file(io.BytesIO(sink.getvalue()), table_ref, job_config=job_config)
+        job.result()
+        return table_ref
+
+    def ensure_table(self, dataset_id: str, table_id: str, schema=STANDARDIZED_SCHEMA):
+        table = self.bigquery.Table(self.table_ref(dataset_id, table_id), schema=self._schema(schema))
+        table = self.client.create_table(table, exists_ok=True)
+        # Tables created before a column was added to the schema get it appended
+        existing = {field.name for field in table.schema}
+        missing = [field for field in self._schema(schema) if field.name not in existing]
+        if missing:
+            table.schema = list(table.schema) + missing
+            self.client.update_table(table, ["schema"])
+
+    def drop_table(self, dataset_id: str, table_id: str):
+        self.client.delete_table(self.table_ref(dataset_id, table_id), not_found_ok=True)
+
+    def execute_script(self, sql: str, dataset_id: str = 'job_data'):
+        self.client.query(sql).result()
+
+    def query(self, sql: str):
+        return list(self.client.query(sql).result())
+
+
+class SQLiteWarehouse:
+    dialect = "sqlite"
+    SQLITE_TYPES = {"STRING": "TEXT", "INT64": "INTEGER", "INTEGER": "INTEGER", "FLOAT64": "REAL",
+                    "FLOAT": "REAL", "NUMERIC": "REAL", "BOOL": "INTEGER", "BOOLEAN": "INTEGER"}
+
+    def __init__(self, root: str = LOCAL_BACKEND_DIR):
+        self.root = os.path.join(root, 'warehouse')
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def connect(self, dataset_id: str) -> sqlite3.Connection:
+        return sqlite3.connect(os.path.join(self.root, f"{dataset_id}.sqlite"), timeout=30)
+
+    def table_ref(self, dataset_id: str, table_id: str) -> str:
+        return f"sqlite:{dataset_id}.{table_id}"
+
+    def sql_table(self, dataset_id: str, table_id: str) -> str:
+        return f'"{table_id}"'
+
+    @staticmethod
+    def _array_value(value):
+        # SQLite has no arrays; ARRAY<...> columns are stored as JSON text
+        return None if value is None else json.dumps([str(item) for item in value])
+
+    def _add_missing_columns(self, conn: sqlite3.Connection, table_id: str, schema):
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table_id}")')}
+        for name, field_type in schema:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE "{table_id}" ADD COLUMN "{name}" {self.SQLITE_TYPES.get(field_type, "TEXT")}')
+
+    def _create_sql(self, table_id: str, schema) -> str:
+        column_defs = ", ".join(f'"{name}" {self.SQLITE_TYPES.get(field_type, "TEXT")}' for name, field_type in schema)
+        return f'CREATE TABLE IF NOT EXISTS "{table_id}" ({column_defs})'
+
+    def _prepare_table(self, conn: sqlite3.Connection, table_id: str, schema, truncate: bool = False):
+        # Loads migrate too, so a table created before a schema column was added
+        # gets it instead of failing the INSERT
+        if truncate:
+            conn.execute(f'DROP TABLE IF EXISTS "{table_id}"')
+        conn.execute(self._create_sql(table_id, schema))
+        self._add_missing_columns(conn, table_id, schema)
+
+    def load_dataframe(self, df, dataset_id: str, table_id: str, schema=STANDARDIZED_SCHEMA,
+                       truncate: bool = False) -> str:
+        columns = [name for name, _ in schema]
+        rows = df.reindex(columns=columns).astype(object)
+        rows = rows.where(rows.notna(), None)
+        for name, field_type in schema:
+            if is_array(field_type):
+                rows[name] = rows[name].map(self._array_value)
+        rows = rows.itertuples(index=False, name=None)
+        placeholders = ", ".join("?" for _ in columns)
+        quoted = ", ".join(f'"{name}"' for name in columns)
+        with self._lock, self.connect(dataset_id) as conn:
+            self._prepare_table(conn, table_id, schema, truncate)
+            conn.executemany(f'INSERT INTO "{table_id}" ({quoted}) VALUES ({placeholders})', rows)
+        return self.table_ref(dataset_id, table_id)
+
+    def load_arrow(self, table, dataset_id: str, table_id: str, schema=STANDARDIZED_SCHEMA,
+                   truncate: bool = False) -> str:
+        columns = [name for name, _ in schema]
+        values = [table.column(name).to_pylist() if name in table.column_names else [None] * table.num_rows
+                  for name in columns]
+        for index, (_, field_type) in enumerate(schema):
+            if is_array(field_type):
+                values[index] = [self._array_value(value) for value in values[index]]
+        placeholders = ", ".join("?" for _ in columns)
+        quoted = ", ".join(f'"{name}"' for name in columns)
+        with self._lock, self.connect(dataset_id) as conn:
+            self._prepare_table(conn, table_id, schema, truncate)
+            conn.executemany(f'INSERT INTO "{table_id}" ({quoted}) VALUES ({placeholders})', zip(*values))
+        return self.table_ref(dataset_id, table_id)
+
+    def ensure_table(self, dataset_id: str, table_id: str, schema=STANDARDIZED_SCHEMA):
+        with self._lock, self.connect(dataset_id) as conn:
+            self._prepare_table(conn, table_id, schema)
+
+    def drop_table(self, dataset_id: str, table_id: str):
+        with self._lock, self.connect(dataset_id) as conn:
+            conn.execute(f'DROP TABLE IF EXISTS "{table_id}"')
+
+    def execute_script(self, sql: str, dataset_id: str = 'job_data'):
+        with self._lock:
+            conn = self.connect(dataset_id)
+            try:
+                conn.executescript(sql)
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+    def query(self, sql: str, dataset_id: str = 'job_data'):
+        with self.connect(dataset_id) as conn:
+            return conn.execute(sql).fetchall()
+
+
+_instances: Dict[str, Any] = {}
+_instances_lock = threading.Lock()
+
+
+def _get(kind: str, factories: Dict[str, Callable[[], Any]], name: str):
+    if name not in factories:
+        raise ValueError(f"Unknown {kind} backend: {name}")
+    key = f"{kind}:{name}"
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = factories[name]()
+        return _instances[key]
+
+
+def preload(*kinds: str):
+    # Import the client libraries of the configured backends (storage, queue,
+    # warehouse) without creating clients, so it is safe before a fork
+    if 'storage' in kinds and STORAGE_BACKEND == 'gcs':
+        import google.cloud.storage  # noqa: F401
+    if 'queue' in kinds and QUEUE_BACKEND == 'pubsub':
+        import google.cloud.pubsub_v1  # noqa: F401
+    if 'warehouse' in kinds and WAREHOUSE_BACKEND == 'bigquery':
+        import google.cloud.bigquery  # noqa: F401
+
+
+def get_storage():
+    return _get('storage', {'gcs': GCSStorage, 'local': LocalStorage}, STORAGE_BACKEND)
+
+
+def get_queue():
+    return _get('queue', {'pubsub': PubSubQueue, 'local': LocalQueue}, QUEUE_BACKEND)
+
+
+def get_warehouse():
+    return _get('warehouse', {'bigquery': BigQueryWarehouse, 'sqlite': SQLiteWarehouse}, WAREHOUSE_BACKEND)
@@ -0,0 +1,179 @@
+import os
+import json
+import hashlib
+import datetime
+import argparse
+from typing import Any, Dict, List, Optional
+
+import backends
+import object_names
+import serialization
+from backends import STANDARDIZED_SCHEMA, is_array
+
+# Daily compaction and raw retention for the run-scoped layout in object_names.py.
+#
+# Each closed day partition of transformed/<source>/ is merged into one
+# compacted.parquet and its per-run objects are deleted. The compacted file
+# records, in row order, which objects it holds with a digest of their content
+# and their row count. An object left behind by a run interrupted between the
+# upload and the deletes has the same digest and is not merged twice; one that
+# replay.py re-wrote under the same name has a new digest, and its rows replace
+# the ones merged before. Raw landings older than
+# RAW_RETENTION_DAYS are deleted. Only the partitions inside the lookback window
+# are listed, so the cost of a run stays flat as days accumulate.
+
+RAW_RETENTION_DAYS = int(os.environ.get('RAW_RETENTION_DAYS', '30'))
+COMPACTION_LOOKBACK_DAYS = int(os.environ.get('COMPACTION_LOOKBACK_DAYS', '7'))
+MERGED_KEY = b'compacted_from'
+
+
+def _read_table(storage, bucket_name: str, name: str):
+    content = storage.download_bytes(bucket_name, name)
+    return None if content is None else _parse_table(name, content)
+
+
+def _parse_table(name: str, content: bytes):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if name.endswith('.parquet'):
+        return pq.read_table(pa.BufferReader(content))
+    data = serialization.loads(content)
+    return pa.Table.from_pylist(data if isinstance(data, list) else [data])
+
+
+def _conform(table):
+    # pandas JSON output has all-null columns and differing column orders
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    import arrow_engine
+
+    columns = {}
+    for name, field_type in STANDARDIZED_SCHEMA:
+        values = table.column(name) if name in table.column_names else None
+        if is_array(field_type):
+            # Outputs from before the column existed have none; all-empty JSON lists come back as list<null>
+            columns[name] = pc.cast(values, pa.list_(pa.string())) if values is not None and pa.types.is_list(values.type) \
+                else arrow_engine.empty_column(field_type, table.num_rows)
+        elif values is not None:
+            columns[name] = pc.cast(values, pa.string())
+        else:
+            columns[name] = pa.nulls(table.num_rows, pa.string())
+    return pa.table(columns)
+
+
+def _merged_objects(table) -> Dict[str, Optional[Dict[str, Any]]]:
+    # {name: {'sha256': ..., 'rows': ...}} in row order; files compacted before
+    # digests were recorded list the names only, and map them to None
+    merged = json.loads((table.schema.metadata or {}).get(MERGED_KEY, b'[]'))
+    return dict.fromkeys(merged) if isinstance(merged, list) else merged
+
+
+def _drop_objects(table, merged: Dict[str, Optional[Dict[str, Any]]], names):
+    # The rows of objects recorded without a count all come first
+    offset = table.num_rows - sum(entry['rows'] for entry in merged.values() if entry)
+    kept = [table.slice(0, offset)]
+    for name, entry in merged.items():
+        if entry is None:
+            continue
+        if name not in names:
+            kept.append(table.slice(offset, entry['rows']))
+        offset += entry['rows']
+    return kept
+
+
+def compact_partition(storage, bucket_name: str, source: str, day: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    prefix = object_names.partition_prefix(object_names.TRANSFORMED_PREFIX, source, day)
+    target = prefix + object_names.COMPACTED_NAME
+    names = storage.list_names(bucket_name, prefix)
+    inputs = [name for name in names if name != target]
+    if not inputs:
+        return 0
+
+    compacted, merged = None, {}
+    if target in names:
+        compacted = _read_table(storage, bucket_name, target)
+        merged = _merged_objects(compacted)
+        compacted = _conform(compacted)
+
+    pending, rewritten, kept = {}, set(), []
+    for name in inputs:
+        content = storage.download_bytes(bucket_name, name)
+        if content is None:
+            continue
+        digest = hashlib.sha256(content).hexdigest()
+        if name in merged:
+            if merged[name] is None:
+                # Cannot tell a re-written object from a leftover, so leave it for an operator
+                print(f"Keeping {name}: {target} does not record what it merged from it")
+                kept.append(name)
+                continue
+            if merged[name]['sha256'] == digest:
+                continue
+            rewritten.add(name)
+        pending[name] = (digest, _conform(_parse_table(name, content)))
+
+    if pending:
+        tables = _drop_objects(compacted, merged, rewritten) if compacted is not None else []
+        entries = {name: entry for name, entry in merged.items() if name not in rewritten}
+        for name, (digest, table) in pending.items():
+            tables.append(table)
+            entries[name] = {'sha256': digest, 'rows': table.num_rows}
+        table = pa.concat_tables(tables)
+        table = table.replace_schema_metadata({MERGED_KEY: json.dumps(entries)})
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression='snappy')
+        storage.upload(bucket_name, target, sink.getvalue().to_pybytes(), content_type="application/vnd.apache.parquet")
+        print(f"Compacted {len(pending)} objects ({len(rewritten)} re-written, {table.num_rows} rows) into {target}")
+
+    deleted = [name for name in inputs if name not in kept]
+    for name in deleted:
+        storage.delete(bucket_name, name)
+    return len(deleted)
+
+
+def expire_raw(storage, bucket_name: str, source: str, day: str) -> int:
+    prefix = object_names.partition_prefix(object_names.RAW_PREFIX, source, day)
+    names = storage.list_names(bucket_name, prefix)
+    for name in names:
+        storage.delete(bucket_name, name)
+    if names:
+        print(f"Expired {len(names)} raw objects under {prefix}")
+    return len(names)
+
+
+def run_compaction(bucket_name: str, sources: List[str], today: Optional[datetime.date] = None,
+                   lookback_days: int = COMPACTION_LOOKBACK_DAYS,
+                   retention_days: int = RAW_RETENTION_DAYS) -> Dict[str, Any]:
+    """Compact the closed days of the last ``lookback_days`` and expire the raw
+    partitions that fell out of the retention window in the same span of days."""
+    storage = backends.get_storage()
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    summary = {'compacted_objects': 0, 'compacted_partitions': 0, 'expired_raw_objects': 0}
+
+    for source in sources:
+        for offset in range(1, lookback_days + 1):
+            day = (today - datetime.timedelta(days=offset)).isoformat()
+            compacted = compact_partition(storage, bucket_name, source, day)
+            summary['compacted_objects'] += compacted
+            summary['compacted_partitions'] += 1 if compacted else 0
+
+            expired_day = (today - datetime.timedelta(days=retention_days + offset)).isoformat()
+            summary['expired_raw_objects'] += expire_raw(storage, bucket_name, source, expired_day)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compact transformed objects and expire old raw landings')
+    parser.add_argument('--bucket', default=f"job-data-{os.environ.get('PROJECT_ID')}")
+    parser.add_argument('--sources', nargs='+', default=['adzuna', 'jooble', 'muse'])
+    parser.add_argument('--date', type=datetime.date.fromisoformat, help='treat this UTC date as today')
+    parser.add_argument('--lookback-days', type=int, default=COMPACTION_LOOKBACK_DAYS,
+                        help='days to scan; raise it once to catch up after missed runs')
+    parser.add_argument('--retention-days', type=int, default=RAW_RETENTION_DAYS)
+    args = parser.parse_args()
+    print(json.dumps(run_compaction(args.bucket, args.sources, args.date, args.lookback_days, args.retention_days)))
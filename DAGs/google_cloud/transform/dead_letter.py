@@ -0,0 +1,57 @@
+import os
+import uuid
+import datetime
+from typing import Any, Dict, List, Optional
+
+import backends
+import serialization
+
+# Failed transforms end up here instead of being redelivered forever: one JSON
+# entry per message under deadletter/<source>/dt=<day>/, holding the message
+# (and so the raw object it points at), the failing stage and the error.
+# replay.py --dead-letters reprocesses them once the cause is fixed.
+#
+# Permanent failures (bad message, unknown source, missing object) are stored on
+# the first attempt; others once Pub/Sub reports MAX_DELIVERY_ATTEMPTS. Pub/Sub
+# only reports attempts when the subscription has a dead-letter policy, so set
+# its --max-delivery-attempts above this value.
+
+DEAD_LETTER_PREFIX = 'deadletter'
+MAX_DELIVERY_ATTEMPTS = int(os.environ.get('MAX_DELIVERY_ATTEMPTS', 5))
+
+
+class TransformError(Exception):
+    def __init__(self, stage: str, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.stage = stage
+        self.permanent = permanent
+
+
+def should_dead_letter(permanent: bool, delivery_attempt: Optional[int]) -> bool:
+    return permanent or (delivery_attempt or 0) >= MAX_DELIVERY_ATTEMPTS
+
+
+def record(bucket_name: str, message_data: Dict[str, Any], stage: str, error: str,
+           delivery_attempt: Optional[int] = None) -> str:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    source = message_data.get('api_source') or 'unknown'
+    name = f"{DEAD_LETTER_PREFIX}/{source}/dt={now:%Y-%m-%d}/{now:%H%M%S}-{uuid.uuid4().hex[:8]}.json"
+    entry = {
+        'failed_at': now.isoformat(),
+        'stage': stage,
+        'error': error,
+        'delivery_attempt': delivery_attempt,
+        'message': message_data,
+    }
+    backends.get_storage().upload(bucket_name, name, serialization.dumps_bytes(entry))
+    print(f"Dead-lettered {message_data.get('filename')} ({stage}: {error}) to {name}")
+    return name
+
+
+def list_entries(bucket_name: str, source: str, day: str) -> List[str]:
+    return backends.get_storage().list_names(bucket_name, f"{DEAD_LETTER_PREFIX}/{source}/dt={day}/")
+
+
+def load(bucket_name: str, name: str) -> Optional[Dict[str, Any]]:
+    content = backends.get_storage().download_bytes(bucket_name, name)
+    return serialization.loads(content) if content is not None else None
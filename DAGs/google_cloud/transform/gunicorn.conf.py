@@ -0,0 +1,23 @@
+import os
+
+# Cloud Run settings; the image runs `gunicorn --config gunicorn.conf.py main:app`
+bind = f":{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# Cloud Run enforces the request timeout itself
+timeout = 0
+
+# With preload the app and its heavy dependencies are imported before the port
+# is bound, so Cloud Run only routes the first request to a warm instance.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def on_starting(server):
+    if server.cfg.preload_app:
+        import main
+        main.preload()
+
+
+def post_worker_init(worker):
+    import main
+    main.warm_up()
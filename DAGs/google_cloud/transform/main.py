@@ -1,52 +1,66 @@
 import os
-import json
 import base64
 from flask import Flask, request
-import pandas as pd
-from google.cloud import storage
-from google.cloud import bigquery
+import backends
+import rollups
+import dead_letter
+import object_names
+import serialization
+from dead_letter import TransformError
+from metrics import MetricsRegistry
 
 PROJECT_ID = os.environ.get('PROJECT_ID')
 BUCKET_NAME = f"job-data-{PROJECT_ID}"
+TRANSFORM_ENGINE = os.environ.get('TRANSFORM_ENGINE', 'pandas')    # pandas | arrow
+VALIDATION = os.environ.get('VALIDATION', '1') == '1'
+SKILL_TAGGING = os.environ.get('SKILL_TAGGING', '1') == '1'
+ROLLUP_MERGE = os.environ.get('ROLLUP_MERGE', '1') == '1'         # replay.py turns it off and rebuilds
+METRICS = MetricsRegistry(prefix="job_transform")
 
 
 app = Flask(__name__)
 
-def download_json_from_gcs(bucket_name, source_blob_name):
+def download_json_from_gcs(bucket_name, source_blob_name, generation=None):
+    import pandas as pd
+
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(source_blob_name)
+        json_content = backends.get_storage().download_text(bucket_name, source_blob_name, generation)
         
-        if not blob.exists():
-            print(f"File {source_blob_name} not found in bucket {bucket_name}")
+        if json_content is None:
+            print(f"File {source_blob_name} (generation {generation}) not found in bucket {bucket_name}")
             return pd.DataFrame()
             
-        json_content = blob.download_as_text()
-        data = json.loads(json_content)
+        if source_blob_name.endswith('.ndjson'):
+            data = serialization.loads_lines(json_content)
+        else:
+            data = serialization.loads(json_content)
+        METRICS.annotate(bytes_in=len(json_content), records=len(data) if isinstance(data, list) else 1)
         df = pd.DataFrame(data) if isinstance(data, list) else pd.DataFrame([data])
         print(f"Successfully downloaded and parsed {source_blob_name}")
         return df
     
     except Exception as e:
+        # None, unlike the empty frame for a missing object, means the download may succeed on retry
         print(f"Error downloading {source_blob_name}: {str(e)}")
-        return pd.DataFrame()
+        return None
+
+def upload_to_gcs(data, destination_blob_name, bucket_name=BUCKET_NAME, content_type="application/json"):
+    import pandas as pd
 
-def upload_to_gcs(data, destination_blob_name, bucket_name=BUCKET_NAME):
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(destination_blob_name)
+        storage = backends.get_storage()
         
         if isinstance(data, pd.DataFrame):
-            json_data = data.to_json(orient='records', indent=4)
-            blob.upload_from_string(json_data, content_type="application/json")
+            json_data = data.to_json(orient='records', indent=4 if serialization.PRETTY else None)
+            storage.upload(bucket_name, destination_blob_name, json_data, content_type="application/json")
+            METRICS.annotate(bytes_out=len(json_data), records=len(data))
         else:
-            blob.upload_from_string(data, content_type="application/json")
+            storage.upload(bucket_name, destination_blob_name, data, content_type=content_type)
+            METRICS.annotate(bytes_out=len(data))
 
         print(f"File {destination_blob_name} uploaded to {bucket_name}")
         
-        if blob.exists():
+        if storage.exists(bucket_name, destination_blob_name):
             print(f"Verified upload of {destination_blob_name}")
             return True
         else:
@@ -56,143 +70,275 @@ def upload_to_gcs(data, destination_blob_name, bucket_name=BUCKET_NAME):
         print(f"Error uploading to GCS: {str(e)}")
         return False
 
+FIELD_MAPPINGS = {
+    'adzuna': {
+        'job_title': 'title',
+        'job_description': 'description',
+        'job_url': 'redirect_url',
+        'posted_date': 'created',
+        'job_category': 'category.label',
+        'job_type': 'contract_time',
+        'company_name': 'company.display_name',
+        'salary': 'salary_is_predicted',
+        'salary_min': 'salary_min',
+        'salary_max': 'salary_max'
+    },
+    'jooble': {
+        'job_title': 'title',
+        'job_description': 'snippet',
+        'job_url': 'link',
+        'posted_date': 'updated',
+        'job_category': 'type',
+        'job_type': 'type',
+        'company_name': 'company',
+        'salary': 'salary'
+    },
+    'muse': {
+        'job_title': 'name',
+        'job_description': 'contents',
+        'job_url': 'refs.landing_page',
+        'posted_date': 'publication_date',
+        'job_category': 'categories[0].name',
+        'job_type': '',
+        'company_name': 'company.name',
+        'salary': ''
+    }
+}
+
+def standardize_jobs(df, api_source):
+    import pandas as pd
+
+    if api_source not in FIELD_MAPPINGS:
+        return None
+
+    mapping = FIELD_MAPPINGS[api_source]
+    df_standardized = pd.DataFrame()
+
+    for new_col, original_col in mapping.items():
+        if new_col not in ['salary_min', 'salary_max']:
+            if '.' in original_col:
+                parts = original_col.split('.')
+                if parts[0] in df.columns:
+                    if parts[0] == 'refs' and 'refs' in df.columns:
+                        df_standardized[new_col] = df['refs'].apply(
+                            lambda x: x.get('landing_page') if isinstance(x, dict) and 'landing_page' in x else None
+                        )
+                    else:
+                        df_standardized[new_col] = df[parts[0]].apply(
+                            lambda x: x.get(parts[1]) if isinstance(x, dict) and parts[1] in x else None
+                        )
+                elif parts[0] == 'categories[0]' and 'categories' in df.columns:
+                        df_standardized[new_col] = df['categories'].apply(
+                            lambda x: x[0].get('name') if isinstance(x, list) and len(x) > 0 and 'name' in x[0] else None
+                        )
+            elif original_col in df.columns:
+                df_standardized[new_col] = df[original_col]
+            else:
+                df_standardized[new_col] = None
+    
+    # Handle Adzuna salary separately
+    if api_source == 'adzuna' and 'salary_min' in mapping and 'salary_max' in mapping:
+        min_col = mapping['salary_min']
+        max_col = mapping['salary_max']
+
+        if min_col in df.columns and max_col in df.columns:
+            df_standardized['salary'] = df[min_col].apply(lambda x: f"${x}" if pd.notna(x) else "").astype(str) + \
+                                    ' - ' + \
+                                    df[max_col].apply(lambda x: f"${x}" if pd.notna(x) else "").astype(str)
+            df_standardized['salary'] = df_standardized['salary'].str.replace('$ - $', '', regex=False)
+            df_standardized['salary'] = df_standardized['salary'].str.replace('$nan', '', regex=False)
+            df_standardized['salary'] = df_standardized['salary'].str.replace('nan$', '', regex=False)
+
+    df_standardized['source'] = api_source
+    # Filled by skills.py when SKILL_TAGGING is on
+    df_standardized['skills'] = [[] for _ in range(len(df_standardized))]
+    return df_standardized
+
+def standardize_with_arrow(bucket_name, source_blob_name, api_source, generation=None):
+    # TRANSFORM_ENGINE=arrow: raw bytes -> pyarrow Table -> standardized Table.
+    # Returns None on any failure so the caller can fall back to pandas.
+    import arrow_engine
+
+    mapping = FIELD_MAPPINGS[api_source]
+    try:
+        with METRICS.span("gcs_download", source=api_source):
+            content = backends.get_storage().download_bytes(bucket_name, source_blob_name, generation)
+            if content is None:
+                print(f"File {source_blob_name} (generation {generation}) not found in bucket {bucket_name}")
+                return None
+            table = arrow_engine.read_records(content, source_blob_name.endswith('.ndjson'), mapping)
+            METRICS.annotate(bytes_in=len(content), records=table.num_rows)
+        if table.num_rows == 0:
+            return None
+        print(f"Read {table.num_rows} records from {source_blob_name} into Arrow")
+
+        with METRICS.span("transform", source=api_source) as span:
+            standardized = arrow_engine.standardize_table(table, api_source, mapping)
+            span["records"] = standardized.num_rows
+        return standardized
+    except Exception as e:
+        print(f"Arrow engine failed on {source_blob_name}: {str(e)}")
+        return None
+
+def preload():
+    # Called from gunicorn.conf.py in the master, before the port is bound.
+    # pandas/pyarrow are otherwise imported on the first message, not at module load.
+    if TRANSFORM_ENGINE == 'arrow':
+        import arrow_engine  # noqa: F401
+    if VALIDATION:
+        import validation  # noqa: F401
+    if SKILL_TAGGING:
+        import skills
+        skills.get_tagger()
+    import pandas  # noqa: F401
+    backends.preload('storage', 'warehouse')
+
+def warm_up():
+    # Called from gunicorn.conf.py in each worker; clients must not cross a fork
+    if SKILL_TAGGING:
+        import skills
+        if skills.PROCESSES > 1:
+            # Forked first, before clients or request threads start threads of their own
+            skills.get_pool()
+    try:
+        backends.get_storage()
+        backends.get_warehouse()
+    except Exception as e:
+        print(f"Warm-up failed, clients will be created on first use: {str(e)}")
+
 def transform_job_data(message_data):
+    # Returns the standardized batch, or None if the transform failed
+    try:
+        return run_transform(message_data)
+    except TransformError as e:
+        print(f"Transform failed at {e.stage}: {str(e)}")
+        return None
+
+def process_message(message_data, delivery_attempt=None):
+    """Transform one Pub/Sub message; return 'success', 'retry' or 'dead_lettered'."""
+    try:
+        run_transform(message_data)
+        return 'success'
+    except TransformError as e:
+        stage, error, permanent = e.stage, str(e), e.permanent
+    except Exception as e:
+        stage, error, permanent = 'transform', str(e), False
+
+    print(f"Transform failed at {stage} (attempt {delivery_attempt}): {error}")
+    METRICS.inc("transform_failures_total", source=message_data.get('api_source'), stage=stage)
+    if not dead_letter.should_dead_letter(permanent, delivery_attempt):
+        return 'retry'
+    try:
+        dead_letter.record(BUCKET_NAME, message_data, stage, error, delivery_attempt)
+        return 'dead_lettered'
+    except Exception as e:
+        print(f"Error writing dead letter: {str(e)}")
+        return 'retry'
+
+def run_transform(message_data):
     print(f"Starting job data transformation for: {message_data}")
 
     api_source = message_data.get('api_source')
     filename = message_data.get('filename')
     bucket = message_data.get('bucket', BUCKET_NAME)
+    # Pins the read to the object the message was published for
+    generation = message_data.get('generation')
     
     if not api_source or not filename:
-        print("Invalid message: missing required fields")
-        return None
+        raise TransformError("validate", "Invalid message: missing required fields", permanent=True)
+    if api_source not in FIELD_MAPPINGS:
+        raise TransformError("validate", f"Unknown API source: {api_source}", permanent=True)
     
-    df = download_json_from_gcs(bucket, filename)
+    if TRANSFORM_ENGINE == 'arrow':
+        table = standardize_with_arrow(bucket, filename, api_source, generation)
+        if table is not None:
+            return store_transformed(table, api_source, filename, bucket, engine='arrow')
+        print(f"Falling back to the pandas engine for {filename}")
+
+    with METRICS.span("gcs_download", source=api_source):
+        df = download_json_from_gcs(bucket, filename, generation)
     
+    if df is None:
+        raise TransformError("gcs_download", f"Could not download {filename}")
     if df.empty:
-        print(f"No data found in source file: {filename}")
-        return None
+        raise TransformError("gcs_download", f"No data found in source file: {filename}", permanent=True)
     
     print(f"Downloaded {len(df)} records from {filename}")
     
-    df_standardized = pd.DataFrame()
-    
-    field_mappings = {
-        'adzuna': {
-            'job_title': 'title',
-            'job_description': 'description',
-            'job_url': 'redirect_url',
-            'posted_date': 'created',
-            'job_category': 'category.label',
-            'job_type': 'contract_time',
-            'company_name': 'company.display_name',
-            'salary': 'salary_is_predicted',
-            'salary_min': 'salary_min',
-            'salary_max': 'salary_max'
-        },
-        'jooble': {
-            'job_title': 'title',
-            'job_description': 'snippet',
-            'job_url': 'link',
-            'posted_date': 'updated',
-            'job_category': 'type',
-            'job_type': 'type',
-            'company_name': 'company',
-            'salary': 'salary'
-        },
-        'muse': {
-            'job_title': 'name',
-            'job_description': 'contents',
-            'job_url': 'refs.landing_page',
-            'posted_date': 'publication_date',
-            'job_category': 'categories[0].name',
-            'job_type': '',
-            'company_name': 'company.name',
-            'salary': ''
-        }
-    }
-    
-    if api_source in field_mappings:
-        mapping = field_mappings[api_source]
-        
-        for new_col, original_col in mapping.items():
-            if new_col not in ['salary_min', 'salary_max']:
-                if '.' in original_col:
-                    parts = original_col.split('.')
-                    if parts[0] in df.columns:
-                        if parts[0] == 'refs' and 'refs' in df.columns:
-                            df_standardized[new_col] = df['refs'].apply(
-                                lambda x: x.get('landing_page') if isinstance(x, dict) and 'landing_page' in x else None
-                            )
-                        else:
-                            df_standardized[new_col] = df[parts[0]].apply(
-                                lambda x: x.get(parts[1]) if isinstance(x, dict) and parts[1] in x else None
-                            )
-                    elif parts[0] == 'categories[0]' and 'categories' in df.columns:
-                            df_standardized[new_col] = df['categories'].apply(
-                                lambda x: x[0].get('name') if isinstance(x, list) and len(x) > 0 and 'name' in x[0] else None
-                            )
-                elif original_col in df.columns:
-                    df_standardized[new_col] = df[original_col]
-                else:
-                    df_standardized[new_col] = None
-        
-        # Handle Adzuna salary separately
-        if api_source == 'adzuna' and 'salary_min' in mapping and 'salary_max' in mapping:
-            min_col = mapping['salary_min']
-            max_col = mapping['salary_max']
-
-            if min_col in df.columns and max_col in df.columns:
-                df_standardized['salary'] = df[min_col].apply(lambda x: f"${x}" if pd.notna(x) else "").astype(str) + \
-                                        ' - ' + \
-                                        df[max_col].apply(lambda x: f"${x}" if pd.notna(x) else "").astype(str)
-                df_standardized['salary'] = df_standardized['salary'].str.replace('$ - $', '', regex=False)
-                df_standardized['salary'] = df_standardized['salary'].str.replace('$nan', '', regex=False)
-                df_standardized['salary'] = df_standardized['salary'].str.replace('nan$', '', regex=False)
-
-        df_standardized['source'] = api_source
-        output_filename = f"transformed_{api_source}_jobs.json"
-        upload_success = upload_to_gcs(df_standardized, output_filename, bucket)
-        
-        if upload_success:
-            print(f"Transformation complete for {api_source}. Result saved to {output_filename}")
-            bigquery_success = load_to_bigquery(df_standardized)
-            if bigquery_success:
-                print(f"Successfully loaded {api_source} data to BigQuery")
-            else:
-                print(f"Failed to load {api_source} data to BigQuery")
-            return df_standardized
+    with METRICS.span("transform", source=api_source) as span:
+        df_standardized = standardize_jobs(df, api_source)
+        span["records"] = len(df_standardized)
+    return store_transformed(df_standardized, api_source, filename, bucket)
+
+def quarantine_invalid(batch, api_source, source_filename, bucket, engine='pandas'):
+    # Returns the rows that pass validation.py; the others are stored with their reasons
+    import validation
+
+    with METRICS.span("validate", source=api_source) as span:
+        if engine == 'arrow':
+            valid, quarantined, counts = validation.split(batch)
         else:
-            print(f"Failed to upload transformed data for {api_source}")
-            return None
+            valid, quarantined, counts = validation.split_frame(batch)
+        span["records"] = len(batch)
+    if not quarantined.num_rows:
+        return valid
+
+    for rule, count in counts.items():
+        if count:
+            METRICS.inc("quarantined_records_total", count, source=api_source, rule=rule)
+    quarantine_filename = object_names.quarantine_name(source_filename, api_source)
+    if not upload_to_gcs(serialization.dumps_lines(quarantined.to_pylist()), quarantine_filename, bucket,
+                         content_type="application/x-ndjson"):
+        raise TransformError("validate", f"Failed to store quarantined {api_source} rows to {quarantine_filename}")
+    reasons = ', '.join(f"{rule}: {count}" for rule, count in counts.items() if count)
+    print(f"Quarantined {quarantined.num_rows} of {len(batch)} {api_source} rows to {quarantine_filename} ({reasons})")
+    return valid
+
+def tag_skills(batch, api_source, engine='pandas'):
+    import skills
+
+    with METRICS.span("tag_skills", source=api_source) as span:
+        batch = skills.tag_table(batch) if engine == 'arrow' else skills.tag_frame(batch)
+        span["records"] = len(batch)
+    return batch
+
+def store_transformed(df_standardized, api_source, source_filename, bucket, engine='pandas'):
+    # Uploads the standardized batch (JSON, or Parquet from the Arrow engine) and loads it into BigQuery
+    if VALIDATION:
+        df_standardized = quarantine_invalid(df_standardized, api_source, source_filename, bucket, engine)
+        if not len(df_standardized):
+            print(f"No valid {api_source} rows left in {source_filename}, nothing to load")
+            return df_standardized
+    if SKILL_TAGGING:
+        df_standardized = tag_skills(df_standardized, api_source, engine)
+
+    if engine == 'arrow':
+        import arrow_engine
+        output_filename = object_names.transformed_name(source_filename, api_source, 'parquet')
+        with METRICS.span("gcs_upload", source=api_source):
+            upload_success = upload_to_gcs(arrow_engine.to_parquet(df_standardized), output_filename, bucket,
+                                           content_type=arrow_engine.PARQUET_CONTENT_TYPE)
     else:
-        print(f"Unknown API source: {api_source}")
-        return None
+        output_filename = object_names.transformed_name(source_filename, api_source, 'json')
+        with METRICS.span("gcs_upload", source=api_source):
+            upload_success = upload_to_gcs(df_standardized, output_filename, bucket)
+
+    if not upload_success:
+        raise TransformError("gcs_upload", f"Failed to upload transformed data for {api_source} to {output_filename}")
+
+    print(f"Transformation complete for {api_source}. Result saved to {output_filename}")
+    with METRICS.span("bigquery_load", source=api_source):
+        if not load_to_bigquery(df_standardized, engine=engine):
+            raise TransformError("bigquery_load", f"Failed to load {api_source} data to BigQuery")
+    print(f"Successfully loaded {api_source} data to BigQuery")
+    return df_standardized
     
-def load_to_bigquery(df, dataset_id='job_data', table_id='standardized_jobs'):
+def load_to_bigquery(df, dataset_id='job_data', table_id='standardized_jobs', engine='pandas'):
     try:
-        client = bigquery.Client()
-        table_ref = f"{client.project}.{dataset_id}.{table_id}"
-        
-        job_config = bigquery.LoadJobConfig(
-            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-            schema=[
-                bigquery.SchemaField("job_title", "STRING"),
-                bigquery.SchemaField("job_description", "STRING"),
-                bigquery.SchemaField("job_url", "STRING"),
-                bigquery.SchemaField("posted_date", "STRING"),
-                bigquery.SchemaField("job_category", "STRING"),
-                bigquery.SchemaField("job_type", "STRING"),
-                bigquery.SchemaField("company_name", "STRING"),
-                bigquery.SchemaField("salary", "STRING"),
-                bigquery.SchemaField("source", "STRING"),
-            ]
-        )
-        
-        job = client.load_table_from_dataframe(
-            df, table_ref, job_config=job_config
-        )
-        job.result() 
+        # Appends the batch and folds it into the report rollups in one transaction
+        table_ref = rollups.load_with_rollups(backends.get_warehouse(), df, dataset_id, table_id, engine=engine,
+                                              merge_rollups=ROLLUP_MERGE)
+        METRICS.annotate(records=len(df))
         print(f"Loaded {len(df)} rows into BigQuery table {table_ref}")
         return True
     except Exception as e:
@@ -203,6 +349,23 @@ def load_to_bigquery(df, dataset_id='job_data', table_id='standardized_jobs'):
 def home():
     return {'status': 'Job transform service is running'}, 200
 
+@app.route('/metrics', methods=['GET'])
+def metrics_handler():
+    return METRICS.to_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/compact', methods=['POST'])
+def compact_handler():
+    # Triggered daily by Cloud Scheduler; see compaction.py
+    import compaction
+
+    try:
+        with METRICS.span("compact"):
+            summary = compaction.run_compaction(BUCKET_NAME, list(FIELD_MAPPINGS))
+        return {'status': 'success', 'details': summary}, 200
+    except Exception as e:
+        print(f"Error in compaction: {str(e)}")
+        return {'status': 'error', 'message': str(e)}, 500
+
 @app.route('/pubsub', methods=['POST'])
 def pubsub_handler():
     try:
@@ -226,17 +389,25 @@ def pubsub_handler():
                 print(f"Decoded bytes (hex): {decoded_bytes.hex()}")
 
                 try:
-                    message_data = json.loads(decoded_bytes)
+                    message_data = serialization.loads(decoded_bytes)
                 except:
                     print(f"Error decoding message data: {decoded_bytes}")
                     return "Invalid message data", 400
-                result = transform_job_data(message_data)
+                # Only sent when the subscription has a dead-letter policy
+                delivery_attempt = envelope.get('deliveryAttempt') or pubsub_message.get('deliveryAttempt')
+                outcome = process_message(message_data, delivery_attempt)
                 
-                if result is not None:
+                if outcome == 'success':
                     return {
                         'status': 'success',
                         'message': f"Successfully transformed job data for {message_data.get('api_source')}"
                     }, 200
+                elif outcome == 'dead_lettered':
+                    # Acknowledged so Pub/Sub stops redelivering; replay.py picks it up later
+                    return {
+                        'status': 'dead_lettered',
+                        'message': f"Failed to transform job data for {message_data.get('api_source')}, stored for replay"
+                    }, 200
                 else:
                     return {
                         'status': 'error',
@@ -0,0 +1,198 @@
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Latency buckets in seconds, shared by every histogram in the registry
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = [f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") + '"' for k, v in pairs]
+    return "{" + ",".join(escaped) + "}"
+
+
+def _quantile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...], max_samples: int):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters, histograms and stage spans for one process.
+
+    Spans time a pipeline stage (extract, transform, gcs_upload, ...) and carry
+    record and byte counts, so the same registry can be rendered as Prometheus
+    text for the Flask services or as a JSON run summary for pipeline.py.
+    """
+
+    def __init__(self, prefix: str = "jobs_pipeline", max_samples: int = 10000):
+        self.prefix = prefix
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(DEFAULT_BUCKETS, self.max_samples)
+            series[key].observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[Dict[str, Any]]:
+        attributes = {"records": 0, "bytes_in": 0, "bytes_out": 0}
+        stack = self._span_stack()
+        stack.append(attributes)
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield attributes
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - started
+            self.observe("stage_duration_seconds", elapsed, stage=stage, status=status, **labels)
+            if attributes["records"]:
+                self.inc("records_total", attributes["records"], stage=stage, **labels)
+            if attributes["bytes_in"]:
+                self.inc("bytes_total", attributes["bytes_in"], stage=stage, direction="in", **labels)
+            if attributes["bytes_out"]:
+                self.inc("bytes_total", attributes["bytes_out"], stage=stage, direction="out", **labels)
+
+    def annotate(self, **values):
+        # Adds counts to the innermost open span of the calling thread, so helpers
+        # like upload_to_gcs can report bytes without knowing the span labels.
+        stack = self._span_stack()
+        if not stack:
+            return
+        for name, value in values.items():
+            stack[-1][name] = stack[-1].get(name, 0) + value
+
+    def _span_stack(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+            for name in sorted(self._histograms):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    for bound, count in zip(hist.buckets, hist.bucket_counts):
+                        lines.append(f"{metric}_bucket{_format_labels(key, {'le': str(bound)})} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, {'le': '+Inf'})} {hist.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {hist.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def counter_value(self, name: str, **labels) -> float:
+        # Sums every series of a counter whose labels include the given ones
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(v for k, v in self._counters.get(name, {}).items() if wanted <= set(k))
+
+    def latency(self, name: str, **labels) -> Dict[str, Any]:
+        wanted = set(_label_key(labels))
+        samples: List[float] = []
+        count, total = 0, 0.0
+        with self._lock:
+            for key, hist in self._histograms.get(name, {}).items():
+                if wanted <= set(key):
+                    samples.extend(hist.samples)
+                    count += hist.count
+                    total += hist.sum
+        return {
+            "count": count,
+            "total_seconds": round(total, 6),
+            "p50": _quantile(samples, 0.50),
+            "p95": _quantile(samples, 0.95),
+            "p99": _quantile(samples, 0.99),
+            "max": max(samples) if samples else None,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            durations = dict(self._histograms.get("stage_duration_seconds", {}))
+        for key, hist in sorted(durations.items()):
+            labels = dict(key)
+            stage = labels.pop("stage")
+            labels.pop("status", None)
+            name = stage if "source" not in labels else f"{stage}.{labels['source']}"
+            entry = stages.setdefault(name, {"stage": stage, **labels, "calls": 0, "seconds": 0.0})
+            entry["calls"] += hist.count
+            entry["seconds"] += hist.sum
+        for entry in stages.values():
+            labels = {k: v for k, v in entry.items() if k not in ("stage", "calls", "seconds")}
+            records = self.counter_value("records_total", stage=entry["stage"], **labels)
+            entry["records"] = int(records)
+            entry["bytes_in"] = int(self.counter_value("bytes_total", stage=entry["stage"], direction="in", **labels))
+            entry["bytes_out"] = int(self.counter_value("bytes_total", stage=entry["stage"], direction="out", **labels))
+            entry["records_per_sec"] = round(records / entry["seconds"], 2) if entry["seconds"] else None
+            if entry["stage"] == "extract" and "source" in labels:
+                pages = self.counter_value("pages_fetched_total", source=labels["source"])
+                entry["pages"] = int(pages)
+                entry["pages_per_sec"] = round(pages / entry["seconds"], 2) if entry["seconds"] else None
+                entry["http"] = self.latency("http_request_duration_seconds", source=labels["source"])
+            entry["seconds"] = round(entry["seconds"], 6)
+        return {
+            "started_at": self.started_at,
+            "wall_seconds": round(time.time() - self.started_at, 6),
+            "stages": stages,
+        }
+
+    def write_summary(self, path: str) -> Dict[str, Any]:
+        summary = self.summary()
+        with open(path, "w") as f:
+            f.write(json.dumps(summary, indent=2))
+        return summary
@@ -0,0 +1,57 @@
+import uuid
+import datetime
+from typing import Optional
+
+# Object layout in the jobs bucket. Every ingest run writes under its own run id,
+# partitioned by UTC day, so overlapping runs never overwrite each other:
+#
+#   raw/<source>/dt=<YYYY-MM-DD>/<run_id>[-<shard>].json|ndjson   landed by ingest
+#   transformed/<source>/dt=<YYYY-MM-DD>/<run_id>[-<shard>].json|parquet
+#   transformed/<source>/dt=<YYYY-MM-DD>/compacted.parquet        written by compaction.py
+#   quarantine/<source>/dt=<YYYY-MM-DD>/<run_id>[-<shard>].ndjson  rows that failed validation.py
+#
+# A shard is one slice of a source's crawl published on its own, e.g. one
+# Adzuna country.
+
+RAW_PREFIX = 'raw'
+TRANSFORMED_PREFIX = 'transformed'
+QUARANTINE_PREFIX = 'quarantine'
+COMPACTED_NAME = 'compacted.parquet'
+
+
+def new_run_id(now: Optional[datetime.datetime] = None) -> str:
+    # e.g. 20240501T101500Z-1a2b3c4d; sorts by start time
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return f"{now:%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+
+
+def run_day(run_id: str) -> str:
+    return f"{run_id[0:4]}-{run_id[4:6]}-{run_id[6:8]}"
+
+
+def partition_prefix(kind: str, source: str, day: str) -> str:
+    return f"{kind}/{source}/dt={day}/"
+
+
+def raw_name(source: str, run_id: str, extension: str, shard: Optional[str] = None) -> str:
+    stem = f"{run_id}-{shard}" if shard else run_id
+    return f"{partition_prefix(RAW_PREFIX, source, run_day(run_id))}{stem}.{extension}"
+
+
+def _raw_stem(source_name: str) -> str:
+    # raw/<source>/dt=<day>/<run_id>.json -> <source>/dt=<day>/<run_id>
+    return source_name[len(RAW_PREFIX) + 1:].rsplit('.', 1)[0]
+
+
+def transformed_name(source_name: str, api_source: str, extension: str) -> str:
+    # raw/<source>/dt=<day>/<run_id>.json -> transformed/<source>/dt=<day>/<run_id>.<extension>;
+    # fixed names from before the run-scoped layout keep their old output name
+    if source_name.startswith(f"{RAW_PREFIX}/"):
+        return f"{TRANSFORMED_PREFIX}/{_raw_stem(source_name)}.{extension}"
+    return f"transformed_{api_source}_jobs.{extension}"
+
+
+def quarantine_name(source_name: str, api_source: str) -> str:
+    if source_name.startswith(f"{RAW_PREFIX}/"):
+        return f"{QUARANTINE_PREFIX}/{_raw_stem(source_name)}.ndjson"
+    return f"{QUARANTINE_PREFIX}/{api_source}/{source_name.rsplit('.', 1)[0]}.ndjson"
@@ -0,0 +1,107 @@
+import json
+import time
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import main
+import rollups
+import backends
+import dead_letter
+import object_names
+
+# Bulk reprocessing through the same transform as the service, e.g. after a
+# mapping fix:
+#
+#   python replay.py --start 2024-05-01 --end 2024-05-07 --workers 16
+#   python replay.py --start 2024-05-01 --dead-letters
+#
+# The first form re-transforms every raw landing of the date range, the second
+# the dead-lettered messages of the range (deleting each entry once it
+# succeeds). Loads append to BigQuery like the service does, so delete the rows
+# a range replay replaces first. A range replay's batches were already folded
+# into the rollups when they first loaded, so its loads skip the rollup MERGE
+# and the rollups are rebuilt from the standardized table once it finishes.
+# Dead-lettered messages never loaded, so their loads merge as usual and
+# retry the MERGE when concurrent loads conflict (see rollups.load_with_rollups).
+
+
+def _days(start: datetime.date, end: datetime.date) -> List[str]:
+    return [(start + datetime.timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def raw_messages(bucket_name: str, sources: List[str], days: List[str]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+    storage = backends.get_storage()
+    for source in sources:
+        for day in days:
+            prefix = object_names.partition_prefix(object_names.RAW_PREFIX, source, day)
+            for name in storage.list_names(bucket_name, prefix):
+                yield {'api_source': source, 'filename': name, 'bucket': bucket_name}, None
+
+
+def dead_letter_messages(bucket_name: str, sources: List[str], days: List[str]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+    for source in sources:
+        for day in days:
+            for name in dead_letter.list_entries(bucket_name, source, day):
+                entry = dead_letter.load(bucket_name, name)
+                if entry and isinstance(entry.get('message'), dict):
+                    yield entry['message'], name
+
+
+def replay(messages: List[Tuple[Dict[str, Any], Optional[str]]], bucket_name: str, workers: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    summary = {'objects': len(messages), 'succeeded': 0, 'failed': 0, 'records': 0, 'failures': []}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(main.transform_job_data, message): (message, entry) for message, entry in messages}
+        for future in as_completed(futures):
+            message, entry = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error replaying {message.get('filename')}: {str(e)}")
+                result = None
+            if result is None:
+                summary['failed'] += 1
+                summary['failures'].append(message.get('filename'))
+                continue
+            summary['succeeded'] += 1
+            summary['records'] += len(result)
+            if entry:
+                backends.get_storage().delete(bucket_name, entry)
+
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    summary['records_per_sec'] = round(summary['records'] / summary['seconds'], 1) if summary['seconds'] else None
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Reprocess raw landings or dead-lettered messages through the transform')
+    parser.add_argument('--start', type=datetime.date.fromisoformat, required=True, help='first UTC day (YYYY-MM-DD)')
+    parser.add_argument('--end', type=datetime.date.fromisoformat, help='last UTC day, inclusive (default: --start)')
+    parser.add_argument('--sources', nargs='+', choices=sorted(main.FIELD_MAPPINGS), default=sorted(main.FIELD_MAPPINGS))
+    parser.add_argument('--bucket', default=main.BUCKET_NAME)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--dead-letters', action='store_true', help='replay dead-lettered messages instead of raw landings')
+    parser.add_argument('--dry-run', action='store_true', help='list what would be replayed')
+    args = parser.parse_args()
+
+    days = _days(args.start, args.end or args.start)
+    source = dead_letter_messages if args.dead_letters else raw_messages
+    messages = list(source(args.bucket, args.sources, days))
+    print(f"{len(messages)} {'dead-lettered messages' if args.dead_letters else 'raw objects'} "
+          f"from {days[0]} to {days[-1]}")
+    if args.dry_run:
+        for message, _ in messages:
+            print(f"  {message.get('filename')}")
+    else:
+        main.ROLLUP_MERGE = args.dead_letters
+        main.warm_up()
+        summary = replay(messages, args.bucket, args.workers)
+        if not args.dead_letters:
+            rollups.rebuild(backends.get_warehouse())
+            print("Rebuilt the rollups from the standardized table")
+        print(json.dumps(summary, indent=2))
+        if summary['failed']:
+            raise SystemExit(1)
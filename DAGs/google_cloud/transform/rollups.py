@@ -0,0 +1,220 @@
+import uuid
+import time
+from backends import STANDARDIZED_SCHEMA, is_array
+
+# Pre-aggregated tables behind the reports in sql/job_market_queries.sql. Each load
+# lands the batch in a staging table with salaries already parsed, appends it to
+# the standardized table and folds it into the rollups in one script, so
+# dashboards read the small rollups instead of rescanning every posting.
+#
+# A load with merge_rollups=False only appends; rebuild() then recomputes the
+# rollups from the whole standardized table, as replay.py does after a range
+# replay whose batches were already merged once.
+
+STAGING_SCHEMA = STANDARDIZED_SCHEMA + [
+    ("salary_first", "FLOAT64"),
+    ("salary_midpoint", "FLOAT64"),
+]
+
+ROLLUP_TABLES = {
+    # month, company_name, source, job_category -> counts and salary sums (queries 1, 2 and 4)
+    'monthly_job_trends': {
+        'keys': [("month", "STRING"), ("company_name", "STRING"), ("source", "STRING"), ("job_category", "STRING")],
+        'values': [("job_count", "INT64"), ("salary_sum", "FLOAT64"), ("salary_count", "INT64")],
+        'select': """
+            SUBSTR(posted_date, 1, 7) AS month, company_name, source, job_category,
+            COUNT(*) AS job_count, SUM(salary_midpoint) AS salary_sum, COUNT(salary_midpoint) AS salary_count
+        """,
+        'where': "posted_date IS NOT NULL",
+        'merge': {"job_count": "sum", "salary_sum": "sum", "salary_count": "sum"},
+    },
+    # posted day, company_name -> postings (query 3)
+    'daily_company_postings': {
+        'keys': [("posted_day", "STRING"), ("company_name", "STRING")],
+        'values': [("job_count", "INT64")],
+        'select': "SUBSTR(posted_date, 1, 10) AS posted_day, company_name, COUNT(*) AS job_count",
+        'where': "posted_date IS NOT NULL",
+        'merge': {"job_count": "sum"},
+    },
+    # job_category, job_type -> salary range (query 5)
+    'salary_distribution': {
+        'keys': [("job_category", "STRING"), ("job_type", "STRING")],
+        'values': [("min_salary", "FLOAT64"), ("max_salary", "FLOAT64"),
+                   ("salary_sum", "FLOAT64"), ("salary_count", "INT64")],
+        'select': """
+            job_category, job_type, MIN(salary_first) AS min_salary, MAX(salary_first) AS max_salary,
+            SUM(salary_first) AS salary_sum, COUNT(salary_first) AS salary_count
+        """,
+        'where': "salary_first IS NOT NULL AND job_category IS NOT NULL AND job_type IS NOT NULL",
+        'merge': {"min_salary": "min", "max_salary": "max", "salary_sum": "sum", "salary_count": "sum"},
+    },
+}
+
+SQLITE_TYPES = {"STRING": "TEXT", "INT64": "INTEGER", "FLOAT64": "REAL"}
+
+# add_salary_columns in BigQuery SQL, as in the backfill of sql/job_market_rollups.sql
+_SALARY_NUMBER = "SAFE_CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'{}') AS FLOAT64)"
+BIGQUERY_SALARY_COLUMNS = {
+    "salary_first": _SALARY_NUMBER.format('([0-9.]+)'),
+    "salary_midpoint": f"({_SALARY_NUMBER.format('^([0-9.]+)')} + {_SALARY_NUMBER.format('- ([0-9.]+)$')}) / 2",
+}
+
+
+def add_salary_columns(df):
+    # Same parsing the reports did with REGEXP_EXTRACT on every run: the first
+    # number of the salary string, and the midpoint of "low - high".
+    import pandas as pd
+
+    salary = df['salary'].where(df['salary'].notna(), '').astype(str).str.replace('$', '', regex=False)
+    first = pd.to_numeric(salary.str.extract(r'([0-9.]+)', expand=False), errors='coerce')
+    low = pd.to_numeric(salary.str.extract(r'^([0-9.]+)', expand=False), errors='coerce')
+    high = pd.to_numeric(salary.str.extract(r'- ([0-9.]+)$', expand=False), errors='coerce')
+    staged = df.copy()
+    staged['salary_first'] = first
+    staged['salary_midpoint'] = (low + high) / 2
+    return staged
+
+
+def _merge_expr(column, how, dialect):
+    target, batch = f"t.{column}", f"b.{column}"
+    if how == "sum":
+        return f"IFNULL({target}, 0) + IFNULL({batch}, 0)"
+    func = {"min": "LEAST", "max": "GREATEST"}[how] if dialect == "bigquery" else how.upper()
+    # LEAST/GREATEST and SQLite's MIN/MAX return NULL if any argument is NULL
+    return f"COALESCE({func}({target}, {batch}), {target}, {batch})"
+
+
+def _key_match(keys, dialect):
+    op = "IS NOT DISTINCT FROM" if dialect == "bigquery" else "IS"
+    return " AND ".join(f"t.{name} {op} b.{name}" for name, _ in keys)
+
+
+def _create_table(table, spec, dialect):
+    columns = spec['keys'] + spec['values']
+    if dialect == "bigquery":
+        defs = ", ".join(f"{name} {field_type}" for name, field_type in columns)
+    else:
+        defs = ", ".join(f"{name} {SQLITE_TYPES[field_type]}" for name, field_type in columns)
+    return f"CREATE TABLE IF NOT EXISTS {table} ({defs})"
+
+
+def merge_script(warehouse, dataset_id, staging_table, table_id):
+    dialect = warehouse.dialect
+    staging = warehouse.sql_table(dataset_id, staging_table)
+    columns = ", ".join(name for name, _ in STANDARDIZED_SCHEMA)
+    ddl = []
+    statements = [f"INSERT INTO {warehouse.sql_table(dataset_id, table_id)} ({columns}) SELECT {columns} FROM {staging}"]
+
+    for name, spec in ROLLUP_TABLES.items():
+        table = warehouse.sql_table(dataset_id, name)
+        keys = ", ".join(key for key, _ in spec['keys'])
+        all_columns = [column for column, _ in spec['keys'] + spec['values']]
+        batch = f"SELECT {spec['select'].strip()} FROM {staging} WHERE {spec['where']} GROUP BY {keys}"
+        updates = ", ".join(f"{column} = {_merge_expr(column, how, dialect)}" for column, how in spec['merge'].items())
+        ddl.append(_create_table(table, spec, dialect))
+
+        if dialect == "bigquery":
+            statements.append(
+                f"MERGE {table} t USING ({batch}) b ON {_key_match(spec['keys'], dialect)} "
+                f"WHEN MATCHED THEN UPDATE SET {updates} "
+                f"WHEN NOT MATCHED THEN INSERT ({', '.join(all_columns)}) VALUES ({', '.join('b.' + c for c in all_columns)})"
+            )
+        else:
+            # SQLite has no MERGE: update matching groups, then insert the new ones
+            batch_table = f"batch_{name}"
+            statements.append(f"DROP TABLE IF EXISTS temp.{batch_table}")
+            statements.append(f"CREATE TEMP TABLE {batch_table} AS {batch}")
+            statements.append(
+                f"UPDATE {table} AS t SET {updates} "
+                f"FROM {batch_table} AS b WHERE {_key_match(spec['keys'], dialect)}"
+            )
+            statements.append(
+                f"INSERT INTO {table} ({', '.join(all_columns)}) SELECT {', '.join('b.' + c for c in all_columns)} "
+                f"FROM {batch_table} AS b WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE {_key_match(spec['keys'], dialect)})"
+            )
+
+    return _transaction(ddl, statements, dialect)
+
+
+def rebuild_script(warehouse, dataset_id, source):
+    # Replaces every rollup with the aggregate of source, a table or subquery
+    # with the STAGING_SCHEMA columns
+    dialect = warehouse.dialect
+    ddl, statements = [], []
+    for name, spec in ROLLUP_TABLES.items():
+        table = warehouse.sql_table(dataset_id, name)
+        keys = ", ".join(key for key, _ in spec['keys'])
+        all_columns = ", ".join(column for column, _ in spec['keys'] + spec['values'])
+        ddl.append(_create_table(table, spec, dialect))
+        # BigQuery refuses a DELETE without a WHERE clause
+        statements.append(f"DELETE FROM {table} WHERE TRUE")
+        statements.append(
+            f"INSERT INTO {table} ({all_columns}) "
+            f"SELECT {spec['select'].strip()} FROM {source} WHERE {spec['where']} GROUP BY {keys}"
+        )
+    return _transaction(ddl, statements, dialect)
+
+
+def _transaction(ddl, statements, dialect):
+    # BigQuery transactions only allow DML, so the rollup tables are created first
+    create = ";\n".join(ddl) + ";"
+    body = ";\n".join(statements) + ";"
+    if dialect == "bigquery":
+        return f"{create}\nBEGIN TRANSACTION;\n{body}\nCOMMIT TRANSACTION;"
+    return f"{create}\nBEGIN;\n{body}\nCOMMIT;"
+
+
+def load_with_rollups(warehouse, df, dataset_id='job_data', table_id='standardized_jobs', max_attempts=3,
+                      engine='pandas', merge_rollups=True):
+    # engine='arrow' takes a pyarrow Table from arrow_engine instead of a DataFrame
+    if not merge_rollups:
+        if engine == 'arrow':
+            return warehouse.load_arrow(df, dataset_id, table_id)
+        return warehouse.load_dataframe(df, dataset_id, table_id)
+    staging_table = f"_staging_{table_id}_{uuid.uuid4().hex[:8]}"
+    if engine == 'arrow':
+        import arrow_engine
+        warehouse.load_arrow(arrow_engine.add_salary_columns(df), dataset_id, staging_table,
+                             schema=STAGING_SCHEMA, truncate=True)
+    else:
+        warehouse.load_dataframe(add_salary_columns(df), dataset_id, staging_table, schema=STAGING_SCHEMA, truncate=True)
+    try:
+        warehouse.ensure_table(dataset_id, table_id, STANDARDIZED_SCHEMA)
+        script = merge_script(warehouse, dataset_id, staging_table, table_id)
+        for attempt in range(max_attempts):
+            try:
+                warehouse.execute_script(script, dataset_id)
+                break
+            except Exception as e:
+                # Concurrent MERGEs into the same rollup can abort each other's transaction
+                print(f"Rollup merge attempt {attempt + 1}/{max_attempts} failed: {str(e)}")
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(2 ** attempt)
+    finally:
+        warehouse.drop_table(dataset_id, staging_table)
+    return warehouse.table_ref(dataset_id, table_id)
+
+
+def rebuild(warehouse, dataset_id='job_data', table_id='standardized_jobs'):
+    """Recompute every rollup from the rows of the standardized table."""
+    warehouse.ensure_table(dataset_id, table_id, STANDARDIZED_SCHEMA)
+    table = warehouse.sql_table(dataset_id, table_id)
+    if warehouse.dialect == "bigquery":
+        salary = ", ".join(f"{expr} AS {name}" for name, expr in BIGQUERY_SALARY_COLUMNS.items())
+        warehouse.execute_script(rebuild_script(warehouse, dataset_id, f"(SELECT *, {salary} FROM {table})"), dataset_id)
+        return
+
+    # SQLite has no REGEXP_EXTRACT, so the salaries are parsed by pandas into a staging table
+    import pandas as pd
+
+    columns = [name for name, field_type in STANDARDIZED_SCHEMA if not is_array(field_type)]
+    rows = warehouse.query(f"SELECT {', '.join(columns)} FROM {table}", dataset_id)
+    staging_table = f"_rebuild_{table_id}_{uuid.uuid4().hex[:8]}"
+    warehouse.load_dataframe(add_salary_columns(pd.DataFrame(rows, columns=columns)), dataset_id, staging_table,
+                             schema=STAGING_SCHEMA, truncate=True)
+    try:
+        warehouse.execute_script(rebuild_script(warehouse, dataset_id, warehouse.sql_table(dataset_id, staging_table)),
+                                 dataset_id)
+    finally:
+        warehouse.drop_table(dataset_id, staging_table)
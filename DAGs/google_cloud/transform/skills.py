@@ -0,0 +1,174 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+# Skill, tool and seniority tags for each posting. All terms of skill_terms.txt
+# (or SKILL_TERMS_PATH) go into one Aho-Corasick automaton, so a document is
+# scanned once however many terms there are. pyahocorasick does the scan in C
+# when installed; PyAutomaton below is the same automaton in Python.
+#
+# Batches of at least SKILL_TAGGER_MIN_PARALLEL_ROWS postings are split across a
+# pool of SKILL_TAGGER_PROCESSES processes; the automaton is built before the
+# pool forks, so workers start with it. The service starts the pool from
+# warm_up, before its request threads exist, since forking a threaded process
+# can copy a lock another thread holds.
+
+TERMS_PATH = os.environ.get('SKILL_TERMS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_terms.txt'))
+PROCESSES = int(os.environ.get('SKILL_TAGGER_PROCESSES', os.cpu_count() or 1))
+MIN_PARALLEL_ROWS = int(os.environ.get('SKILL_TAGGER_MIN_PARALLEL_ROWS', 20000))
+CHUNK_ROWS = 5000
+
+
+def load_terms(path: str = TERMS_PATH) -> Dict[str, str]:
+    """Map every lowercased spelling to the name it is tagged with.
+
+    A line is either ``Name | spelling | ...``, where the name is a spelling
+    too, or ``Name: spelling | ...``, where only the spellings are matched.
+    """
+    terms = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, colon, rest = line.partition(':')
+            spellings = [spelling.strip() for spelling in (rest if colon else line).split('|') if spelling.strip()]
+            name = name.strip() if colon else spellings[0]
+            for spelling in spellings:
+                terms.setdefault(spelling.lower(), name)
+    return terms
+
+
+class PyAutomaton:
+    """The subset of ``ahocorasick.Automaton`` that SkillTagger uses."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[list] = [[]]
+
+    def add_word(self, word: str, value):
+        node = 0
+        for char in word:
+            following = self._goto[node].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = following
+        self._out[node].append(value)
+
+    def make_automaton(self):
+        # Breadth first, so a node's failure link is resolved before its children's
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                pending.append(child)
+
+    def iter(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for value in out[node]:
+                yield end, value
+
+
+def new_automaton():
+    try:
+        import ahocorasick
+        return ahocorasick.Automaton()
+    except ImportError:
+        return PyAutomaton()
+
+
+class SkillTagger:
+    def __init__(self, terms: Dict[str, str]):
+        self.automaton = new_automaton()
+        for spelling, name in terms.items():
+            self.automaton.add_word(spelling, (len(spelling), name))
+        self.automaton.make_automaton()
+
+    def tag(self, text: Optional[str]) -> List[str]:
+        # Names in order of first appearance; a match inside a longer word
+        # ("java" in "javascript") does not count
+        if not text:
+            return []
+        text = text.lower()
+        found = {}
+        for end, (length, name) in self.automaton.iter(text):
+            start = end - length + 1
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end + 1 < len(text) and text[end + 1].isalnum():
+                continue
+            found.setdefault(name, None)
+        return list(found)
+
+
+_tagger: Optional[SkillTagger] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_tagger() -> SkillTagger:
+    global _tagger
+    if _tagger is None:
+        _tagger = SkillTagger(load_terms())
+    return _tagger
+
+
+def _tag_chunk(texts: Sequence[Optional[str]]) -> List[List[str]]:
+    tagger = get_tagger()
+    return [tagger.tag(text) for text in texts]
+
+
+def get_pool(processes: int = PROCESSES) -> ProcessPoolExecutor:
+    # One pool per process, shared by the threads that tag batches
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            get_tagger()
+            _pool = ProcessPoolExecutor(max_workers=processes)
+            # A fork pool starts every worker on its first task, so fork them now
+            _pool.submit(len, ()).result()
+        return _pool
+
+
+def tag_texts(texts: Sequence[Optional[str]], processes: int = PROCESSES) -> List[List[str]]:
+    if processes <= 1 or len(texts) < MIN_PARALLEL_ROWS:
+        return _tag_chunk(texts)
+    chunks = [texts[i:i + CHUNK_ROWS] for i in range(0, len(texts), CHUNK_ROWS)]
+    return [tags for chunk in get_pool(processes).map(_tag_chunk, chunks) for tags in chunk]
+
+
+def documents(titles: Sequence[Optional[str]], descriptions: Sequence[Optional[str]]) -> List[str]:
+    return [f"{title or ''}\n{description or ''}" for title, description in zip(titles, descriptions)]
+
+
+def tag_table(table):
+    # Arrow engine: fills the skills column of a standardized Table
+    import pyarrow as pa
+
+    tags = tag_texts(documents(table.column('job_title').to_pylist(), table.column('job_description').to_pylist()))
+    return table.set_column(table.schema.get_field_index('skills'), 'skills', pa.array(tags, pa.list_(pa.string())))
+
+
+def tag_frame(df):
+    # pandas engine: same, for a standardized DataFrame
+    df = df.copy()
+    df['skills'] = tag_texts(documents(df['job_title'].tolist(), df['job_description'].tolist()))
+    return df
@@ -0,0 +1,93 @@
+import os
+import datetime
+from typing import Dict, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import arrow_engine
+from backends import STANDARDIZED_SCHEMA
+
+# Checks on the standardized batch before it is stored and loaded. Every rule is
+# an Arrow compute expression over a whole column, giving a mask of the rows that
+# break it; rows that break any rule are split off with their reasons, e.g.
+# "missing_job_url;bad_posted_date", and end up in quarantine/ instead of
+# BigQuery. Both engines share this: pandas batches are converted column by column.
+
+REQUIRED_FIELDS = ('job_title', 'job_url', 'posted_date')
+URL_PATTERN = r'^https?://[^\s/?#]+[^\s]*$'
+DATE_PATTERN = r'^[0-9]{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$'
+EARLIEST_POSTED_DATE = '2000-01-01'
+# Bounds for any figure in the salary string; hourly rates and "161.7k"-style
+# annual figures both fall inside
+SALARY_MIN = float(os.environ.get('SALARY_MIN', 1))
+SALARY_MAX = float(os.environ.get('SALARY_MAX', 1_000_000))
+
+
+def _blank(values):
+    return pc.fill_null(pc.equal(pc.utf8_trim_whitespace(values), ''), True)
+
+
+def _fails(values, matches):
+    # Present but not matching; missing values are left to the required-field rules
+    return pc.and_kleene(pc.invert(_blank(values)), pc.invert(pc.fill_null(matches, False)))
+
+
+def _calendar_dates(days):
+    """True where a YYYY-MM-DD string is a real calendar day.
+
+    >>> _calendar_dates(pa.array(['2024-02-29', '2024-13-01', '2024-01-32', '2023-02-29', '2024-1-05'])).to_pylist()
+    [True, False, False, False, False]
+    """
+    well_formed = pc.if_else(pc.match_substring_regex(days, DATE_PATTERN), days, pa.scalar(None, days.type))
+    parsed = pc.strptime(well_formed, format='%Y-%m-%d', unit='s', error_is_null=True)
+    # strptime rolls days past the month's end over (2023-02-29 is March 1st),
+    # so the parsed day must still be the one written
+    written = pc.cast(pc.utf8_slice_codeunits(well_formed, 8, 10), pa.int64())
+    return pc.fill_null(pc.equal(pc.day(parsed), written), False)
+
+
+def check(table: pa.Table, today: datetime.date = None) -> Dict[str, pa.ChunkedArray]:
+    """Return one boolean mask per rule, True where a row breaks it."""
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    latest = (today + datetime.timedelta(days=1)).isoformat()
+    rules = {f"missing_{field}": _blank(table.column(field)) for field in REQUIRED_FIELDS}
+
+    rules['bad_job_url'] = _fails(table.column('job_url'), pc.match_substring_regex(table.column('job_url'), URL_PATTERN))
+
+    posted = table.column('posted_date')
+    day = pc.utf8_slice_codeunits(posted, 0, 10)
+    in_range = pc.and_kleene(pc.greater_equal(day, EARLIEST_POSTED_DATE), pc.less_equal(day, latest))
+    rules['bad_posted_date'] = _fails(posted, pc.and_kleene(_calendar_dates(day), in_range))
+
+    first, low, high = arrow_engine.parse_salary(table.column('salary'))
+    out_of_range = pc.or_kleene(pc.less(first, SALARY_MIN), pc.greater(first, SALARY_MAX))
+    inverted = pc.greater(low, high)
+    rules['bad_salary'] = pc.fill_null(pc.or_kleene(out_of_range, inverted), False)
+    return rules
+
+
+def _quarantine(table: pa.Table, today: datetime.date = None):
+    rules = check(table, today)
+    # "rule;" per broken rule, joined; binary_join_element_wise returns nothing
+    # when every input is null, so the pieces are '' rather than null
+    reasons = pc.utf8_rtrim(pc.binary_join_element_wise(
+        *[pc.if_else(mask, f"{name};", '') for name, mask in rules.items()], ''), ';')
+    invalid = pc.not_equal(reasons, '')
+    counts = {name: pc.sum(mask).as_py() or 0 for name, mask in rules.items()}
+    return invalid, table.filter(invalid).append_column('reasons', reasons.filter(invalid)), counts
+
+
+def split(table: pa.Table, today: datetime.date = None) -> Tuple[pa.Table, pa.Table, Dict[str, int]]:
+    """Split ``table`` into valid rows and quarantined rows (with a ``reasons``
+    column); also return how many rows broke each rule."""
+    invalid, quarantined, counts = _quarantine(table, today)
+    return table.filter(pc.invert(invalid)), quarantined, counts
+
+
+def split_frame(df, today: datetime.date = None):
+    # pandas engine: same rules, run on an Arrow copy of the string columns
+    table = pa.table({name: pa.Array.from_pandas(df[name].astype('string')) if name in df.columns
+                      else pa.nulls(len(df), pa.string())
+                      for name, field_type in STANDARDIZED_SCHEMA if field_type == 'STRING'})
+    invalid, quarantined, counts = _quarantine(table, today)
+    return df[~invalid.to_numpy(zero_copy_only=False)], quarantined, counts
@@ -0,0 +1,97 @@
+import os
+import time
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+import serialization
+
+# Streaming-pull alternative to the /pubsub push endpoint:
+#
+#   python worker.py
+#
+# The subscriber holds at most WORKER_MAX_MESSAGES / WORKER_MAX_BYTES leased
+# messages and runs WORKER_CONCURRENCY transforms at once, so a burst of fetches
+# waits in the subscription instead of turning into push retries. The client
+# library extends the leases of messages that are waiting or still running (up
+# to WORKER_MAX_LEASE_SECONDS) and sends acks and nacks in batches.
+#
+# Messages only carry an object reference, so WORKER_MAX_MESSAGES is what bounds
+# memory: each leased message can have one raw file in flight.
+
+SUBSCRIPTION = os.environ.get('PUBSUB_SUBSCRIPTION', 'jobs-data-subscription')
+CONCURRENCY = int(os.environ.get('WORKER_CONCURRENCY', 4))
+MAX_MESSAGES = int(os.environ.get('WORKER_MAX_MESSAGES', 2 * CONCURRENCY))
+MAX_BYTES = int(os.environ.get('WORKER_MAX_BYTES', 10 * 1024 * 1024))
+MAX_LEASE_SECONDS = int(os.environ.get('WORKER_MAX_LEASE_SECONDS', 3600))
+MIN_LEASE_EXTENSION_SECONDS = int(os.environ.get('WORKER_MIN_LEASE_EXTENSION_SECONDS', 60))
+
+
+def handle(message):
+    started = time.perf_counter()
+    try:
+        message_data = serialization.loads(message.data)
+    except Exception:
+        # Redelivering cannot fix the payload
+        print(f"Dropping undecodable message {message.message_id}: {message.data[:200]!r}")
+        main.METRICS.inc("worker_messages_total", outcome="invalid")
+        message.ack()
+        return
+
+    # delivery_attempt is None unless the subscription has a dead-letter policy
+    outcome = main.process_message(message_data, message.delivery_attempt)
+    main.METRICS.inc("worker_messages_total", outcome=outcome, source=message_data.get('api_source'))
+    main.METRICS.observe("worker_message_seconds", time.perf_counter() - started,
+                         source=message_data.get('api_source'))
+    if outcome == 'retry':
+        message.nack()
+    else:
+        message.ack()
+
+
+def serve_http(port: int):
+    # Health checks and /metrics for platforms that expect a listening port
+    from werkzeug.serving import make_server
+    make_server('0.0.0.0', port, main.app, threaded=True).serve_forever()
+
+
+def run():
+    if main.backends.QUEUE_BACKEND != 'pubsub':
+        raise SystemExit("worker.py needs QUEUE_BACKEND=pubsub; the local queue only delivers in-process")
+
+    from google.cloud import pubsub_v1
+    from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
+
+    main.preload()
+    main.warm_up()
+    if os.environ.get('PORT'):
+        threading.Thread(target=serve_http, args=(int(os.environ['PORT']),), daemon=True).start()
+
+    subscriber = pubsub_v1.SubscriberClient()
+    subscription_path = subscriber.subscription_path(main.PROJECT_ID, SUBSCRIPTION)
+    flow_control = pubsub_v1.types.FlowControl(
+        max_messages=MAX_MESSAGES,
+        max_bytes=MAX_BYTES,
+        max_lease_duration=MAX_LEASE_SECONDS,
+        min_duration_per_lease_extension=MIN_LEASE_EXTENSION_SECONDS,
+    )
+    scheduler = ThreadScheduler(ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='transform'))
+    future = subscriber.subscribe(subscription_path, callback=handle, flow_control=flow_control,
+                                  scheduler=scheduler, await_callbacks_on_shutdown=True)
+
+    # Cloud Run and Kubernetes send SIGTERM; stop pulling and let running transforms finish
+    signal.signal(signal.SIGTERM, lambda signum, frame: future.cancel())
+    print(f"Pulling {subscription_path} with {CONCURRENCY} workers, "
+          f"at most {MAX_MESSAGES} messages / {MAX_BYTES} bytes outstanding")
+    with subscriber:
+        try:
+            future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            future.result()
+    print("Subscriber stopped")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,82 +1,97 @@
 import os
 import json
+import time
+import argparse
+import multiprocessing
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from api_connection.adzuna_api import AdzunaConnector
 from api_connection.jooble_api import JoobleConnector
 from api_connection.muse_api import MuseConnector
+from metrics import MetricsRegistry
+from dag import DAG
+import serialization
+import similarity
+
+METRICS = MetricsRegistry(prefix="job_pipeline")
+
+# Worker processes for transform_data; 1 runs the sources one after another
+TRANSFORM_WORKERS = int(os.environ.get('TRANSFORM_WORKERS', os.cpu_count() or 1))
+# Sources with more raw records than this are split into chunks of this size
+CHUNK_RECORDS = int(os.environ.get('TRANSFORM_CHUNK_RECORDS', 5000))
+
+FIELD_MAPPINGS = {
+    'adzuna': {
+        'job_title': 'title',
+        'job_description': 'description',
+        'job_url': 'redirect_url',
+        'posted_date': 'created',
+        'job_category': 'category.label',
+        'job_type': 'contract_time',
+        'company_name': 'company.display_name',
+        'salary': 'combined_salary_string',
+        'salary_min': 'salary_min',
+        'salary_max': 'salary_max',
+    },
+    'jooble': {
+        'job_title': 'title',
+        'job_description': 'snippet',
+        'job_url': 'link',
+        'posted_date': 'updated',
+        'job_category': 'type',
+        'job_type': 'type',
+        'company_name': 'company',
+        'salary': 'salary',
+    },
+    'muse': {
+        'job_title': 'name',
+        'job_description': 'contents',
+        'job_url': 'refs.landing_page',
+        'posted_date': 'publication_date',
+        'job_category': 'categories[0].name',
+        'job_type': '',
+        'company_name': 'company.name',
+        'salary': ''
+    }
+}
+
+def _write_json(path, data):
+    payload = serialization.dumps_bytes(data)
+    with open(path, "wb") as f:
+        f.write(payload)
+    METRICS.annotate(bytes_out=len(payload))
 
 # Extraction
+EXTRACT_PARAMS = {
+    'muse': {'categories': ["ux","design","management","ui","product","interaction","engineer"], 'page_count': 1, 'job_count_per_page': 5},
+    'adzuna': {'keywords': ["software","data","devops","engineer","IT","developer","designer","manager"]},
+    'jooble': {'keywords': ["engineer","designer"], 'locations': ["remote"], 'limit': 20},
+}
+
+def _connector(source):
+    if source == 'muse':
+        return MuseConnector(os.environ.get('MUSE_API_KEY'), metrics=METRICS)
+    if source == 'adzuna':
+        return AdzunaConnector(os.environ.get('ADZUNA_APP_ID'), os.environ.get('ADZUNA_APP_KEY'), metrics=METRICS)
+    return JoobleConnector(os.environ.get('JOOBLE_API_KEY'), metrics=METRICS)
+
+def extract_source(source, output_dir='data'):
+    os.makedirs(output_dir, exist_ok=True)
+    with METRICS.span("extract", source=source) as span:
+        jobs = _connector(source).extract_jobs(**EXTRACT_PARAMS[source])
+        span["records"] = len(jobs)
+    with METRICS.span("write_raw", source=source):
+        _write_json(f"{output_dir}/{source}_jobs.json", jobs)
+    return jobs
+
 def extract_data():
-    os.makedirs('data', exist_ok=True)
-
-    muse_api_key = os.environ.get('MUSE_API_KEY')
-    muse_connector = MuseConnector(muse_api_key)
-    muse_jobs = muse_connector.extract_jobs(categories=["ux","design","management","ui","product","interaction","engineer"], page_count=1, job_count_per_page=5)
-    with open("data/muse_jobs.json", "w") as f:
-            f.write(json.dumps(muse_jobs, indent=2))
-
-    adzuna_api_id = os.environ.get('ADZUNA_APP_ID')
-    adzuna_api_key = os.environ.get('ADZUNA_APP_KEY')
-    adzuna_connector = AdzunaConnector(adzuna_api_id, adzuna_api_key)
-    adzuna_jobs = adzuna_connector.extract_jobs(keywords=["software","data","devops","engineer","IT","developer","designer","manager"])
-    with open("data/adzuna_jobs.json", "w") as f:
-            f.write(json.dumps(adzuna_jobs, indent=2)) 
-
-    jooble_api_key = os.environ.get('JOOBLE_API_KEY')
-    jooble_connector = JoobleConnector(jooble_api_key)
-    jooble_jobs = jooble_connector.extract_jobs(keywords=["engineer","designer"], locations=["remote"], limit=20)
-    with open("data/jooble_jobs.json", "w") as f:
-            f.write(json.dumps(jooble_jobs, indent=4))
+    for source in ('muse', 'adzuna', 'jooble'):
+        extract_source(source)
 
 # Transformation
-def transform_data():
-    os.makedirs('transformed_data', exist_ok=True)
-
-    df_adzuna = pd.read_json('data/adzuna_jobs.json')
-    df_jooble = pd.read_json('data/jooble_jobs.json')
-    df_muse = pd.read_json('data/muse_jobs.json')
-
-    field_mappings = {
-        'df_adzuna': {
-            'job_title': 'title',
-            'job_description': 'description',
-            'job_url': 'redirect_url',
-            'posted_date': 'created',
-            'job_category': 'category.label',
-            'job_type': 'contract_time',
-            'company_name': 'company.display_name',
-            'salary': 'combined_salary_string',   
-            'salary_min': 'salary_min',
-            'salary_max': 'salary_max',
-        },
-        'df_jooble': {
-            'job_title': 'title',
-            'job_description': 'snippet',
-            'job_url': 'link',
-            'posted_date': 'updated',
-            'job_category': 'type',
-            'job_type': 'type',
-            'company_name': 'company',
-            'salary': 'salary',
-        },
-        'df_muse': {
-            'job_title': 'name',
-            'job_description': 'contents',
-            'job_url': 'refs.landing_page',
-            'posted_date': 'publication_date',
-            'job_category': 'categories[0].name', 
-            'job_type': '',   
-            'company_name': 'company.name',
-            'salary': ''
-        }
-    }
-
-    mapping_adzuna = field_mappings['df_adzuna']
-    mapping_jooble = field_mappings['df_jooble']
-    mapping_muse = field_mappings['df_muse']
+def standardize_adzuna(df_adzuna):
+    mapping_adzuna = FIELD_MAPPINGS['adzuna']
     df_standardized_adzuna = pd.DataFrame()
-    df_standardized_jooble = pd.DataFrame()
-    df_standardized_muse = pd.DataFrame()
 
     for new_col, original_col in mapping_adzuna.items():
         if new_col not in ['salary_min', 'salary_max']:
@@ -101,12 +116,22 @@ def transform_data():
             df_standardized_adzuna['salary'] = df_standardized_adzuna['salary'].str.replace('nan', '', regex=False)
         else:
             df_standardized_adzuna['salary'] = None
+    return df_standardized_adzuna
+
+def standardize_jooble(df_jooble):
+    mapping_jooble = FIELD_MAPPINGS['jooble']
+    df_standardized_jooble = pd.DataFrame()
 
     for new_col, original_col in mapping_jooble.items():
         if original_col in df_jooble.columns:
             df_standardized_jooble[new_col] = df_jooble[original_col]
         else:
             df_standardized_jooble[new_col] = None
+    return df_standardized_jooble
+
+def standardize_muse(df_muse):
+    mapping_muse = FIELD_MAPPINGS['muse']
+    df_standardized_muse = pd.DataFrame()
 
     for new_col, original_col in mapping_muse.items():
         if '.' in original_col:
@@ -124,12 +149,157 @@ def transform_data():
                 df_standardized_muse[new_col] = df_muse[original_col]
             else:
                 df_standardized_muse[new_col] = None
+    return df_standardized_muse
+
+STANDARDIZERS = {
+    'adzuna': standardize_adzuna,
+    'jooble': standardize_jooble,
+    'muse': standardize_muse,
+}
 
-    combined_df = pd.concat([df_standardized_adzuna, df_standardized_jooble, df_standardized_muse], ignore_index=True)
-    combined_df.to_json('transformed_data/jobs_data_standardized.json', orient='records', indent=4)
-    combined_df.to_csv('transformed_data/jobs_data_standardized.csv', index=False)
+def _chunks(records, chunk_records):
+    return [records[i:i + chunk_records] for i in range(0, len(records), chunk_records)] or [records]
+
+def _read_json(path):
+    with open(path, 'rb') as f:
+        payload = f.read()
+    return serialization.loads(payload), len(payload)
+
+def _read_source(source, records):
+    # Every transform path builds its frame here, so they format salaries alike:
+    # bounds are floats even when a file or chunk holds only whole numbers
+    df = pd.DataFrame(records)
+    for column in ('salary_min', 'salary_max'):
+        if source == 'adzuna' and column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+    return df
+
+def _standardize_chunk(source, records):
+    # Runs in a worker process
+    started = time.perf_counter()
+    df = _read_source(source, records)
+    return STANDARDIZERS[source](df), time.perf_counter() - started
+
+def _standardize_chunks(tasks, workers, mp_context=None):
+    # tasks are (source, records) chunks; the frames come back in task order
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=mp_context) as executor:
+        futures = [executor.submit(_standardize_chunk, source, chunk) for source, chunk in tasks]
+        standardized = []
+        for (source, _), future in zip(tasks, futures):
+            df_standardized, seconds = future.result()
+            METRICS.observe("chunk_transform_seconds", seconds, source=source)
+            standardized.append(df_standardized)
+    return standardized
+
+def _transform_parallel(input_dir, workers, chunk_records):
+    tasks = []
+    for source in STANDARDIZERS:
+        path = f'{input_dir}/{source}_jobs.json'
+        with METRICS.span("read_raw", source=source) as span:
+            records, size = _read_json(path)
+            span["records"] = len(records)
+            span["bytes_in"] = size
+        tasks.extend((source, chunk) for chunk in _chunks(records, chunk_records))
+
+    with METRICS.span("transform", source="parallel") as span:
+        # Collected in submission order, so rows keep the serial source/chunk order
+        standardized = _standardize_chunks(tasks, workers)
+        span["records"] = sum(len(df) for df in standardized)
+    return standardized
+
+def _transform_serial(input_dir):
+    standardized = []
+    for source, standardize in STANDARDIZERS.items():
+        path = f'{input_dir}/{source}_jobs.json'
+        with METRICS.span("read_raw", source=source) as span:
+            records, size = _read_json(path)
+            df = _read_source(source, records)
+            span["records"] = len(df)
+            span["bytes_in"] = size
+        with METRICS.span("transform", source=source) as span:
+            df_standardized = standardize(df)
+            span["records"] = len(df_standardized)
+        standardized.append(df_standardized)
+    return standardized
+
+def transform_source(source, jobs, workers=None, chunk_records=CHUNK_RECORDS):
+    """Standardize one source's extracted records, a chunk per worker process.
+
+    The DAG's transform.<source> tasks call this from its threads, so the pool
+    is started by forkserver rather than by forking a threaded process.
+    """
+    workers = workers or TRANSFORM_WORKERS
+    chunks = _chunks(jobs, chunk_records)
+    if workers > 1 and len(chunks) > 1:
+        frames = _standardize_chunks([(source, chunk) for chunk in chunks], workers,
+                                     multiprocessing.get_context('forkserver'))
+        return pd.concat(frames, ignore_index=True)
+    return _standardize_chunk(source, jobs)[0]
+
+def transform_data(input_dir='data', output_dir='transformed_data', workers=None, chunk_records=CHUNK_RECORDS):
+    os.makedirs(output_dir, exist_ok=True)
+
+    workers = workers or TRANSFORM_WORKERS
+    if workers > 1:
+        standardized = _transform_parallel(input_dir, workers, chunk_records)
+    else:
+        standardized = _transform_serial(input_dir)
+
+    combined_df = pd.concat(standardized, ignore_index=True)
+    export_data(combined_df, output_dir)
+    return combined_df
+
+def export_data(combined_df, output_dir='transformed_data'):
+    os.makedirs(output_dir, exist_ok=True)
+    with METRICS.span("export") as span:
+        combined_df.to_json(f'{output_dir}/jobs_data_standardized.json', orient='records',
+                            indent=4 if serialization.PRETTY else None)
+        combined_df.to_csv(f'{output_dir}/jobs_data_standardized.csv', index=False)
+        span["records"] = len(combined_df)
+        span["bytes_out"] = (os.path.getsize(f'{output_dir}/jobs_data_standardized.json')
+                             + os.path.getsize(f'{output_dir}/jobs_data_standardized.csv'))
+    return [f'{output_dir}/jobs_data_standardized.json', f'{output_dir}/jobs_data_standardized.csv']
+
+def build_dag(input_dir='data', output_dir='transformed_data', cache_dir='.dag_cache', max_workers=None,
+              index_dir=similarity.INDEX_DIR, transform_workers=None, chunk_records=CHUNK_RECORDS):
+    """extract.<source> -> transform.<source> -> merge -> export, and merge -> index.
+
+    Extracts are keyed by their connector parameters and transforms by their
+    source's FIELD_MAPPINGS entry, so changing one source's mapping reruns only
+    that source's transform (and the merge/export downstream of it). Each
+    transform splits its source into chunk_records chunks across
+    transform_workers processes, as transform_data does.
+    """
+    dag = DAG("job_pipeline", cache_dir=cache_dir, max_workers=max_workers, metrics=METRICS)
+    for source, standardize in STANDARDIZERS.items():
+        dag.add(f"extract.{source}", lambda source=source: extract_source(source, input_dir),
+                key=EXTRACT_PARAMS[source], code=[extract_source, _connector])
+        dag.add(f"transform.{source}",
+                lambda jobs, source=source: transform_source(source, jobs, transform_workers, chunk_records),
+                deps=[f"extract.{source}"], key=FIELD_MAPPINGS[source],
+                code=[standardize, transform_source, _standardize_chunk, _read_source])
+    dag.add("merge", lambda *frames: pd.concat(frames, ignore_index=True),
+            deps=[f"transform.{source}" for source in STANDARDIZERS])
+    # Export writes files, so it always runs
+    dag.add("export", lambda combined_df: export_data(combined_df, output_dir), deps=["merge"],
+            code=[export_data], cache=False)
+    # Adds this run's new postings to the similarity index, so it always runs too
+    dag.add("index", lambda combined_df: similarity.update(combined_df, index_dir), deps=["merge"],
+            code=[similarity.update], cache=False)
+    return dag
 
 if __name__ == "__main__":
-    extract_data()
-    transform_data()
+    parser = argparse.ArgumentParser(description='Run the job data pipeline DAG')
+    parser.add_argument('--force', nargs='*', metavar='TASK',
+                        help='rerun every task, or only the named tasks (e.g. extract.muse)')
+    parser.add_argument('--workers', type=int, help='tasks to run at once')
+    parser.add_argument('--transform-workers', type=int, help='processes per source transform (default TRANSFORM_WORKERS)')
+    parser.add_argument('--cache-dir', default='.dag_cache')
+    args = parser.parse_args()
+
+    force = True if args.force == [] else (args.force or False)
+    build_dag(cache_dir=args.cache_dir, max_workers=args.workers,
+              transform_workers=args.transform_workers).run(force=force)
+    summary = METRICS.write_summary('transformed_data/run_summary.json')
+    print(json.dumps(summary["stages"], indent=2))
     print("Pipeline executed successfully.")
\ No newline at end of file
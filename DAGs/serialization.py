@@ -0,0 +1,95 @@
+import os
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# JSON encode/decode through the fastest library installed: orjson, then
+# msgspec, then the standard library. SERIALIZATION_BACKEND forces one, and
+# JSON_PRETTY=1 turns on indented output wherever callers don't choose.
+PRETTY = os.environ.get('JSON_PRETTY', '0') == '1'
+
+Encoder = Callable[[Any, bool], bytes]
+Decoder = Callable[[Any], Any]
+
+
+def _stdlib() -> Tuple[Encoder, Decoder]:
+    def encode(obj: Any, pretty: bool) -> bytes:
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return encode, json.loads
+
+
+def _orjson() -> Tuple[Encoder, Decoder]:
+    import orjson
+
+    def encode(obj: Any, pretty: bool) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return encode, orjson.loads
+
+
+def _msgspec() -> Tuple[Encoder, Decoder]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def encode(obj: Any, pretty: bool) -> bytes:
+        payload = encoder.encode(obj)
+        return msgspec.json.format(payload, indent=2) if pretty else payload
+    return encode, decoder.decode
+
+
+BACKENDS: Dict[str, Callable[[], Tuple[Encoder, Decoder]]] = {
+    'orjson': _orjson,
+    'msgspec': _msgspec,
+    'json': _stdlib,
+}
+
+
+def load_backend(name: Optional[str] = None) -> Tuple[str, Encoder, Decoder]:
+    names = [name] if name else list(BACKENDS)
+    for candidate in names:
+        try:
+            encode, decode = BACKENDS[candidate]()
+            return candidate, encode, decode
+        except ImportError:
+            if name:
+                raise
+    raise ValueError("No JSON backend available")
+
+
+def available_backends() -> Dict[str, Tuple[Encoder, Decoder]]:
+    loaded = {}
+    for name, factory in BACKENDS.items():
+        try:
+            loaded[name] = factory()
+        except ImportError:
+            pass
+    return loaded
+
+
+BACKEND, _encode, _decode = load_backend(os.environ.get('SERIALIZATION_BACKEND'))
+
+
+def dumps_bytes(obj: Any, pretty: Optional[bool] = None) -> bytes:
+    return _encode(obj, PRETTY if pretty is None else pretty)
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None) -> str:
+    return dumps_bytes(obj, pretty).decode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    # Accepts str or bytes, like json.loads
+    return _decode(data)
+
+
+def dumps_lines(records: Any) -> bytes:
+    # Newline-delimited JSON, one compact record per line
+    return b''.join(_encode(record, False) + b'\n' for record in records)
+
+
+def loads_lines(data: Any) -> list:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return [_decode(line) for line in data.splitlines() if line.strip()]
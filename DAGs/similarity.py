@@ -0,0 +1,398 @@
+import os
+import re
+import json
+import html
+import array
+import time
+import zlib
+import shutil
+import hashlib
+import argparse
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# "Jobs like this" lookups over the standardized postings, with no service
+# behind them. Title and description are hashed into a sparse TF-IDF vector of
+# SIMILARITY_FEATURES dimensions. Each update appends the postings whose job_url
+# is new as one immutable segment of .npy files, opened with mmap_mode='r', so
+# opening the index only reads the manifest. A segment holds its vectors twice:
+# by posting, to look up a posting's own vector, and inverted by feature, so a
+# query only touches the postings that share one of its terms.
+#
+#   <index>/manifest.json     feature count, postings indexed, segment names
+#   <index>/df.npy            document frequency of every feature
+#   <index>/<segment>/        rows_*.npy, postings_*.npy, urls_*.npy, meta*.npy
+#
+# A segment is weighted with the idf current when it is written; queries use
+# the latest. Updates must not run concurrently; queries can run during one.
+
+INDEX_DIR = os.environ.get('SIMILARITY_INDEX_DIR', 'similarity_index')
+N_FEATURES = int(os.environ.get('SIMILARITY_FEATURES', 2 ** 18))
+# Past this many segments an update merges them all into one
+MAX_SEGMENTS = int(os.environ.get('SIMILARITY_MAX_SEGMENTS', 8))
+# A query keeps its highest weighted terms, and drops terms found in more than
+# MAX_DF of the postings: they barely move the ranking but have the longest lists
+QUERY_TERMS = 64
+MAX_DF = 0.5
+TITLE_WEIGHT = 3
+WRITE_CHUNK = 1 << 22
+# Query parameters that differ between crawls of the same posting (Adzuna's
+# redirect tracking), dropped along with utm_* before a job_url is hashed
+VOLATILE_PARAMS = ('se', 'v')
+META_FIELDS = ('job_title', 'company_name', 'job_url', 'posted_date', 'job_category', 'source')
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#]*')
+STOP_WORDS = frozenset("""
+a about above after all also am an and any are as at be been being both but by can could did do does
+doing during each few for from further had has have having he her here hers him his how if in into is
+it its just me more most my no nor not now of off on once only or other our ours out over own same
+she should so some such than that the their theirs them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your
+yours within across per via etc including include includes
+""".split())
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def url_hash(url: str) -> int:
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key not in VOLATILE_PARAMS and not key.startswith('utm_')]
+    return _hash64(urlunsplit(parts._replace(query=urlencode(query), fragment='')).encode('utf-8'))
+
+
+def words(text: Any) -> List[str]:
+    # Muse descriptions are HTML
+    if not isinstance(text, str) or not text:
+        return []
+    return TOKEN_PATTERN.findall(html.unescape(TAG_PATTERN.sub(' ', text)).lower())
+
+
+class HashingVectorizer:
+    def __init__(self, n_features: int = N_FEATURES):
+        self.n_features = n_features
+        # word -> feature, or -1 for words that are not indexed
+        self._features: Dict[str, int] = {}
+
+    def feature(self, word: str) -> int:
+        if len(word) < 2 or word in STOP_WORDS:
+            feature = -1
+        else:
+            feature = zlib.crc32(word.encode('utf-8')) % self.n_features
+        if len(self._features) < 1_000_000:
+            self._features[word] = feature
+        return feature
+
+    def counts(self, title: Any, description: Any = None) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        cache = self._features
+        for weight, text in ((TITLE_WEIGHT, title), (1, description)):
+            for word in words(text):
+                feature = cache.get(word)
+                if feature is None:
+                    feature = self.feature(word)
+                if feature >= 0:
+                    counts[feature] = counts.get(feature, 0) + weight
+        return counts
+
+    def term_frequencies(self, titles: Sequence[Any], descriptions: Sequence[Any]):
+        """CSR arrays (indptr, features, log tf) of the postings, features sorted within a row."""
+        # array.array keeps a large batch at 4 bytes a value until it becomes numpy
+        indptr, features, tf = array.array('q', [0]), array.array('i'), array.array('f')
+        for title, description in zip(titles, descriptions):
+            counts = self.counts(title, description)
+            for feature in sorted(counts):
+                features.append(feature)
+                tf.append(counts[feature])
+            indptr.append(len(features))
+        return (np.frombuffer(indptr, np.int64), np.frombuffer(features, np.int32),
+                np.log1p(np.frombuffer(tf, np.float32)))
+
+
+def idf_weights(df: np.ndarray, documents: int) -> np.ndarray:
+    return (np.log((1 + documents) / (1 + df.astype(np.float64))) + 1).astype(np.float32)
+
+
+def normalize_rows(indptr: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+    return (weights / np.maximum(norms, 1e-12)[rows]).astype(np.float32)
+
+
+def _save(path: str, name: str, values: np.ndarray):
+    np.save(os.path.join(path, f"{name}.npy"), values)
+
+
+def _save_gathered(path: str, name: str, length: int, dtype, gather):
+    # Filled WRITE_CHUNK values at a time, so a merge holds no second full-size copy
+    values = np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode='w+', dtype=dtype, shape=(length,))
+    for lo in range(0, length, WRITE_CHUNK):
+        hi = min(lo + WRITE_CHUNK, length)
+        values[lo:hi] = gather(lo, hi)
+    values.flush()
+
+
+class Segment:
+    def __init__(self, path: str):
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+        self.path = path
+        self.row_indptr, self.row_features, self.row_weights = load('rows_indptr'), load('rows_features'), load('rows_weights')
+        self.postings_indptr, self.postings_rows, self.postings_weights = \
+            load('postings_indptr'), load('postings_rows'), load('postings_weights')
+        self.urls_sorted, self.url_rows = load('urls_sorted'), load('urls_rows')
+        self.meta, self.meta_offsets = load('meta'), load('meta_offsets')
+        self.rows = len(self.row_indptr) - 1
+
+    @classmethod
+    def write(cls, path: str, n_features: int, row_indptr: np.ndarray, row_features: np.ndarray,
+              row_weights: np.ndarray, urls: np.ndarray, meta: np.ndarray, meta_offsets: np.ndarray) -> "Segment":
+        # Written to a temporary directory first, so a segment either exists whole or not at all
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        postings_indptr = np.zeros(n_features + 1, np.int64)
+        np.cumsum(np.bincount(row_features, minlength=n_features), out=postings_indptr[1:])
+        url_order = np.argsort(urls, kind='stable')
+        for name, values in (('rows_indptr', row_indptr), ('rows_features', row_features), ('rows_weights', row_weights),
+                             ('postings_indptr', postings_indptr), ('urls_sorted', urls[url_order]),
+                             ('urls_rows', url_order.astype(np.int32)), ('meta', meta), ('meta_offsets', meta_offsets)):
+            _save(tmp_path, name, values)
+        # Stable, so each postings list is in row order
+        order = np.argsort(row_features, kind='stable')
+        _save_gathered(tmp_path, 'postings_rows', len(order), np.int32,
+                       lambda lo, hi: np.searchsorted(row_indptr, order[lo:hi], side='right') - 1)
+        _save_gathered(tmp_path, 'postings_weights', len(order), np.float32, lambda lo, hi: row_weights[order[lo:hi]])
+        del order
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def urls(self) -> np.ndarray:
+        urls = np.empty(self.rows, np.uint64)
+        urls[self.url_rows] = self.urls_sorted
+        return urls
+
+    def find(self, url_hashes: np.ndarray) -> np.ndarray:
+        # Row of each hash, or -1
+        if not self.rows:
+            return np.full(len(url_hashes), -1)
+        positions = np.minimum(np.searchsorted(self.urls_sorted, url_hashes), self.rows - 1)
+        return np.where(self.urls_sorted[positions] == url_hashes, self.url_rows[positions], -1)
+
+    def vector(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = self.row_indptr[row], self.row_indptr[row + 1]
+        return np.asarray(self.row_features[lo:hi]), np.asarray(self.row_weights[lo:hi])
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return json.loads(self.meta[self.meta_offsets[row]:self.meta_offsets[row + 1]].tobytes())
+
+    def scores(self, features: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        # A row appears at most once per feature's postings, so the fancy-indexed add is exact
+        scores = np.zeros(self.rows, np.float32)
+        for feature, weight in zip(features, weights):
+            lo, hi = self.postings_indptr[feature], self.postings_indptr[feature + 1]
+            if hi > lo:
+                scores[self.postings_rows[lo:hi]] += weight * self.postings_weights[lo:hi]
+        return scores
+
+
+class SimilarityIndex:
+    def __init__(self, path: str = INDEX_DIR, n_features: int = N_FEATURES):
+        self.path = path
+        manifest_path = os.path.join(path, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'features': n_features, 'documents': 0, 'next_segment': 0, 'segments': []}
+        # An existing index keeps the feature count it was built with
+        self.vectorizer = HashingVectorizer(self.manifest['features'])
+        df_path = os.path.join(path, 'df.npy')
+        self.df = np.load(df_path, mmap_mode='r') if os.path.exists(df_path) else np.zeros(self.manifest['features'], np.int64)
+        self.segments = [Segment(os.path.join(path, name)) for name in self.manifest['segments']]
+        self._idf = None
+
+    @property
+    def documents(self) -> int:
+        return self.manifest['documents']
+
+    @property
+    def idf(self) -> np.ndarray:
+        if self._idf is None:
+            self._idf = idf_weights(self.df, self.documents)
+        return self._idf
+
+    def contains(self, url_hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(url_hashes), bool)
+        for segment in self.segments:
+            found |= segment.find(url_hashes) >= 0
+        return found
+
+    def _commit(self, df: np.ndarray, manifest: Dict[str, Any]):
+        tmp_path = os.path.join(self.path, 'df.tmp.npy')
+        np.save(tmp_path, df)
+        os.replace(tmp_path, os.path.join(self.path, 'df.npy'))
+        tmp_path = os.path.join(self.path, 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.path, 'manifest.json'))
+        self.manifest, self.df, self._idf = manifest, np.load(os.path.join(self.path, 'df.npy'), mmap_mode='r'), None
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Index the records whose job_url is not indexed yet, as one new segment; return how many."""
+        new, hashes = [], {}
+        for record in records:
+            url = record.get('job_url')
+            if isinstance(url, str) and url:
+                key = url_hash(url)
+                if key not in hashes:
+                    hashes[key] = None
+                    new.append(record)
+        hashes = np.fromiter(hashes, np.uint64, len(hashes))
+        keep = ~self.contains(hashes)
+        new, hashes = [record for record, kept in zip(new, keep) if kept], hashes[keep]
+        if not new:
+            return 0
+
+        indptr, features, tf = self.vectorizer.term_frequencies([r.get('job_title') for r in new],
+                                                                [r.get('job_description') for r in new])
+        df = np.array(self.df, np.int64)
+        df += np.bincount(features, minlength=len(df))
+        documents = self.documents + len(new)
+        weights = normalize_rows(indptr, tf * idf_weights(df, documents)[features])
+
+        meta = [json.dumps({field: record.get(field) if isinstance(record.get(field), str) else None
+                            for field in META_FIELDS}).encode('utf-8') for record in new]
+        meta_offsets = np.zeros(len(meta) + 1, np.int64)
+        np.cumsum([len(m) for m in meta], out=meta_offsets[1:])
+        meta_bytes = np.frombuffer(b''.join(meta), np.uint8)
+
+        os.makedirs(self.path, exist_ok=True)
+        name = f"segment-{self.manifest['next_segment']:06d}"
+        self.segments.append(Segment.write(os.path.join(self.path, name), len(df), indptr, features, weights,
+                                           hashes, meta_bytes, meta_offsets))
+        self._commit(df, {**self.manifest, 'documents': documents, 'next_segment': self.manifest['next_segment'] + 1,
+                          'segments': self.manifest['segments'] + [name]})
+        if len(self.segments) > MAX_SEGMENTS:
+            self.merge()
+        return len(new)
+
+    def merge(self):
+        """Rewrite all segments as one; their weights are kept as they are."""
+        if len(self.segments) < 2:
+            return
+        old = self.segments
+        indptr = [np.zeros(1, np.int64)]
+        meta_offsets = [np.zeros(1, np.int64)]
+        for segment in old:
+            indptr.append(np.asarray(segment.row_indptr[1:]) + indptr[-1][-1])
+            meta_offsets.append(np.asarray(segment.meta_offsets[1:]) + meta_offsets[-1][-1])
+        name = f"segment-{self.manifest['next_segment']:06d}"
+        merged = Segment.write(
+            os.path.join(self.path, name), len(self.df), np.concatenate(indptr),
+            np.concatenate([segment.row_features for segment in old]),
+            np.concatenate([segment.row_weights for segment in old]),
+            np.concatenate([segment.urls() for segment in old]),
+            np.concatenate([segment.meta for segment in old]), np.concatenate(meta_offsets))
+        self.segments = [merged]
+        self._commit(np.array(self.df), {**self.manifest, 'next_segment': self.manifest['next_segment'] + 1,
+                                         'segments': [name]})
+        for segment in old:
+            shutil.rmtree(segment.path, ignore_errors=True)
+        print(f"Merged {len(old)} similarity index segments into {name} ({merged.rows} postings)")
+
+    def _query(self, features: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Common terms dropped, then the QUERY_TERMS heaviest terms
+        common = self.df[features] > MAX_DF * self.documents
+        features, weights = features[~common], weights[~common]
+        if len(features) > QUERY_TERMS:
+            top = np.argpartition(weights, -QUERY_TERMS)[-QUERY_TERMS:]
+            features, weights = features[top], weights[top]
+        return features, weights / max(float(np.linalg.norm(weights)), 1e-12)
+
+    def similar(self, text: Optional[str] = None, url: Optional[str] = None, k: int = 10) -> List[Dict[str, Any]]:
+        """Top ``k`` postings most like ``text``, or like the indexed posting at ``url`` (which is left out)."""
+        exclude = None
+        if url is not None:
+            target = np.array([url_hash(url)], np.uint64)
+            for position, segment in enumerate(self.segments):
+                row = int(segment.find(target)[0])
+                if row >= 0:
+                    exclude = (position, row)
+                    features, weights = segment.vector(row)
+                    break
+            else:
+                raise KeyError(f"{url} is not in the similarity index")
+        else:
+            counts = self.vectorizer.counts(text)
+            features = np.array(list(counts), np.int64)
+            weights = np.log1p(np.array(list(counts.values()), np.float32)) * self.idf[features] if counts \
+                else np.zeros(0, np.float32)
+        features, weights = self._query(np.asarray(features, np.int64), np.asarray(weights, np.float32))
+        if not len(features):
+            return []
+
+        candidates = []
+        for position, segment in enumerate(self.segments):
+            scores = segment.scores(features, weights)
+            if exclude and exclude[0] == position:
+                scores[exclude[1]] = 0
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            candidates.extend((float(scores[row]), position, int(row)) for row in top if scores[row] > 0)
+        candidates.sort(key=lambda candidate: -candidate[0])
+        return [{**self.segments[position].record(row), 'score': round(score, 4)}
+                for score, position, row in candidates[:k]]
+
+
+def _read_standardized(path: str):
+    import pandas as pd
+
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_json(path, lines=path.endswith('.ndjson'))
+
+
+def update(df, index_dir: str = INDEX_DIR) -> Dict[str, int]:
+    """Add the new postings of a standardized DataFrame (one pipeline run) to the index."""
+    index = SimilarityIndex(index_dir)
+    started = time.perf_counter()
+    added = index.add(df.to_dict('records'))
+    print(f"Indexed {added} new of {len(df)} postings in {time.perf_counter() - started:.2f}s "
+          f"({index.documents} postings, {len(index.segments)} segments)")
+    return {'added': added, 'documents': index.documents, 'segments': len(index.segments)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build and query the "jobs like this" similarity index')
+    parser.add_argument('--index', default=INDEX_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    add_parser = commands.add_parser('update', help='index the new postings of standardized files')
+    add_parser.add_argument('paths', nargs='+', help='.json, .ndjson, .csv or .parquet output of transform_data')
+    query_parser = commands.add_parser('query', help='print the postings most like a text or an indexed posting')
+    query_parser.add_argument('text', nargs='?')
+    query_parser.add_argument('--url', help='job_url of an indexed posting')
+    query_parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        for path in args.paths:
+            update(_read_standardized(path), args.index)
+    else:
+        if not args.text and not args.url:
+            parser.error('query needs a text or --url')
+        started = time.perf_counter()
+        index = SimilarityIndex(args.index)
+        opened = time.perf_counter()
+        results = index.similar(args.text, args.url, args.k)
+        finished = time.perf_counter()
+        for result in results:
+            print(json.dumps(result))
+        print(f"Opened in {(opened - started) * 1000:.1f} ms, queried in {(finished - opened) * 1000:.1f} ms")
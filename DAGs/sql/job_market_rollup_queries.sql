@@ -0,0 +1,58 @@
+-- The reports from job_market_queries.sql, read from the rollup tables instead of standardized_jobs --
+
+-- 1. Get a monthly job posting trends by company, source, and category, including job counts and average salary --
+SELECT
+  company_name,
+  source,
+  month,
+  job_category,
+  SUM(job_count) AS job_count,
+  SAFE_DIVIDE(SUM(salary_sum), SUM(salary_count)) AS avg_salary
+FROM `thermal-slice-458921-t9.job_data.monthly_job_trends`
+GROUP BY company_name, month, job_category, source
+LIMIT 1000
+
+-- 2. Top 10 (or less) companies hiring most in each job category this month --
+SELECT
+    job_category,
+    company_name,
+    source,
+    month,
+    SUM(job_count) AS total_postings
+FROM `thermal-slice-458921-t9.job_data.monthly_job_trends`
+WHERE month = FORMAT_DATE('%Y-%m', CURRENT_DATE())
+GROUP BY job_category, company_name, source, month
+QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY job_category
+    ORDER BY total_postings DESC
+) <= 10
+
+-- 3. New companies in the job market this week, sorted by job counts in each company --
+SELECT
+    company_name,
+    SUM(job_count) AS job_count
+FROM `thermal-slice-458921-t9.job_data.daily_company_postings`
+WHERE
+    posted_day >= FORMAT_DATE('%Y-%m-%d', DATE_SUB(CURRENT_DATE(), INTERVAL 7 DAY))
+GROUP BY company_name
+ORDER BY job_count DESC
+
+-- 4. Top APIs used for job data by job counts this month --
+SELECT
+    source,
+    month,
+    SUM(job_count) AS job_count
+FROM `thermal-slice-458921-t9.job_data.monthly_job_trends`
+WHERE month = FORMAT_DATE('%Y-%m', CURRENT_DATE())
+GROUP BY source, month
+ORDER BY job_count DESC
+
+-- 5. Salary distribution by job category and type --
+SELECT
+    job_category,
+    job_type,
+    MIN(min_salary) AS min_salary,
+    MAX(max_salary) AS max_salary,
+    SAFE_DIVIDE(SUM(salary_sum), SUM(salary_count)) AS avg_salary
+FROM `thermal-slice-458921-t9.job_data.salary_distribution`
+GROUP BY job_category, job_type
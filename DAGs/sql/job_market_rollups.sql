@@ -0,0 +1,74 @@
+-- Rollup tables maintained by the transform service on every load (see google_cloud/transform/rollups.py) --
+CREATE TABLE IF NOT EXISTS `thermal-slice-458921-t9.job_data.monthly_job_trends` (
+    month STRING,
+    company_name STRING,
+    source STRING,
+    job_category STRING,
+    job_count INT64,
+    salary_sum FLOAT64,
+    salary_count INT64
+);
+
+CREATE TABLE IF NOT EXISTS `thermal-slice-458921-t9.job_data.daily_company_postings` (
+    posted_day STRING,
+    company_name STRING,
+    job_count INT64
+);
+
+CREATE TABLE IF NOT EXISTS `thermal-slice-458921-t9.job_data.salary_distribution` (
+    job_category STRING,
+    job_type STRING,
+    min_salary FLOAT64,
+    max_salary FLOAT64,
+    salary_sum FLOAT64,
+    salary_count INT64
+);
+
+-- One-off backfill from the rows loaded before the rollups existed --
+INSERT INTO `thermal-slice-458921-t9.job_data.monthly_job_trends`
+SELECT
+    SUBSTR(posted_date, 1, 7) AS month,
+    company_name,
+    source,
+    job_category,
+    COUNT(*) AS job_count,
+    SUM(
+      (
+        CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'^([0-9.]+)') AS FLOAT64) +
+        CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'- ([0-9.]+)$') AS FLOAT64)
+      ) / 2
+    ) AS salary_sum,
+    COUNT(
+      (
+        CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'^([0-9.]+)') AS FLOAT64) +
+        CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'- ([0-9.]+)$') AS FLOAT64)
+      ) / 2
+    ) AS salary_count
+FROM `thermal-slice-458921-t9.job_data.standardized_jobs`
+WHERE posted_date IS NOT NULL
+GROUP BY month, company_name, source, job_category;
+
+INSERT INTO `thermal-slice-458921-t9.job_data.daily_company_postings`
+SELECT
+    SUBSTR(posted_date, 1, 10) AS posted_day,
+    company_name,
+    COUNT(*) AS job_count
+FROM `thermal-slice-458921-t9.job_data.standardized_jobs`
+WHERE posted_date IS NOT NULL
+GROUP BY posted_day, company_name;
+
+INSERT INTO `thermal-slice-458921-t9.job_data.salary_distribution`
+SELECT
+    job_category,
+    job_type,
+    MIN(CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'([0-9.]+)') AS FLOAT64)) AS min_salary,
+    MAX(CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'([0-9.]+)') AS FLOAT64)) AS max_salary,
+    SUM(CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'([0-9.]+)') AS FLOAT64)) AS salary_sum,
+    COUNT(CAST(REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'([0-9.]+)') AS FLOAT64)) AS salary_count
+FROM `thermal-slice-458921-t9.job_data.standardized_jobs`
+WHERE
+    salary IS NOT NULL
+    AND job_category IS NOT NULL
+    AND job_type IS NOT NULL
+    AND REGEXP_EXTRACT(REPLACE(salary, '$', ''), r'([0-9.]+)') IS NOT NULL
+GROUP BY job_category, job_type;